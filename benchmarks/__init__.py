@@ -0,0 +1,2 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
@@ -0,0 +1,226 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Seeded generator of synthetic Lane-style MARC bib/aut/hdg records.
+
+Records cover every XOBIS element type, and the fields that exercise
+the heavier paths of RecordTransformer: bib 94X, linked 880s,
+490/830/901 series, and hdg 852/866/907. The same seed always
+generates the same corpus.
+"""
+
+import random
+from pathlib import Path
+
+from pymarc import Record, Field
+
+from pylmldb.xobis_constants import *
+
+
+# element types generated as auts, with their 1XX tag and Lane category (655 77)
+AUT_ELEMENT_TYPES = {
+    BEING        : ('100', "Persons"),
+    ORGANIZATION : ('110', "Organizations"),
+    EVENT        : ('111', "Meetings"),
+    WORK_AUT     : ('130', "Works"),
+    CONCEPT      : ('150', "Topical"),
+    LANGUAGE     : ('150', "Languages"),
+    TIME         : ('150', "Time"),
+    STRING       : ('150', "Strings, Nominal"),
+    PLACE        : ('151', "Places"),
+    RELATIONSHIP : ('155', "Relationships")
+}
+# element types generated as bibs, with their leader type/bib level
+BIB_ELEMENT_TYPES = {
+    WORK_INST : 'am',
+    OBJECT    : 'rm'
+}
+
+WORDS = ("anatomy", "cardiology", "clinical", "disease", "health", "history",
+    "hospital", "medicine", "nursing", "pathology", "physiology", "practice",
+    "public", "research", "surgery", "therapy", "journal", "studies", "review",
+    "annual", "report", "letters", "collection", "methods", "principles")
+SURNAMES = ("Smith", "García", "Nguyen", "Müller", "Rossi", "Kowalski", "Tanaka",
+    "Ivanov", "Dubois", "Okafor", "Chen", "Larsen", "Cohen", "Silva", "Osler")
+GIVEN_NAMES = ("Mary", "John", "Wei", "Anna", "José", "Ingrid", "Kwame", "Yuki",
+    "Pierre", "Olga", "William", "Fatima", "Lars", "Sofia", "Harvey")
+PLACES = ("Stanford (Calif.)", "London (England)", "Paris (France)", "Boston (Mass.)",
+    "Tokyo (Japan)", "Berlin (Germany)", "Geneva (Switzerland)", "New York (N.Y.)")
+LANGUAGES = ("English", "French", "German", "Spanish", "Japanese", "Russian", "Chinese", "Latin")
+CYRILLIC_WORDS = ("медицина", "история", "болезни", "хирургия", "журнал", "исследования")
+REL_NAMES = (("Author", "Associative"), ("Publisher", "Associative"),
+    ("Subject", "Associative"), ("Broader", "Superordinate"),
+    ("Narrower", "Subordinate"), ("Preceded by", "Preordinate"),
+    ("Succeeded by", "Postordinate"), ("Translation of", "Equivalence"))
+LOCATION_CODES = ("STACKS", "EDATA", "REF", "PER", "SPEC", "CIRC", "BOOK")
+DATE_TYPES = "sssmmqcdunr"
+
+
+class CorpusGenerator:
+    """
+    Generates synthetic records. Control numbers are sequential from 1
+    within each record type; hdg 004s link to generated bibs.
+    """
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+
+    def generate(self, n_bibs, n_auts, n_hdgs):
+        """
+        Returns dict of lists of (intended element type, pymarc Record)
+        by record type ('bib', 'aut', 'hdg').
+        Element types are cycled through so that each is covered evenly.
+        """
+        aut_element_types, bib_element_types = list(AUT_ELEMENT_TYPES), list(BIB_ELEMENT_TYPES)
+        auts, bibs = [], []
+        for i in range(n_auts):
+            element_type = aut_element_types[i % len(aut_element_types)]
+            auts.append((element_type, self.generate_aut(i+1, element_type)))
+        for i in range(n_bibs):
+            element_type = bib_element_types[i % len(bib_element_types)]
+            bibs.append((element_type, self.generate_bib(i+1, element_type)))
+        hdgs = [(HOLDINGS, self.generate_hdg(i+1, self.random.randint(1, max(n_bibs, 1)))) for i in range(n_hdgs)]
+        return { 'bib' : bibs, 'aut' : auts, 'hdg' : hdgs }
+
+
+    def generate_aut(self, ctrlno, element_type):
+        tag, category = AUT_ELEMENT_TYPES[element_type]
+        record = self.__new_record(ctrlno, 'z', ' ')
+        record.add_ordered_field(Field('008', data=self.__date_entered() + 'n| azannaabn          |a aaa      '))
+        if element_type == BEING:
+            entry = ['a', self.__person_name(), 'd', self.__year_range()]
+            variant = ['a', self.__person_name()]
+        elif element_type in (ORGANIZATION, EVENT):
+            entry = ['a', self.__title(2, 4)]
+            entry += ['b', self.__title(1, 2)] if element_type == ORGANIZATION else ['d', self.__year(), 'c', self.random.choice(PLACES)]
+            variant = ['a', self.__title(2, 4)]
+        elif element_type == WORK_AUT:
+            entry = ['a', self.__title(2, 6)]
+            variant = ['a', self.__title(2, 6)]
+        elif element_type == LANGUAGE:
+            entry = ['a', f"{self.random.choice(LANGUAGES)} {ctrlno}"]
+            variant = ['a', f"{self.random.choice(LANGUAGES)} language {ctrlno}"]
+        elif element_type == TIME:
+            entry = ['a', self.__year_range()]
+            variant = ['a', self.__year()]
+        elif element_type == STRING:
+            entry = ['a', self.__title(1, 3)]
+            variant = ['a', self.__title(1, 3)]
+        elif element_type == PLACE:
+            entry = ['a', f"{self.__title(1, 2).title()} ({self.random.choice(PLACES)})"]
+            variant = ['a', self.__title(1, 2).title()]
+        elif element_type == RELATIONSHIP:
+            rel_name, rel_type = REL_NAMES[ctrlno % len(REL_NAMES)]
+            entry = ['a', f"{rel_name}{'' if ctrlno <= len(REL_NAMES) else f' {ctrlno}'}:"]
+            variant = ['a', rel_name.lower()]
+        else:
+            entry = ['a', self.__title(1, 3).title()]
+            variant = ['a', self.__title(1, 3)]
+        record.add_field(Field(tag, '2 ' if tag in ('110','111') else '1 ' if tag == '100' else ' 0' if tag == '130' else '  ', entry))
+        record.add_field(Field('4' + tag[1:], '  ', variant))
+        record.add_field(Field('655', '77', ['a', category]))
+        if element_type == RELATIONSHIP:
+            record.add_field(Field('655', '77', ['a', rel_type]))
+        # related entries and 94X
+        if element_type not in (STRING, TIME, RELATIONSHIP):
+            record.add_field(Field('5' + tag[1:], '  ', ['e', "Related", 'a', self.__title(1, 3)]))
+            record.add_field(Field('941', '  ', ['a', self.random.choice(PLACES)]))
+            record.add_field(Field('942', '  ', ['a', self.random.choice(LANGUAGES)]))
+            record.add_field(Field('943', '  ', ['a', self.__year(), 'b', self.__year()]))
+        record.add_field(Field('670', '  ', ['a', f"{self.__title(2, 5)}, {self.__year()}"]))
+        return record
+
+
+    def generate_bib(self, ctrlno, element_type):
+        record = self.__new_record(ctrlno, *BIB_ELEMENT_TYPES[element_type])
+        date_type = self.random.choice(DATE_TYPES)
+        d1 = self.__year()
+        d2 = str(int(d1) + self.random.randint(1, 30)) if date_type in 'mqdr' else '    '
+        record.add_ordered_field(Field('008', data=f"{self.__date_entered()}{date_type}{d1}{d2}cau           000 0 eng d"))
+        record.add_field(Field('020', '  ', ['a', f"978{self.random.randint(10**9, 10**10-1)}"]))
+        record.add_field(Field('035', '  ', ['a', f"(OCoLC){self.random.randint(10**6, 10**9)}"]))
+        record.add_field(Field('100', '1 ', ['a', self.__person_name(), 'e', "author."]))
+        title, remainder = self.__title(2, 6).capitalize(), self.__title(2, 5)
+        record.add_field(Field('149', ' 0', ['a', title]))
+        record.add_field(Field('245', '10', ['6', '880-01', 'a', title, 'b', remainder, 'c', f"by {self.__person_name()}."]))
+        record.add_field(Field('250', '  ', ['a', f"{self.random.randint(2, 9)}th ed."]))
+        record.add_field(Field('264', ' 1', ['a', self.random.choice(PLACES), 'b', self.__title(1, 3).title(), 'c', d1]))
+        record.add_field(Field('300', '  ', ['a', f"{self.random.randint(20, 900)} p. :", 'b', "ill. ;", 'c', "24 cm."]))
+        # series: traced 490 matching single 830, plus 901 to split over it
+        series = self.__title(2, 4).title()
+        record.add_field(Field('490', '1 ', ['a', series, 'v', f"v. {self.random.randint(1, 40)}"]))
+        record.add_field(Field('830', ' 0', ['a', series, 'v', f"v. {self.random.randint(1, 40)}"]))
+        record.add_field(Field('901', '  ', ['a', series, 'v', f"no. {self.random.randint(1, 40)} ({d1})"]))
+        record.add_field(Field('500', '  ', ['a', f"{self.__title(4, 10).capitalize()}."]))
+        record.add_field(Field('504', '  ', ['a', "Includes bibliographical references and index."]))
+        for _ in range(self.random.randint(1, 3)):
+            record.add_field(Field('650', ' 2', ['a', self.__title(1, 3).title()]))
+        record.add_field(Field('655', '77', ['a', "Books" if element_type == WORK_INST else "Realia"]))
+        record.add_field(Field('700', '1 ', ['a', self.__person_name(), 'e', "editor."]))
+        record.add_field(Field('903', '  ', ['a', f"NEW{'E' if self.random.random() < 0.5 else ''} {d1}"]))
+        record.add_field(Field('941', '  ', ['a', self.random.choice(PLACES)]))
+        record.add_field(Field('942', '  ', ['a', self.random.choice(LANGUAGES)]))
+        record.add_field(Field('880', '10', ['6', '245-01', 'a', ' '.join(self.random.sample(CYRILLIC_WORDS, 3))]))
+        return record
+
+
+    def generate_hdg(self, ctrlno, bib_ctrlno):
+        digital = self.random.random() < 0.4
+        record = self.__new_record(ctrlno, 'x' if digital else 'y', ' ')
+        record.add_ordered_field(Field('004', data=str(bib_ctrlno)))
+        record.add_ordered_field(Field('008', data=self.__date_entered() + '0u    8   4001uueng0000000'))
+        loc_code = "EDATA" if digital else self.random.choice(LOCATION_CODES[2:])
+        record.add_field(Field('852', '  ', ['b', loc_code, 'h', f"W1 {self.random.choice(WORDS).upper()}", 'i', f"v.{self.random.randint(1, 99)}"]))
+        if digital:
+            record.add_field(Field('856', '40', ['u', f"https://example.org/{ctrlno}", 'z', "Access online."]))
+        start = int(self.__year())
+        record.add_field(Field('866', ' 0', ['a', f"v.1-{self.random.randint(2, 80)}", 'v', f"v.1-{self.random.randint(2, 80)}", 'y', f"{start}-{start + self.random.randint(1, 30)}"]))
+        record.add_field(Field('907', '  ', ['a', self.random.choice(("INC", "EXC", "INR", "???")),
+                                             'b', self.random.choice(("AA", "CA", "DA; see note", "PA", "NA")),
+                                             'c', self.random.choice(("SCN", "VCN", "PER")),
+                                             'f', self.random.choice(("aa", "ab", "aa selected", "ca")),
+                                             'x', self.random.choice(("current", "eCurrent", "ceased", "edelayed")),
+                                             'y', self.random.choice(("DigiPay", "DigiFree", "PrtPay", "DigiCoop"))]))
+        return record
+
+
+    def __new_record(self, ctrlno, record_type, bib_level):
+        record = Record(force_utf8=True)
+        record.leader = f"     n{record_type}{bib_level} a22     3i 4500"
+        record.add_field(Field('001', data=str(ctrlno)))
+        record.add_field(Field('005', data=f"{self.random.randint(2000, 2019)}0{self.random.randint(1, 9)}1{self.random.randint(0, 9)}123000.0"))
+        record.add_field(Field('040', '  ', ['a', "CStL", 'c', "CStL"]))
+        return record
+
+    def __date_entered(self):
+        return f"{self.random.randint(0, 99):02d}{self.random.randint(1, 12):02d}{self.random.randint(1, 28):02d}"
+
+    def __year(self):
+        return str(self.random.randint(1800, 2019))
+
+    def __year_range(self):
+        start = self.random.randint(1800, 1950)
+        return f"{start}-{start + self.random.randint(20, 90)}"
+
+    def __person_name(self):
+        return f"{self.random.choice(SURNAMES)}, {self.random.choice(GIVEN_NAMES)}"
+
+    def __title(self, min_words, max_words):
+        return ' '.join(self.random.choice(WORDS) for _ in range(self.random.randint(min_words, max_words)))
+
+
+def write_corpus(directory, seed=0, n_bibs=1000, n_auts=1000, n_hdgs=1000):
+    """
+    Generate a corpus and write it to bib.mrc, aut.mrc and hdg.mrc in directory,
+    as read by FileRecordSource.
+    Returns dict of lists of intended element types by record type, in file order.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    element_types = {}
+    for record_type, records in CorpusGenerator(seed).generate(n_bibs, n_auts, n_hdgs).items():
+        with (directory / f"{record_type}.mrc").open('wb') as outf:
+            for element_type, record in records:
+                outf.write(record.as_marc())
+        element_types[record_type] = [element_type for element_type, record in records]
+    return element_types
@@ -0,0 +1,34 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Local stand-in for the Indexer tables and FieldTransposer map, built from
+a synthetic corpus instead of LMLDB.
+"""
+
+import os, sys
+from pathlib import Path
+
+from .corpus import write_corpus
+
+
+def prepare(work_dir, seed=0, n_bibs=1000, n_auts=1000, n_hdgs=1000):
+    """
+    Write a synthetic corpus to work_dir/records, and point the record source
+    and Indexer paths at it and at work_dir/index, so that importing
+    pyxobis.transform generates its index (and constructing a RecordTransformer
+    its FieldTransposer map) from the corpus.
+
+    Must be called before pyxobis.transform is imported, since the Indexer
+    reads its paths at import.
+    Returns the records directory and the intended element types by record type.
+    """
+    assert 'pyxobis.transform' not in sys.modules, \
+        "pyxobis.transform already imported; fixtures must be prepared first"
+    work_dir = Path(work_dir)
+    records_dir, index_dir = work_dir / 'records', work_dir / 'index'
+    index_dir.mkdir(parents=True, exist_ok=True)
+    element_types = write_corpus(records_dir, seed, n_bibs, n_auts, n_hdgs)
+    os.environ["PYXOBIS_RECORD_SOURCE_PATH"] = str(records_dir)
+    os.environ["PYXOBIS_INDEXER_PATH"] = str(index_dir)
+    return records_dir, element_types
@@ -0,0 +1,237 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Benchmark pyxobis on a synthetic corpus, reporting records/sec and peak RSS
+per stage and per element type, and saving the results as JSON
+to compare across commits:
+
+    python -m benchmarks.run --output results.json [--compare baseline.json]
+"""
+
+import sys, gc, json, time, argparse, platform, resource, subprocess, tempfile
+from pathlib import Path
+
+from pylmldb.xobis_constants import *
+
+from . import fixtures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pyxobis on a synthetic corpus.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--bibs', type=int, default=1000)
+    parser.add_argument('--auts', type=int, default=1000)
+    parser.add_argument('--hdgs', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per stage; fastest is reported")
+    parser.add_argument('--work-dir', help="directory for corpus and index files (default: temporary)")
+    parser.add_argument('--output', help="JSON file to save results to")
+    parser.add_argument('--compare', help="JSON results file of an earlier run to compare to")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        results = run(Path(args.work_dir or temp_dir), args.seed, args.bibs, args.auts, args.hdgs, args.repeat)
+
+    print_results(results)
+    if args.compare:
+        with open(args.compare) as inf:
+            print_comparison(json.load(inf), results)
+    if args.output:
+        with open(args.output, 'w') as outf:
+            json.dump(results, outf, indent=2)
+
+
+def run(work_dir, seed, n_bibs, n_auts, n_hdgs, repeat):
+    records_dir, _ = fixtures.prepare(work_dir, seed, n_bibs, n_auts, n_hdgs)
+
+    # imported only now, since index paths are read at import
+    setup_start = time.perf_counter()
+    from pyxobis.transform import RecordTransformer, LazyLaneMARCRecord, NameParser, DateTimeParser
+    from pyxobis.transform import iso2709
+    index_seconds = time.perf_counter() - setup_start
+    setup_start = time.perf_counter()
+    transformer = RecordTransformer()
+    transformer_seconds = time.perf_counter() - setup_start
+
+    from lxml import etree
+    from pymarc import Record
+
+    # raw records grouped by (actual) element type
+    raw_records = {}
+    for record_type in ('bib', 'aut', 'hdg'):
+        with (records_dir / f"{record_type}.mrc").open('rb') as inf:
+            for offset, data in iso2709.iter_raw_records(inf):
+                element_type = LazyLaneMARCRecord(data).get_xobis_element_type()
+                raw_records.setdefault(str(element_type), []).append(data)
+
+    def read(group):
+        for data in group:
+            Record(data=data)
+
+    def read_lazy(group):
+        for data in group:
+            LazyLaneMARCRecord(data).get_control_number()
+
+    def transform(group):
+        # fresh records, since transform modifies them
+        records = [LazyLaneMARCRecord(data) for data in group]
+        start = time.perf_counter()
+        for record in records:
+            transformer.transform(record)
+        return time.perf_counter() - start
+
+    transformed = {}
+    for element_type, group in raw_records.items():
+        results = [transformer.transform(LazyLaneMARCRecord(data)) for data in group]
+        transformed[element_type] = [result for result in results if result is not None]
+
+    def serialize(group):
+        for result in group:
+            etree.tostring(result.serialize_xml(), encoding='UTF-8')
+
+    def parse_names(group):
+        for data in group:
+            record = LazyLaneMARCRecord(data)
+            id_field = record.get_id_field()
+            if id_field is not None:
+                NameParser.get_parser_for_element_type(record.get_xobis_element_type())(id_field)
+
+    def parse_dates(group):
+        for datestring in group:
+            DateTimeParser.parse_as_ref(datestring)
+
+    # date strings: entries of Time auts, and 008 dates of bibs
+    datestrings = [LazyLaneMARCRecord(data).get_id_field()['a'] for data in raw_records.get(str(TIME), [])]
+    for element_type in (str(WORK_INST), str(OBJECT)):
+        datestrings.extend(LazyLaneMARCRecord(data)['008'].data[7:11] for data in raw_records.get(element_type, []))
+
+    stages = {
+        'read'        : (read, raw_records),
+        'read_lazy'   : (read_lazy, raw_records),
+        'transform'   : (transform, raw_records),
+        'serialize'   : (serialize, transformed),
+        'parse_names' : (parse_names, { element_type : group for element_type, group in raw_records.items()
+                                        if element_type != str(HOLDINGS) }),
+        'parse_dates' : (parse_dates, { str(TIME) : datestrings }),
+    }
+
+    results = {
+        'commit'    : get_commit(),
+        'timestamp' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python'    : platform.python_version(),
+        'platform'  : platform.platform(),
+        'seed'      : seed,
+        'counts'    : { 'bib' : n_bibs, 'aut' : n_auts, 'hdg' : n_hdgs },
+        'repeat'    : repeat,
+        'peak_rss_resettable' : reset_peak_rss(),
+        'setup'     : { 'index_seconds' : index_seconds, 'transformer_seconds' : transformer_seconds },
+        'untransformed' : { element_type : len(group) - len(transformed[element_type])
+                            for element_type, group in raw_records.items() },
+        'stages'    : {}
+    }
+    for stage, (function, groups) in stages.items():
+        results['stages'][stage] = measure_stage(function, groups, repeat)
+    return results
+
+
+def measure_stage(function, groups, repeat):
+    """
+    Time function over each element type group of records, repeat times,
+    keeping the fastest time and the peak RSS during the runs.
+    If function returns a number, it is taken as the time to use.
+    """
+    by_element_type = {}
+    for element_type, group in sorted(groups.items()):
+        if not group:
+            continue
+        gc.collect()
+        reset_peak_rss()
+        seconds = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            returned = function(group)
+            elapsed = returned if isinstance(returned, float) else time.perf_counter() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+        by_element_type[element_type] = summarize(len(group), seconds, get_peak_rss_kb())
+    stage = summarize(sum(result['records'] for result in by_element_type.values()),
+                      sum(result['seconds'] for result in by_element_type.values()),
+                      max((result['peak_rss_kb'] for result in by_element_type.values()), default=None))
+    stage['by_element_type'] = by_element_type
+    return stage
+
+
+def summarize(records, seconds, peak_rss_kb):
+    return { 'records' : records,
+             'seconds' : seconds,
+             'records_per_sec' : records / seconds if seconds else None,
+             'peak_rss_kb' : peak_rss_kb }
+
+
+def reset_peak_rss():
+    """
+    Reset the peak RSS of this process (Linux only).
+    Returns whether it could be reset; if not, peaks are for the whole process.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as outf:
+            outf.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def get_peak_rss_kb():
+    try:
+        with open('/proc/self/status') as inf:
+            for line in inf:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kB elsewhere
+    return peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"commit {results['commit']}  seed {results['seed']}  counts {results['counts']}")
+    print(f"setup: index {results['setup']['index_seconds']:.2f}s, transformer {results['setup']['transformer_seconds']:.2f}s")
+    for stage, stage_results in results['stages'].items():
+        print(f"{stage:<12} {format_rate(stage_results):>14}  {stage_results['peak_rss_kb'] or 0:>10} kB")
+        for element_type, element_type_results in stage_results['by_element_type'].items():
+            print(f"  {element_type:<22} {format_rate(element_type_results):>14}  {element_type_results['peak_rss_kb'] or 0:>10} kB")
+
+
+def print_comparison(old_results, new_results):
+    print(f"\ncompared to {old_results['commit']} (records/sec, new/old):")
+    for stage, stage_results in new_results['stages'].items():
+        old_stage_results = old_results['stages'].get(stage)
+        if old_stage_results is None:
+            continue
+        print(f"{stage:<12} {format_ratio(old_stage_results, stage_results):>8}")
+        for element_type, element_type_results in stage_results['by_element_type'].items():
+            old_element_type_results = old_stage_results['by_element_type'].get(element_type)
+            if old_element_type_results is not None:
+                print(f"  {element_type:<22} {format_ratio(old_element_type_results, element_type_results):>8}")
+
+
+def format_rate(results):
+    return f"{results['records_per_sec']:.1f} rec/s" if results['records_per_sec'] else "-"
+
+
+def format_ratio(old_results, new_results):
+    if not (old_results['records_per_sec'] and new_results['records_per_sec']):
+        return "-"
+    return f"{new_results['records_per_sec'] / old_results['records_per_sec']:.2f}x"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Full-catalog conversion runs that checkpoint their progress and resume
+where they stopped, setting aside records that fail to transform.
+
+    python -m pyxobis.batch.BatchRunner OUTPUT_DIR [--shard I/N] [--types bib aut hdg]
+        [--processes N] [--chunksize 64] [--checkpoint-interval 60] [--share-index] [--restart]
+        [--validate [--schema xobis.rng]] [--metrics metrics.prom|metrics.json [--metrics-interval 60]] [--cache PATH]
+"""
+
+import os, sys, json, time, base64, argparse
+from pathlib import Path
+
+from loguru import logger
+
+from ..transform import RecordSource, FileRecordSource, IndexManifest, Diagnostics
+from .TransformPipeline import TransformPipeline
+from .MetricsWriter import MetricsWriter
+
+
+class BatchRunner:
+    """
+    Runs a TransformPipeline over one shard of the record source
+    (see FileRecordSource), writing in output_dir:
+
+        records-III.xml        serialized XML of transformed records, one per line
+        rejects-III.jsonl      records that failed: record type, ctrlno, traceback, raw MARC (base64)
+        checkpoint-III.json    progress, for resuming
+
+    for shard III. Every checkpoint_interval seconds (and at the end), both
+    output files are flushed to disk, then the checkpoint written atomically:
+    records done and the last of them by record type, the output file sizes,
+    counts, and a summary of the data problems found (see Diagnostics). A run with a checkpoint truncates the outputs to the sizes
+    recorded and skips the records done, checking that the last of them is
+    where it was (and that the source snapshot is the same, if known).
+    """
+    CHECKPOINT_VERSION = 1
+
+    def __init__(self, output_dir, shard_index=0, shard_count=1, checkpoint_interval=60, pipeline=None):
+        self.output_dir = Path(output_dir)
+        self.shard_index, self.shard_count = shard_index, shard_count
+        self.checkpoint_interval = checkpoint_interval
+        self.pipeline = pipeline or TransformPipeline()
+        suffix = f"{shard_index:03}"
+        self.records_path = self.output_dir / f"records-{suffix}.xml"
+        self.rejects_path = self.output_dir / f"rejects-{suffix}.jsonl"
+        self.checkpoint_path = self.output_dir / f"checkpoint-{suffix}.json"
+
+    def get_record_source(self):
+        if self.shard_count > 1:
+            assert RecordSource.SOURCE_DIR_STR, "sharded runs need dump files (PYXOBIS_RECORD_SOURCE_PATH)"
+            return FileRecordSource(RecordSource.SOURCE_DIR_STR, self.shard_index, self.shard_count)
+        return RecordSource.get_default()
+
+    def read_checkpoint(self):
+        """
+        Returns checkpoint dict, or None if there is none.
+        """
+        try:
+            with self.checkpoint_path.open('r') as inf:
+                checkpoint = json.load(inf)
+        except FileNotFoundError:
+            return None
+        if checkpoint.get('checkpoint_version') != self.CHECKPOINT_VERSION:
+            raise ValueError(f"{self.checkpoint_path}: checkpoint version {checkpoint.get('checkpoint_version')}, "
+                             f"expected {self.CHECKPOINT_VERSION}")
+        return checkpoint
+
+    def run(self, record_types, restart=False):
+        """
+        Transform records of record_types, resuming from the checkpoint
+        (unless restart). Returns counts, including those of previous runs.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = None if restart else self.read_checkpoint()
+        with self.get_record_source() as db:
+            snapshot_id = db.get_snapshot_id()
+            if checkpoint is None:
+                checkpoint = {
+                    'checkpoint_version' : self.CHECKPOINT_VERSION,
+                    'shard'              : [self.shard_index, self.shard_count],
+                    'record_types'       : list(record_types),
+                    'source'             : snapshot_id,
+                    'done'               : {},
+                    'records_size'       : 0,
+                    'rejects_size'       : 0,
+                    'counts'             : {},
+                    'diagnostics'        : [],
+                    'complete'           : False,
+                }
+            else:
+                if checkpoint['shard'] != [self.shard_index, self.shard_count] or checkpoint['record_types'] != list(record_types):
+                    raise ValueError(f"{self.checkpoint_path}: checkpoint is of shard {checkpoint['shard']} "
+                                     f"of {checkpoint['record_types']}; use restart to start over")
+                if checkpoint['source'] is not None and snapshot_id is not None and checkpoint['source'] != snapshot_id:
+                    raise ValueError(f"{self.checkpoint_path}: record source has changed since checkpoint; "
+                                     "use restart to start over")
+                if checkpoint['complete']:
+                    logger.info(f"{self.checkpoint_path}: already complete")
+                    return checkpoint['counts']
+                logger.info(f"resuming from {self.checkpoint_path}: "
+                            + ', '.join(f"{count} {record_type}" for record_type, (count, ctrlno) in checkpoint['done'].items()))
+            previous_counts = dict(checkpoint['counts'])
+            previous_diagnostics = Diagnostics.from_summary(checkpoint.get('diagnostics', []))
+            with self.__open_output(self.records_path, checkpoint['records_size']) as outf, \
+                 self.__open_output(self.rejects_path, checkpoint['rejects_size']) as rejectf:
+
+                def write(xml):
+                    outf.write(xml + b'\n')
+
+                def reject(record_type, ctrlno, data, error):
+                    logger.error(f"{record_type} {ctrlno}: transform failed, written to {self.rejects_path.name}")
+                    rejectf.write(json.dumps({ 'record_type' : record_type, 'ctrlno' : ctrlno, 'error' : error,
+                                               'marc' : base64.b64encode(data).decode('ascii') }).encode('utf-8') + b'\n')
+
+                last_commit = time.monotonic()
+                def progress(record_type, done, ctrlno):
+                    nonlocal last_commit
+                    checkpoint['done'][record_type] = [done, ctrlno]
+                    if time.monotonic() - last_commit >= self.checkpoint_interval:
+                        self.__commit(checkpoint, outf, rejectf, previous_counts, previous_diagnostics)
+                        last_commit = time.monotonic()
+
+                skip = { record_type : tuple(done) for record_type, done in checkpoint['done'].items() }
+                self.pipeline.counts = dict.fromkeys(self.pipeline.counts, 0)
+                self.pipeline.diagnostics, self.pipeline.metrics = {}, {}
+                self.pipeline.run(db, record_types, write, reject, progress, skip)
+                checkpoint['complete'] = True
+                self.__commit(checkpoint, outf, rejectf, previous_counts, previous_diagnostics)
+        return checkpoint['counts']
+
+    @staticmethod
+    def __open_output(path, size):
+        """
+        Open output file for appending, after truncating it to size
+        (discarding anything written after the checkpoint).
+        """
+        outf = path.open('r+b' if path.exists() else 'wb')
+        outf.truncate(size)
+        outf.seek(size)
+        return outf
+
+    def __commit(self, checkpoint, outf, rejectf, previous_counts, previous_diagnostics):
+        for f in (outf, rejectf):
+            f.flush()
+            os.fsync(f.fileno())
+        checkpoint['records_size'], checkpoint['rejects_size'] = outf.tell(), rejectf.tell()
+        # (records read may be ahead of those done)
+        checkpoint['counts'] = { name : previous_counts.get(name, 0) + self.pipeline.counts[name]
+                                 for name in ('transformed', 'skipped', 'errors', 'invalid') }
+        checkpoint['diagnostics'] = Diagnostics.summarize(Diagnostics.merge(Diagnostics.merge({}, previous_diagnostics),
+                                                                            self.pipeline.diagnostics))
+        IndexManifest.write_atomic(self.checkpoint_path, json.dumps(checkpoint, indent=2).encode('utf-8'))
+
+
+def read_rejects(path):
+    """
+    Yields (record type, ctrlno, traceback, raw MARC record) from a rejects file.
+    """
+    with open(path, 'rb') as inf:
+        for line in inf:
+            reject = json.loads(line)
+            yield reject['record_type'], reject['ctrlno'], reject['error'], base64.b64decode(reject['marc'])
+
+
+def parse_shard(shard):
+    """
+    (index, count) of "I/N".
+    """
+    shard_index, shard_count = map(int, shard.split('/'))
+    if not 0 <= shard_index < shard_count:
+        raise argparse.ArgumentTypeError(f"invalid shard: {shard}")
+    return shard_index, shard_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transform records to XOBIS XML, resumably.")
+    parser.add_argument('output_dir', help="directory for output, rejects and checkpoint files")
+    parser.add_argument('--shard', type=parse_shard, default=(0, 1), help="shard I of N of the dump files (I/N)")
+    parser.add_argument('--types', nargs='+', choices=('bib', 'aut', 'hdg'), default=['bib', 'aut', 'hdg'])
+    parser.add_argument('--processes', type=int, default=None, help="transform processes (default: CPU count)")
+    parser.add_argument('--chunksize', type=int, default=64, help="records per transform task")
+    parser.add_argument('--checkpoint-interval', type=float, default=60, help="seconds between checkpoints")
+    parser.add_argument('--share-index', action='store_true', help="share one copy of the index between processes")
+    parser.add_argument('--restart', action='store_true', help="ignore any checkpoint and start over")
+    parser.add_argument('--validate', action='store_true', help="validate records against the RELAX NG schema")
+    parser.add_argument('--schema', default=None, help="RELAX NG schema, .rng or .rnc (default: $PYXOBIS_SCHEMA_PATH)")
+    parser.add_argument('--metrics', default=None, help="write metrics to this file: Prometheus text format if .prom, else JSON")
+    parser.add_argument('--metrics-interval', type=float, default=60, help="seconds between metrics writes")
+    parser.add_argument('--cache', default=None, help="ResultCache file: transform only records not cached there")
+    args = parser.parse_args()
+
+    metrics_writer = MetricsWriter(args.metrics, args.metrics_interval, { 'shard' : '/'.join(map(str, args.shard)) }) \
+                     if args.metrics else None
+    pipeline = TransformPipeline(args.processes, args.chunksize, share_index=args.share_index,
+                                 validate=args.validate, schema_path=args.schema, metrics_writer=metrics_writer,
+                                 cache_path=args.cache)
+    runner = BatchRunner(args.output_dir, *args.shard, args.checkpoint_interval, pipeline)
+    start = time.perf_counter()
+    counts = runner.run(args.types, args.restart)
+    print(f"{', '.join(f'{count} {name}' for name, count in counts.items())} in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
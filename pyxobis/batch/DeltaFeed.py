@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Record-level delta between the outputs of two sharded conversion runs
+(see ShardedWriter): feeds of the records added, changed and deleted.
+
+    python -m pyxobis.batch.DeltaFeed PREVIOUS_DIR CURRENT_DIR DELTA_DIR
+"""
+
+import os, sys, json, time, argparse
+from pathlib import Path
+
+from ..transform import IndexManifest
+from .ShardedWriter import ShardedWriter, ShardedReader, read_record_index, MANIFEST_FILE
+
+
+ADDED, CHANGED, DELETED, UNCHANGED = 'added', 'changed', 'deleted', 'unchanged'
+FEED_FILES = { ADDED : 'added.xml', CHANGED : 'changed.xml', DELETED : 'deleted.xml' }
+DELTA_MANIFEST_FILE = 'delta.json'
+
+
+def compare_record_indexes(previous_index, current_index):
+    """
+    Yields (status, record id, previous entry, current entry) by merging
+    two record indexes (iterables of (record id, canonical hash, ...)
+    in id order, as read_record_index): status is ADDED, CHANGED,
+    DELETED or UNCHANGED, and an entry is None if the record is not
+    in that index. Reads each index once, holding only one entry of each.
+    """
+    previous_index, current_index = iter(previous_index), iter(current_index)
+    previous_entry, current_entry = next(previous_index, None), next(current_index, None)
+    last_ids = [None, None]
+    def advance(index, i):
+        entry = next(index, None)
+        if entry is not None and last_ids[i] is not None and entry[0] <= last_ids[i]:
+            raise ValueError(f"record index not in id order at {entry[0]}")
+        return entry
+    while previous_entry is not None or current_entry is not None:
+        if current_entry is None or (previous_entry is not None and previous_entry[0] < current_entry[0]):
+            yield DELETED, previous_entry[0], previous_entry, None
+            last_ids[0] = previous_entry[0]
+            previous_entry = advance(previous_index, 0)
+        elif previous_entry is None or current_entry[0] < previous_entry[0]:
+            yield ADDED, current_entry[0], None, current_entry
+            last_ids[1] = current_entry[0]
+            current_entry = advance(current_index, 1)
+        else:
+            status = UNCHANGED if previous_entry[1] == current_entry[1] else CHANGED
+            yield status, current_entry[0], previous_entry, current_entry
+            last_ids = [previous_entry[0], current_entry[0]]
+            previous_entry, current_entry = advance(previous_index, 0), advance(current_index, 1)
+
+
+def write_delta(previous_dir, current_dir, delta_dir):
+    """
+    Compare the records of two sharded outputs by id and canonical hash,
+    writing in delta_dir:
+
+        added.xml      records in current_dir only
+        changed.xml    records whose canonical XML differs, as in current_dir
+        deleted.xml    records in previous_dir only, as they were
+        delta.json     counts, and the manifests compared
+
+    Feeds are collections of serialized records, like the parts. Returns counts.
+    """
+    delta_dir = Path(delta_dir)
+    delta_dir.mkdir(parents=True, exist_ok=True)
+    counts = dict.fromkeys((ADDED, CHANGED, DELETED, UNCHANGED), 0)
+    with ShardedReader(previous_dir) as previous, ShardedReader(current_dir) as current:
+        feeds = { status : (delta_dir / name).open('wb') for status, name in FEED_FILES.items() }
+        try:
+            for outf in feeds.values():
+                outf.write(ShardedWriter.COLLECTION_WRAPPER[0])
+            for status, record_id, previous_entry, current_entry in \
+                    compare_record_indexes(read_record_index(previous_dir), read_record_index(current_dir)):
+                counts[status] += 1
+                if status == UNCHANGED:
+                    continue
+                reader, (_, _, name, offset, length) = (previous, previous_entry) if status == DELETED else (current, current_entry)
+                feeds[status].write(reader.read(name, offset, length) + b'\n')
+            for outf in feeds.values():
+                outf.write(ShardedWriter.COLLECTION_WRAPPER[1])
+                outf.flush()
+                os.fsync(outf.fileno())
+        finally:
+            for outf in feeds.values():
+                outf.close()
+    delta = { 'previous' : str(previous_dir), 'current' : str(current_dir),
+              'previous_manifest' : IndexManifest.hash_file(Path(previous_dir) / MANIFEST_FILE),
+              'current_manifest' : IndexManifest.hash_file(Path(current_dir) / MANIFEST_FILE),
+              'counts' : counts, 'feeds' : FEED_FILES }
+    IndexManifest.write_atomic(delta_dir / DELTA_MANIFEST_FILE, json.dumps(delta, indent=2).encode('utf-8'))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write feeds of the records added, changed and deleted between two sharded outputs.")
+    parser.add_argument('previous_dir', help="output directory of the previous run")
+    parser.add_argument('current_dir', help="output directory of the current run")
+    parser.add_argument('delta_dir', help="directory for the feeds and delta.json")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = write_delta(args.previous_dir, args.current_dir, args.delta_dir)
+    print(f"{', '.join(f'{count} {name}' for name, count in counts.items())} in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
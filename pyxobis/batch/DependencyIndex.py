@@ -0,0 +1,294 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Reverse index of which records' transforms resolved through which
+control numbers and looked up which identities, so that when authority
+headings change only the records that depend on them need be transformed again.
+
+    python -m pyxobis.batch.DependencyIndex build PATH [--types bib aut hdg] [--output records.xml]
+    python -m pyxobis.batch.DependencyIndex dependents PATH changed.txt
+    python -m pyxobis.batch.DependencyIndex retransform PATH changed.txt --output records.xml
+"""
+
+import sys, sqlite3, argparse
+from itertools import islice
+
+from tqdm import tqdm
+from loguru import logger
+
+from ..transform import RecordTransformer, RecordSource, Indexer
+from .ResultCache import serialize
+
+
+class DependencyIndex:
+    """
+    sqlite-backed map of each transformed record (by its own control number,
+    with its record type and source ctrlno, i.e. 001) to the control numbers
+    its transform looked up or reverse looked up through the Indexer,
+    and the identities it looked up, whether found or not
+    (see Indexer.identity_dependency), and the reverse.
+
+    The identities each record is indexed by are kept too, so that when
+    a record changes, lookups of both its old and new headings are
+    invalidated, e.g. those left unverified until a heading is added.
+
+    Fixed vocabulary (see Vocabulary) is resolved once per process rather
+    than per record, and relationship types (Indexer.lookup_rel_type) are
+    not recorded; if either changes, transform everything.
+    """
+    RECORD_TYPES = ('bib', 'aut', 'hdg')
+    # record types indexed by identity (see Indexer)
+    IDENTITY_RECORD_TYPES = ('bib', 'aut')
+
+    # records between commits
+    COMMIT_INTERVAL = 1000
+    # ctrlnos per query when fetching dependents
+    QUERY_BATCH_SIZE = 500
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(str(path), timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS records (
+                               ctrlno TEXT PRIMARY KEY,
+                               record_type TEXT NOT NULL,
+                               source_ctrlno TEXT NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS records_source ON records (record_type, source_ctrlno)")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS dependencies (
+                               dependency TEXT NOT NULL,
+                               ctrlno TEXT NOT NULL,
+                               PRIMARY KEY (dependency, ctrlno)) WITHOUT ROWID""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS dependencies_ctrlno ON dependencies (ctrlno)")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS identities (
+                               ctrlno TEXT NOT NULL,
+                               identity TEXT NOT NULL,
+                               PRIMARY KEY (ctrlno, identity)) WITHOUT ROWID""")
+        self.db.commit()
+        self.uncommitted = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+    def commit(self):
+        self.db.commit()
+        self.uncommitted = 0
+
+
+    def transform(self, transformer, record_type, source_ctrlno, record):
+        """
+        Transform record with transformer, recording the control numbers
+        and identities it depends on, and the identities it is indexed by.
+        Returns the transformed pyxobis Record, or None.
+        """
+        # before transforming, which may change the record
+        identities = Indexer.get_identity_dependencies(record) if record_type in self.IDENTITY_RECORD_TYPES else ()
+        Indexer.start_recording_dependencies()
+        try:
+            result = transformer.transform(record)
+        finally:
+            dependencies = Indexer.stop_recording_dependencies()
+        ctrlno = record.get_control_number()
+        # indexed whether or not transformed
+        self.put_identities(ctrlno, identities)
+        if result is None:
+            self.remove(ctrlno)
+        else:
+            self.put(record_type, source_ctrlno, ctrlno, dependencies)
+        return result
+
+    def put(self, record_type, source_ctrlno, ctrlno, dependencies):
+        """
+        Record (replacing any earlier) the control numbers the transform
+        of the record with control number ctrlno depends on.
+        """
+        assert record_type in self.RECORD_TYPES, f"unknown record type: {record_type}"
+        self.db.execute("INSERT OR REPLACE INTO records (ctrlno, record_type, source_ctrlno) VALUES (?, ?, ?)",
+                        (ctrlno, record_type, source_ctrlno))
+        self.db.execute("DELETE FROM dependencies WHERE ctrlno = ?", (ctrlno,))
+        self.db.executemany("INSERT INTO dependencies (dependency, ctrlno) VALUES (?, ?)",
+                            ((dependency, ctrlno) for dependency in dependencies if dependency != ctrlno))
+        self.__count_operation()
+
+    def put_identities(self, ctrlno, identities):
+        """
+        Record (replacing any earlier) the identity dependencies that the
+        record with control number ctrlno is indexed by.
+        """
+        self.db.execute("DELETE FROM identities WHERE ctrlno = ?", (ctrlno,))
+        self.db.executemany("INSERT INTO identities (ctrlno, identity) VALUES (?, ?)",
+                            ((ctrlno, identity) for identity in identities))
+
+    def remove(self, ctrlno):
+        self.db.execute("DELETE FROM records WHERE ctrlno = ?", (ctrlno,))
+        self.db.execute("DELETE FROM dependencies WHERE ctrlno = ?", (ctrlno,))
+        self.__count_operation()
+
+
+    def resolve_ctrlnos(self, ctrlnos, record_type='aut'):
+        """
+        Given control numbers either in full form, e.g. "(CStL)D123",
+        or as source ctrlnos (001) of records of record_type,
+        return the set of full control numbers.
+        """
+        resolved = set()
+        for ctrlno in ctrlnos:
+            if ctrlno.startswith('('):
+                resolved.add(ctrlno)
+                continue
+            row = self.db.execute("SELECT ctrlno FROM records WHERE record_type = ? AND source_ctrlno = ?",
+                                  (record_type, ctrlno)).fetchone()
+            resolved.add(row[0] if row is not None else "(CStL)" + ctrlno)
+        return resolved
+
+    def get_changed_dependencies(self, db, changed_ctrlnos):
+        """
+        Given a RecordSource, and full control numbers of changed records,
+        return the set of those control numbers and the identity dependencies
+        of the records both as last transformed and as now in db.
+        """
+        changed = set(changed_ctrlnos)
+        source_ctrlnos = { record_type : [] for record_type in self.IDENTITY_RECORD_TYPES }
+        for ctrlno in changed_ctrlnos:
+            # old identities
+            changed.update(identity for identity, in self.db.execute("SELECT identity FROM identities WHERE ctrlno = ?", (ctrlno,)))
+            row = self.db.execute("SELECT record_type, source_ctrlno FROM records WHERE ctrlno = ?", (ctrlno,)).fetchone()
+            record_type, source_ctrlno = row if row is not None else ('aut', ctrlno.split(')', 1)[-1])
+            if record_type in source_ctrlnos:
+                source_ctrlnos[record_type].append(source_ctrlno)
+        # new identities
+        for record_type, db_query in (('bib', db.get_bibs), ('aut', db.get_auts)):
+            if source_ctrlnos[record_type]:
+                for _, record in db_query(source_ctrlnos[record_type]):
+                    changed.update(Indexer.get_identity_dependencies(record))
+        return changed
+
+    def get_dependents(self, changed):
+        """
+        Given full control numbers of changed records, and identity
+        dependencies (see get_changed_dependencies), return a dict by
+        record type of sorted source ctrlnos of the records depending on them.
+        """
+        dependents = { record_type : set() for record_type in self.RECORD_TYPES }
+        changed = iter(sorted(changed))
+        while True:
+            batch = list(islice(changed, self.QUERY_BATCH_SIZE))
+            if not batch:
+                break
+            for record_type, source_ctrlno in self.db.execute(
+                    f"""SELECT DISTINCT records.record_type, records.source_ctrlno
+                        FROM dependencies JOIN records ON records.ctrlno = dependencies.ctrlno
+                        WHERE dependencies.dependency IN ({','.join('?' * len(batch))})""", batch):
+                dependents[record_type].add(source_ctrlno)
+        return { record_type : sorted(source_ctrlnos) for record_type, source_ctrlnos in dependents.items() }
+
+    def get_records_to_retransform(self, changed):
+        """
+        Given full control numbers of changed records, and identity
+        dependencies (see get_changed_dependencies), return a dict by
+        record type of sorted source ctrlnos of those records (if indexed)
+        and the records depending on them.
+        """
+        records = { record_type : set(source_ctrlnos)
+                    for record_type, source_ctrlnos in self.get_dependents(changed).items() }
+        for ctrlno in changed:
+            row = self.db.execute("SELECT record_type, source_ctrlno FROM records WHERE ctrlno = ?", (ctrlno,)).fetchone()
+            if row is not None:
+                records[row[0]].add(row[1])
+        return { record_type : sorted(source_ctrlnos) for record_type, source_ctrlnos in records.items() }
+
+    def retransform(self, db, transformer, changed_ctrlnos):
+        """
+        Given a RecordSource, and full control numbers of changed records,
+        transform those records and the records depending on them again,
+        updating the index. The Indexer should already reflect the changes.
+        Yields (record type, source ctrlno, pyxobis Record or None).
+        """
+        records = self.get_records_to_retransform(self.get_changed_dependencies(db, changed_ctrlnos))
+        for record_type, db_query in (('bib', db.get_bibs), ('aut', db.get_auts), ('hdg', db.get_hdgs)):
+            if records[record_type]:
+                for source_ctrlno, record in db_query(records[record_type]):
+                    yield record_type, source_ctrlno, self.transform(transformer, record_type, source_ctrlno, record)
+        self.commit()
+
+
+    def __count_operation(self):
+        self.uncommitted += 1
+        if self.uncommitted >= self.COMMIT_INTERVAL:
+            self.commit()
+
+
+def write_results(results, outf):
+    """
+    Write serialized XML of transformed records, one per line; return count written.
+    """
+    count = 0
+    for record_type, source_ctrlno, result in results:
+        if result is not None:
+            outf.write(serialize(result) + b'\n')
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and use transform dependencies on authority headings.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="transform all records from the record source, recording dependencies")
+    build_parser.add_argument('path', help="dependency index file")
+    build_parser.add_argument('--types', nargs='+', choices=DependencyIndex.RECORD_TYPES, default=list(DependencyIndex.RECORD_TYPES))
+    build_parser.add_argument('--output', help="file to write transformed records to, one per line")
+    for command, help_text in (('dependents', "list records depending on changed records"),
+                               ('retransform', "transform changed records and their dependents again")):
+        subparser = subparsers.add_parser(command, help=help_text)
+        subparser.add_argument('path', help="dependency index file")
+        subparser.add_argument('changed', help="file of changed control numbers, one per line (full, or 001 of auts)")
+        if command == 'retransform':
+            subparser.add_argument('--output', required=True, help="file to write transformed records to, one per line")
+    args = parser.parse_args()
+
+    with DependencyIndex(args.path) as dependency_index:
+        if args.command == 'build':
+            transformer = RecordTransformer()
+            outf = open(args.output, 'wb') if args.output else None
+            try:
+                with RecordSource.get_default() as db:
+                    for record_type, db_query in (('bib', db.get_bibs), ('aut', db.get_auts), ('hdg', db.get_hdgs)):
+                        if record_type not in args.types:
+                            continue
+                        logger.info(f"transforming {record_type}s...")
+                        results = ((record_type, source_ctrlno, dependency_index.transform(transformer, record_type, source_ctrlno, record))
+                                   for source_ctrlno, record in tqdm(db_query()))
+                        if outf is not None:
+                            write_results(results, outf)
+                        else:
+                            for _ in results:
+                                pass
+            finally:
+                if outf is not None:
+                    outf.close()
+            return
+
+        with open(args.changed) as inf:
+            changed_ctrlnos = dependency_index.resolve_ctrlnos(filter(None, (line.strip() for line in inf)))
+        if args.command == 'dependents':
+            with RecordSource.get_default() as db:
+                changed = dependency_index.get_changed_dependencies(db, changed_ctrlnos)
+            for record_type, source_ctrlnos in dependency_index.get_dependents(changed).items():
+                for source_ctrlno in source_ctrlnos:
+                    print(f"{record_type}\t{source_ctrlno}")
+        else:
+            transformer = RecordTransformer()
+            with RecordSource.get_default() as db, open(args.output, 'wb') as outf:
+                count = write_results(dependency_index.retransform(db, transformer, changed_ctrlnos), outf)
+            print(f"{count} records transformed", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Differential check that an alternative transform path (caching, lazy
+decoding, parallelism, ...) produces the same XOBIS XML as the reference
+RecordTransformer.transform + serialize_xml path, record by record.
+
+    python -m pyxobis.batch.EquivalenceChecker bib.mrc [aut.mrc ...]
+        --alternative pyxobis.batch.EquivalenceChecker:LazyRecordPath
+        [--processes N] [--report diffs.txt] [--hashes hashes.tsv]
+"""
+
+import sys, argparse, difflib, hashlib, importlib, traceback
+from itertools import islice
+from multiprocessing import Pool
+
+from lxml import etree
+from pymarc import Record
+
+from ..transform import RecordTransformer, LazyLaneMARCRecord, iso2709
+
+
+class ReferencePath:
+    """
+    Reference transform: pymarc Record -> RecordTransformer.transform -> serialize_xml.
+    A path is constructed once per worker process, then called with raw MARC
+    record bytes, returning an lxml Element (or serialized XML bytes),
+    or None if the record is not transformed.
+    """
+    def __init__(self):
+        self.transformer = RecordTransformer()
+
+    def __call__(self, data):
+        result = self.transformer.transform(self.decode(data))
+        return None if result is None else result.serialize_xml()
+
+    def decode(self, data):
+        return Record(data=data)
+
+
+class LazyRecordPath(ReferencePath):
+    """
+    Transform from lazily decoded records.
+    """
+    def decode(self, data):
+        return LazyLaneMARCRecord(data)
+
+
+class EquivalenceResult:
+    """
+    Outcome of comparing the reference and alternative paths on one record.
+    Hashes are SHA-256 of canonical (C14N) XML, or None if not transformed;
+    errors are tracebacks of exceptions raised by a path.
+    """
+    IDENTICAL = "identical"
+    DIFFERENT = "different"
+    ERROR     = "error"
+
+    def __init__(self, ctrlno, reference_hash, alternative_hash, reference_error=None, alternative_error=None, diff=None):
+        self.ctrlno = ctrlno
+        self.reference_hash, self.alternative_hash = reference_hash, alternative_hash
+        self.reference_error, self.alternative_error = reference_error, alternative_error
+        self.diff = diff
+
+    @property
+    def status(self):
+        if self.reference_error or self.alternative_error:
+            return self.ERROR
+        if self.reference_hash != self.alternative_hash:
+            return self.DIFFERENT
+        return self.IDENTICAL
+
+
+class EquivalenceChecker:
+    """
+    Runs the reference and an alternative path over the same raw records,
+    in parallel worker processes, comparing canonicalized output.
+    """
+    def __init__(self, alternative_path_class, reference_path_class=ReferencePath, processes=None, chunksize=64):
+        self.reference_path_class = reference_path_class
+        self.alternative_path_class = alternative_path_class
+        self.processes, self.chunksize = processes, chunksize
+
+    def check(self, raw_records):
+        """
+        Given an iterable of raw MARC record bytes,
+        yield an EquivalenceResult for each, in order.
+        """
+        if self.processes == 1:
+            init_worker(self.reference_path_class, self.alternative_path_class)
+            yield from map(check_record, raw_records)
+            return
+        with Pool(self.processes, initializer=init_worker,
+                  initargs=(self.reference_path_class, self.alternative_path_class)) as pool:
+            yield from pool.imap(check_record, raw_records, chunksize=self.chunksize)
+
+
+def canonicalize(element_or_xml):
+    """
+    C14N serialization of an lxml Element or serialized XML bytes.
+    """
+    if isinstance(element_or_xml, bytes):
+        element_or_xml = etree.fromstring(element_or_xml)
+    return etree.tostring(element_or_xml, method='c14n')
+
+
+def hash_canonical(canonical_xml):
+    return hashlib.sha256(canonical_xml).hexdigest()
+
+
+def diff_canonical(reference_xml, alternative_xml, ctrlno):
+    """
+    Unified diff of pretty-printed canonical XML (either may be None).
+    """
+    def lines(canonical_xml):
+        if canonical_xml is None:
+            return []
+        parser = etree.XMLParser(remove_blank_text=True)
+        return etree.tounicode(etree.fromstring(canonical_xml, parser), pretty_print=True).splitlines(keepends=True)
+    return ''.join(difflib.unified_diff(lines(reference_xml), lines(alternative_xml),
+                                        f"{ctrlno} reference", f"{ctrlno} alternative"))
+
+
+def get_raw_control_number(data):
+    """
+    Field 001 data of raw MARC record bytes, or None.
+    """
+    leader, base_address, entries = iso2709.read_directory(data)
+    for entry in entries:
+        if entry[0] == '001':
+            return iso2709.get_field_data(data, base_address, entry).decode('utf-8', errors='replace')
+    return None
+
+
+# per-worker-process paths
+worker_paths = None
+
+def init_worker(reference_path_class, alternative_path_class):
+    global worker_paths
+    worker_paths = (reference_path_class(), alternative_path_class())
+
+def check_record(data):
+    ctrlno = get_raw_control_number(data)
+    outputs, errors = [], []
+    for path in worker_paths:
+        try:
+            output = path(data)
+            outputs.append(None if output is None else canonicalize(output))
+            errors.append(None)
+        except Exception:
+            outputs.append(None)
+            errors.append(traceback.format_exc())
+    reference_xml, alternative_xml = outputs
+    reference_hash, alternative_hash = (None if xml is None else hash_canonical(xml) for xml in outputs)
+    diff = None
+    if reference_hash != alternative_hash:
+        diff = diff_canonical(reference_xml, alternative_xml, ctrlno)
+    return EquivalenceResult(ctrlno, reference_hash, alternative_hash, *errors, diff=diff)
+
+
+def load_class(spec):
+    """
+    Load class from "module:ClassName" string.
+    """
+    module_name, class_name = spec.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that an alternative transform path produces the same XOBIS XML as the reference path.")
+    parser.add_argument('marc_files', nargs='+', help="MARC 21 files to transform")
+    parser.add_argument('--alternative', required=True, help="path class to check, as module:ClassName")
+    parser.add_argument('--reference', default=f"{__name__}:ReferencePath", help="reference path class, as module:ClassName")
+    parser.add_argument('--processes', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--limit', type=int, default=None, help="check only the first N records")
+    parser.add_argument('--report', help="file to write diffs and errors to (default: stdout)")
+    parser.add_argument('--hashes', help="file to write ctrlno and reference/alternative hashes to (TSV)")
+    args = parser.parse_args()
+
+    def raw_records():
+        for marc_file in args.marc_files:
+            with open(marc_file, 'rb') as inf:
+                for offset, data in iso2709.iter_raw_records(inf):
+                    yield data
+
+    checker = EquivalenceChecker(load_class(args.alternative), load_class(args.reference), args.processes)
+    counts = { EquivalenceResult.IDENTICAL : 0, EquivalenceResult.DIFFERENT : 0, EquivalenceResult.ERROR : 0 }
+    report = open(args.report, 'w') if args.report else sys.stdout
+    hashes = open(args.hashes, 'w') if args.hashes else None
+    try:
+        for result in checker.check(islice(raw_records(), args.limit)):
+            counts[result.status] += 1
+            if hashes is not None:
+                hashes.write(f"{result.ctrlno}\t{result.reference_hash or ''}\t{result.alternative_hash or ''}\n")
+            if result.status == EquivalenceResult.DIFFERENT:
+                report.write(f"# {result.ctrlno}: different output\n{result.diff}\n")
+            elif result.status == EquivalenceResult.ERROR:
+                for path_name, error in (("reference", result.reference_error), ("alternative", result.alternative_error)):
+                    if error:
+                        report.write(f"# {result.ctrlno}: {path_name} path error\n{error}\n")
+    finally:
+        if report is not sys.stdout:
+            report.close()
+        if hashes is not None:
+            hashes.close()
+    print(', '.join(f"{count} {status}" for status, count in counts.items()), file=sys.stderr)
+    sys.exit(0 if counts[EquivalenceResult.IDENTICAL] == sum(counts.values()) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Periodic export of conversion metrics (see Metrics in pyxobis.transform)
+as Prometheus text-format files (e.g. for the node exporter's textfile
+collector) or JSON snapshots.
+"""
+
+import json, time
+from pathlib import Path
+
+from ..transform import Metrics, IndexManifest
+
+
+class MetricsWriter:
+    """
+    Writes Metrics snapshots to path, atomically, at most every interval
+    seconds: in the Prometheus text format if path ends in .prom, else as
+    JSON. labels (e.g. { 'shard' : '0/4' }) are added to every series.
+
+    Counters are named PREFIX + name + _total in Prometheus; histograms
+    are given in JSON as counts per bucket, with the upper bounds of the
+    buckets of QUANTILES (p50, ...). Each write also includes the seconds
+    elapsed since the writer was created, and records transformed per
+    second by element type, over the run and since the last write.
+    """
+    PREFIX = 'pyxobis_'
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, path, interval=60, labels=None):
+        self.path, self.interval, self.labels = Path(path), interval, labels or {}
+        self.format = 'prometheus' if self.path.suffix == '.prom' else 'json'
+        self.start = self.last_write = time.monotonic()
+        self.last_transformed = {}
+
+    def maybe_write(self, metrics):
+        """
+        Write snapshot metrics if interval seconds have passed since the last write.
+        """
+        if time.monotonic() - self.last_write >= self.interval:
+            self.write(metrics)
+
+    def write(self, metrics):
+        """
+        Write snapshot metrics now.
+        """
+        now = time.monotonic()
+        transformed = { labels[0] : count for (name, labels), count in metrics.items() if name == 'records_transformed' }
+        elapsed, since_last = max(now - self.start, 1e-6), max(now - self.last_write, 1e-6)
+        rates = { 'run'      : { element_type : count / elapsed for element_type, count in transformed.items() },
+                  'interval' : { element_type : (count - self.last_transformed.get(element_type, 0)) / since_last
+                                 for element_type, count in transformed.items() } }
+        format = self.format_prometheus if self.format == 'prometheus' else self.format_json
+        IndexManifest.write_atomic(self.path, format(metrics, elapsed, rates).encode('utf-8'))
+        self.last_write, self.last_transformed = now, transformed
+
+
+    def format_prometheus(self, metrics, elapsed, rates):
+        lines = []
+        def add_series(name, labels, value):
+            labels = { **self.labels, **labels }
+            label_str = ','.join(f'{label}="{escape_label_value(label_value)}"' for label, label_value in labels.items())
+            lines.append(f"{self.PREFIX}{name}{{{label_str}}} {value}" if label_str else f"{self.PREFIX}{name} {value}")
+        for name in sorted({ name for name, _ in metrics }):
+            series = [(dict(zip(Metrics.LABELS[name], labels)), value)
+                      for (series_name, labels), value in sorted(metrics.items()) if series_name == name]
+            if name in Metrics.HISTOGRAMS:
+                lines.append(f"# TYPE {self.PREFIX}{name} histogram")
+                for labels, histogram in series:
+                    cumulative = 0
+                    for upper_bound, count in zip(Metrics.HISTOGRAM_BUCKETS + (float('inf'),), histogram):
+                        cumulative += count
+                        add_series(f"{name}_bucket", { **labels, 'le' : '+Inf' if upper_bound == float('inf') else str(upper_bound) },
+                                   cumulative)
+                    add_series(f"{name}_sum", labels, histogram[-1])
+                    add_series(f"{name}_count", labels, cumulative)
+            else:
+                lines.append(f"# TYPE {self.PREFIX}{name}_total counter")
+                for labels, count in series:
+                    add_series(f"{name}_total", labels, count)
+        lines.append(f"# TYPE {self.PREFIX}elapsed_seconds gauge")
+        add_series('elapsed_seconds', {}, f"{elapsed:.3f}")
+        lines.append(f"# TYPE {self.PREFIX}records_per_second gauge")
+        for window, window_rates in rates.items():
+            for element_type, rate in sorted(window_rates.items()):
+                add_series('records_per_second', { 'element_type' : element_type, 'window' : window }, f"{rate:.3f}")
+        return '\n'.join(lines) + '\n'
+
+    def format_json(self, metrics, elapsed, rates):
+        counters, histograms = {}, {}
+        for (name, labels), value in sorted(metrics.items()):
+            entry = { 'labels' : { **self.labels, **dict(zip(Metrics.LABELS[name], labels)) } }
+            if name in Metrics.HISTOGRAMS:
+                entry.update({ 'count' : sum(value[:-1]), 'sum' : value[-1],
+                               'buckets' : dict(zip(map(str, Metrics.HISTOGRAM_BUCKETS + ('+Inf',)), value[:-1])) })
+                for q in self.QUANTILES:
+                    upper_bound = Metrics.quantile(value, q)
+                    entry[f"p{round(q * 100)}"] = '+Inf' if upper_bound == float('inf') else upper_bound
+                histograms.setdefault(name, []).append(entry)
+            else:
+                entry['value'] = value
+                counters.setdefault(name, []).append(entry)
+        return json.dumps({ 'time' : time.time(), 'labels' : self.labels, 'elapsed_seconds' : elapsed,
+                            'records_per_second' : rates, 'counters' : counters, 'histograms' : histograms }, indent=2)
+
+
+def escape_label_value(value):
+    """
+    Prometheus text format escaping of a label value.
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,264 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+On-disk cache of serialized XOBIS XML by record content, so that records
+unchanged since an earlier run need not be transformed again.
+
+    python -m pyxobis.batch.ResultCache stats PATH
+    python -m pyxobis.batch.ResultCache compact PATH [--max-bytes N]
+"""
+
+import json, time, zlib, sqlite3, hashlib, argparse
+from pathlib import Path
+
+from lxml import etree
+
+from ..transform import Indexer, FieldTransposer, IndexManifest, SQLiteIndex, LazyLaneMARCRecord, Metrics
+
+
+class ResultCache:
+    """
+    sqlite-backed cache of serialized XOBIS XML (zlib compressed), keyed by
+    the SHA-256 of a record's raw MARC bytes and a fingerprint of everything
+    else the output depends on: the Indexer files (or sqlite index),
+    the FieldTransposer map, and the transform code (see get_fingerprint).
+    Entries for other fingerprints are ignored, and removed by compact.
+
+    If max_bytes is given, least recently used entries are evicted to keep
+    the cache under that size (of compressed XML).
+
+    Results are serialized in format ('xml', or 'json'; see serialize),
+    which is part of the fingerprint. Several processes may use one cache,
+    each with its own ResultCache; to keep the others waiting as little as
+    possible, put results together, then commit.
+
+    The fingerprint includes the FieldTransposer map file, so construct
+    the cache after the RecordTransformer (which generates it if missing).
+    """
+    # returned by get if record not in cache
+    MISS = object()
+
+    # operations between commits (and eviction checks)
+    COMMIT_INTERVAL = 1000
+    # when over max_bytes, evict down to this fraction of it
+    EVICT_TO = 0.9
+
+    def __init__(self, path, max_bytes=None, fingerprint=None, format='xml'):
+        self.path, self.max_bytes, self.format = Path(path), max_bytes, format
+        self.fingerprint = fingerprint or get_fingerprint(format)
+        self.db = sqlite3.connect(str(self.path), timeout=60)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS results (
+                               record_hash BLOB NOT NULL,
+                               fingerprint TEXT NOT NULL,
+                               xml BLOB,
+                               size INTEGER NOT NULL,
+                               last_used REAL NOT NULL,
+                               UNIQUE (record_hash, fingerprint))""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self.db.commit()
+        self.pending_hits, self.uncommitted = [], 0
+        # upper bound on size, to avoid summing the table on every commit
+        self.size_estimate = self.__get_size()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+
+    def get(self, data):
+        """
+        Serialized XML cached for raw MARC record bytes data,
+        None if cached as not transformed, or MISS.
+        """
+        record_hash = self.hash_record(data)
+        row = self.db.execute("SELECT xml FROM results WHERE record_hash = ? AND fingerprint = ?",
+                              (record_hash, self.fingerprint)).fetchone()
+        Metrics.count('result_cache', ('miss' if row is None else 'hit',))
+        if row is None:
+            return self.MISS
+        self.pending_hits.append((time.time(), record_hash, self.fingerprint))
+        self.__count_operation()
+        return None if row[0] is None else zlib.decompress(row[0])
+
+    def put(self, data, xml):
+        """
+        Cache serialized XML (or None, if not transformed) for raw MARC record bytes data.
+        """
+        compressed_xml = None if xml is None else zlib.compress(xml)
+        self.size_estimate += 0 if compressed_xml is None else len(compressed_xml)
+        self.db.execute("INSERT OR REPLACE INTO results (record_hash, fingerprint, xml, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                        (self.hash_record(data), self.fingerprint, compressed_xml,
+                         0 if compressed_xml is None else len(compressed_xml), time.time()))
+        self.__count_operation()
+
+    def transform(self, transformer, data, decode=LazyLaneMARCRecord):
+        """
+        Serialized XML of raw MARC record bytes data (or None if not transformed),
+        from the cache if there, else transformed with transformer and cached.
+        """
+        xml = self.get(data)
+        if xml is self.MISS:
+            result = transformer.transform(decode(data))
+            xml = None if result is None else serialize(result, self.format)
+            self.put(data, xml)
+        return xml
+
+
+    def commit(self):
+        if self.pending_hits:
+            self.db.executemany("UPDATE results SET last_used = ? WHERE record_hash = ? AND fingerprint = ?",
+                                self.pending_hits)
+            self.pending_hits = []
+        self.db.commit()
+        self.uncommitted = 0
+        if self.max_bytes is not None and self.size_estimate > self.max_bytes:
+            self.evict(int(self.max_bytes * self.EVICT_TO))
+
+    def evict(self, max_bytes):
+        """
+        Remove least recently used entries until the cache holds at most max_bytes.
+        """
+        self.db.execute("""DELETE FROM results WHERE rowid IN (
+                               SELECT rowid FROM (
+                                   SELECT rowid, SUM(size) OVER (ORDER BY last_used DESC, rowid DESC) AS total_size
+                                   FROM results)
+                               WHERE total_size > ?)""", (max_bytes,))
+        self.db.commit()
+        self.size_estimate = self.__get_size()
+
+    def compact(self):
+        """
+        Remove entries for other fingerprints, and reclaim their disk space.
+        """
+        self.commit()
+        self.db.execute("DELETE FROM results WHERE fingerprint != ?", (self.fingerprint,))
+        self.db.commit()
+        self.size_estimate = self.__get_size()
+        self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.db.execute("VACUUM")
+
+    def get_stats(self):
+        """
+        Returns dict of entry count and total size, for current and other fingerprints.
+        """
+        self.commit()
+        stats = { 'current_entries' : 0, 'current_bytes' : 0, 'stale_entries' : 0, 'stale_bytes' : 0 }
+        for is_current, entries, size in self.db.execute(
+                "SELECT fingerprint = ?, COUNT(*), COALESCE(SUM(size), 0) FROM results GROUP BY fingerprint = ?",
+                (self.fingerprint, self.fingerprint)):
+            prefix = 'current' if is_current else 'stale'
+            stats[f'{prefix}_entries'], stats[f'{prefix}_bytes'] = entries, size
+        return stats
+
+
+    def __get_size(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def __count_operation(self):
+        self.uncommitted += 1
+        if self.uncommitted >= self.COMMIT_INTERVAL:
+            self.commit()
+
+    @staticmethod
+    def hash_record(data):
+        return hashlib.sha256(data).digest()
+
+
+def serialize(result, format='xml'):
+    """
+    Serialize a pyxobis Record as UTF-8 XML, without declaration,
+    or if format is 'json', as one line of compact JSON (see Component.serialize_json).
+    """
+    if format == 'json':
+        return json.dumps(result.serialize_json(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return etree.tostring(result.serialize_xml(), encoding='UTF-8', xml_declaration=False)
+
+
+def get_fingerprint(format='xml'):
+    """
+    Hash identifying the state transform output depends on,
+    other than the record itself: Indexer files, FieldTransposer map,
+    and pyxobis code; and the serialization format, if not xml.
+    """
+    fingerprint = hashlib.sha256()
+    if format != 'xml':
+        fingerprint.update(format.encode('ascii') + b'\0')
+    fingerprint.update(get_index_fingerprint().encode('ascii'))
+    fingerprint.update(get_code_fingerprint().encode('ascii'))
+    return fingerprint.hexdigest()
+
+
+def get_index_fingerprint():
+    """
+    Hash of the Indexer files and FieldTransposer map (if generated yet),
+    by their hashes in the index manifest; or with the sqlite backend,
+    of the sqlite index's source snapshot, build time and count of
+    updates (see SQLiteIndex), and the FieldTransposer map.
+    """
+    artifacts = IndexManifest(Indexer.INDEX_MANIFEST_FILE).read()
+    if Indexer.INDEX_BACKEND == "sqlite":
+        sqlite_index = SQLiteIndex(Indexer.INDEX_SQLITE_FILE)
+        try:
+            meta = sqlite_index.get_meta()
+        finally:
+            sqlite_index.close()
+        index_state = [meta.get(key) for key in ('format_version', 'source', 'built', 'updates')]
+    else:
+        index_state = [artifacts.get(path.name, {}).get('sha256') for path in Indexer.INDEX_FILES]
+    index_state.append(artifacts.get(FieldTransposer.FIELD_TRANSPOSER_MAP_FILE.name, {}).get('sha256'))
+    return hashlib.sha256(json.dumps(index_state).encode('utf-8')).hexdigest()
+
+
+def get_code_fingerprint():
+    """
+    Hash of the pyxobis transform, builders and classes source,
+    and of pylmldb's (whose record methods the transform relies on).
+    """
+    import pylmldb
+    package_dir = Path(__file__).resolve().parent.parent
+    source_files = []
+    for source_dir in (package_dir / 'transform', package_dir / 'builders', package_dir / 'classes',
+                       Path(pylmldb.__file__).parent):
+        source_files.extend(sorted(source_dir.rglob('*.py')))
+    return hash_files(source_files)
+
+
+def hash_files(paths):
+    file_hash = hashlib.sha256()
+    for path in paths:
+        # identify files by name and directory only, to be independent of install location
+        file_hash.update('/'.join(path.parts[-2:]).encode('utf-8') + b'\0')
+        if path.exists():
+            with path.open('rb') as inf:
+                for chunk in iter(lambda: inf.read(1 << 20), b''):
+                    file_hash.update(chunk)
+        file_hash.update(b'\0')
+    return file_hash.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage a transform result cache.")
+    parser.add_argument('command', choices=('stats', 'compact'))
+    parser.add_argument('path', help="cache file")
+    parser.add_argument('--max-bytes', type=int, default=None, help="when compacting, also evict down to this size")
+    args = parser.parse_args()
+
+    with ResultCache(args.path) as cache:
+        if args.command == 'compact':
+            if args.max_bytes is not None:
+                cache.evict(args.max_bytes)
+            cache.compact()
+        for key, value in cache.get_stats().items():
+            print(f"{key}\t{value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Validation of XOBIS XML output against the XOBIS 2.0 RELAX NG schema,
+in bulk, in worker processes that each compile the schema once.
+
+    python -m pyxobis.batch.SchemaValidator FILE_OR_DIR [...] [--schema xobis.rng]
+        [--processes N] [--report errors.tsv]
+"""
+
+import os, sys, time, argparse
+from pathlib import Path
+from itertools import islice
+from multiprocessing import Pool
+
+from lxml import etree
+from loguru import logger
+
+from ..classes import XMLReader
+
+
+class SchemaValidator:
+    """
+    Validates records against the schema at schema_path (default: the
+    PYXOBIS_SCHEMA_PATH environment variable), in processes worker
+    processes: serialized records in chunks of chunksize, or whole files
+    (e.g. ShardedWriter parts) one per task. Invalid records are reported
+    with their id (controlData/id value) and errors: (path in the record,
+    message).
+    """
+    SCHEMA_PATH_STR = os.environ.get("PYXOBIS_SCHEMA_PATH")
+
+    def __init__(self, schema_path=None, processes=None, chunksize=64):
+        self.schema_path = schema_path or self.SCHEMA_PATH_STR
+        assert self.schema_path, "no schema: pass schema_path, or set PYXOBIS_SCHEMA_PATH"
+        self.processes, self.chunksize = processes, chunksize
+        # compile in this process too, so that a bad schema fails here
+        load_schema(self.schema_path)
+
+    def validate_records(self, xmls):
+        """
+        Yields (record id, errors) of each invalid record of xmls (serialized records).
+        """
+        xmls = iter(xmls)
+        chunks = iter(lambda: list(islice(xmls, self.chunksize)), [])
+        for results in self.__map(validate_chunk, chunks):
+            yield from results
+
+    def validate_files(self, paths):
+        """
+        Yields (path, record id, errors) of each invalid record in the files
+        at paths (collections of records, or records one per line).
+        """
+        for path, results in self.__map(validate_file, map(str, paths)):
+            for record_id, errors in results:
+                yield path, record_id, errors
+
+    def __map(self, function, tasks):
+        if self.processes == 1:
+            init_worker(self.schema_path)
+            yield from map(function, tasks)
+            return
+        with Pool(self.processes, initializer=init_worker, initargs=(self.schema_path,)) as pool:
+            yield from pool.imap(function, tasks)
+
+
+def load_schema(schema_path):
+    """
+    Compiled RelaxNG schema: XML syntax (.rng), or compact (.rnc; needs the rnc2rng package).
+    """
+    if Path(schema_path).suffix == '.rnc':
+        return etree.RelaxNG.from_rnc_string(Path(schema_path).read_text(encoding='utf-8'))
+    return etree.RelaxNG(file=str(schema_path))
+
+def validate_element(schema, record_e):
+    """
+    List of (path, message) of errors validating record element record_e (empty if valid).
+    """
+    if schema.validate(record_e):
+        return []
+    return [(get_error_path(record_e, entry.path), entry.message) for entry in schema.error_log]
+
+def get_error_path(record_e, error_path):
+    """
+    Readable path (e.g. record/being/entry/name[2]) of an element of
+    record_e, from a libxml2 error path relative to it (e.g. /*/*[2]/*/*[2]).
+    """
+    steps = (error_path or '').lstrip('/').split('/', 1)
+    element = record_e
+    if len(steps) > 1:
+        elements = record_e.xpath(steps[1])
+        if not elements:
+            return error_path
+        element = elements[0]
+    names = []
+    while element is not None:
+        name = etree.QName(element).localname
+        parent_e = element.getparent()
+        if element is not record_e and len(parent_e.findall(element.tag)) > 1:
+            name += f"[{parent_e.findall(element.tag).index(element) + 1}]"
+        names.append(name)
+        if element is record_e:
+            break
+        element = parent_e
+    return '/'.join(reversed(names))
+
+def get_record_id(record_e):
+    """
+    controlData/id value of a record element.
+    """
+    return record_e.findtext('{http://www.xobis.info/ns/2.0/}controlData/{http://www.xobis.info/ns/2.0/}id/{http://www.xobis.info/ns/2.0/}value')
+
+
+# per-worker-process compiled schema
+worker_schema = None
+
+def init_worker(schema_path):
+    global worker_schema
+    worker_schema = load_schema(schema_path)
+
+def validate_chunk(xmls):
+    """
+    List of (record id, errors) of invalid records of xmls.
+    """
+    results = []
+    for xml in xmls:
+        record_e = etree.fromstring(xml)
+        errors = validate_element(worker_schema, record_e)
+        if errors:
+            results.append((get_record_id(record_e), errors))
+    return results
+
+def validate_file(path):
+    """
+    (path, list of (record id, errors) of invalid records in file at path).
+    """
+    results = []
+    with XMLReader(path) as reader:
+        for record_e in reader.iter_elements():
+            errors = validate_element(worker_schema, record_e)
+            if errors:
+                results.append((get_record_id(record_e), errors))
+    return path, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate XOBIS XML files against the RELAX NG schema.")
+    parser.add_argument('paths', nargs='+', help="files of records, or directories of .xml files (e.g. sharded output)")
+    parser.add_argument('--schema', default=None, help="RELAX NG schema, .rng or .rnc (default: $PYXOBIS_SCHEMA_PATH)")
+    parser.add_argument('--processes', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--report', default=None, help="write invalid records to this file: path, id, error path, message")
+    args = parser.parse_args()
+
+    paths = [file_path for path in map(Path, args.paths)
+             for file_path in (sorted(path.glob('*.xml')) if path.is_dir() else [path])]
+    validator = SchemaValidator(args.schema, args.processes)
+    start, n_invalid = time.perf_counter(), 0
+    reportf = open(args.report, 'w', encoding='utf-8') if args.report else None
+    try:
+        for path, record_id, errors in validator.validate_files(paths):
+            n_invalid += 1
+            for error_path, message in errors:
+                if reportf is not None:
+                    reportf.write(f"{path}\t{record_id}\t{error_path}\t{message}\n")
+                else:
+                    logger.error(f"{record_id}: {error_path}: {message}")
+    finally:
+        if reportf is not None:
+            reportf.close()
+    print(f"{len(paths)} files, {n_invalid} invalid records in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,429 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Parallel output of transformed records to XOBIS XML part files, partitioned
+by element type and control number range, with a manifest of the parts,
+and an index of each part for reading single records by id.
+
+    python -m pyxobis.batch.ShardedWriter OUTPUT_DIR [--types bib aut hdg]
+        [--processes N] [--chunksize 64] [--range-size 100000] [--cache PATH]
+"""
+
+import os, re, sys, json, time, heapq, queue, argparse, traceback, multiprocessing
+from pathlib import Path
+from collections import OrderedDict
+
+from lxml import etree
+from loguru import logger
+
+from ..transform import RecordTransformer, RecordSource, IndexManifest, LazyLaneMARCRecord, Diagnostics
+from ..classes import parse_record
+from .ResultCache import ResultCache, serialize
+from .EquivalenceChecker import canonicalize, hash_canonical
+
+
+class ShardedWriter:
+    """
+    Writes serialized records of one writer (worker process) to part files
+    in output_dir, one per element type and range of range_size control
+    numbers, e.g. being-000100000-w003.xml for Being records 100000-199999
+    from writer 3. Each part is a well-formed document: records inside a
+    collection element. Beside each part, a sidecar index (.idx) lists the
+    id (controlData/id value), byte offset, length and canonical hash
+    (sha256 of C14N) of each record in it, one per line, tab-separated,
+    in id order.
+
+    At most MAX_OPEN_FILES parts are open at once; others are closed,
+    and appended to if more records of them come.
+    """
+    COLLECTION_WRAPPER = (b'<?xml version="1.0" encoding="UTF-8"?>\n<collection xmlns="http://www.xobis.info/ns/2.0/">\n',
+                          b'</collection>\n')
+    MAX_OPEN_FILES = 64
+
+    def __init__(self, output_dir, writer_id=0, range_size=100000):
+        self.output_dir = Path(output_dir)
+        self.writer_id, self.range_size = writer_id, range_size
+        # { (element type, range start) : part entry }
+        self.parts = {}
+        # { (element type, range start) : file }, least recently used first
+        self.open_files = OrderedDict()
+        # { (element type, range start) : [(record id, offset, length, canonical hash)] }
+        self.offsets = {}
+
+    def write(self, element_type, ctrlno, xml, record_id=None):
+        """
+        Write serialized record xml of element_type (e.g. 'Being')
+        with (numeric) control number ctrlno to its part,
+        indexed by record_id if given (see get_record_id).
+        """
+        key = (element_type, get_ctrlno_number(ctrlno) // self.range_size * self.range_size)
+        outf = self.open_files.get(key)
+        if outf is None:
+            outf = self.__open(key)
+        else:
+            self.open_files.move_to_end(key)
+        if record_id is not None:
+            self.offsets[key].append((record_id, outf.tell(), len(xml), hash_canonical(canonicalize(xml))))
+        outf.write(xml + b'\n')
+        self.parts[key]['records'] += 1
+
+    def __open(self, key):
+        element_type, range_start = key
+        if len(self.open_files) >= self.MAX_OPEN_FILES:
+            self.open_files.popitem(last=False)[1].close()
+        if key in self.parts:
+            outf = (self.output_dir / self.parts[key]['name']).open('ab')
+        else:
+            name = f"{element_type.lower()}-{range_start:09}-w{self.writer_id:03}.xml"
+            self.parts[key] = { 'name' : name, 'element_type' : element_type, 'writer' : self.writer_id,
+                                'ctrlno_range' : [range_start, range_start + self.range_size - 1], 'records' : 0,
+                                'index' : name[:-len('.xml')] + '.idx' }
+            self.offsets[key] = []
+            outf = (self.output_dir / name).open('wb')
+            outf.write(self.COLLECTION_WRAPPER[0])
+        self.open_files[key] = outf
+        return outf
+
+    def close(self):
+        """
+        Finish all parts, returning their manifest entries.
+        """
+        for outf in self.open_files.values():
+            outf.close()
+        self.open_files.clear()
+        for part in self.parts.values():
+            path = self.output_dir / part['name']
+            with path.open('ab') as outf:
+                outf.write(self.COLLECTION_WRAPPER[1])
+                outf.flush()
+                os.fsync(outf.fileno())
+            part['size'], part['sha256'] = path.stat().st_size, IndexManifest.hash_file(path)
+        for key, part in self.parts.items():
+            with (self.output_dir / part['index']).open('w', encoding='utf-8') as outf:
+                outf.writelines(f"{record_id}\t{offset}\t{length}\t{record_hash}\n"
+                                for record_id, offset, length, record_hash in sorted(self.offsets[key]))
+        return list(self.parts.values())
+
+
+def get_ctrlno_number(ctrlno):
+    """
+    Numeric part of a control number ("(CStL)123456" --> 123456), or 0.
+    """
+    return int(re.sub(r'\D', '', ctrlno) or 0)
+
+def get_record_id(record):
+    """
+    controlData/id value of a pyxobis Record.
+    """
+    return record.control_data.id_content.id_value
+
+def get_element_type(record):
+    """
+    Element type of a pyxobis Record, by its principal element: 'Being', 'Concept', 'Work', 'Holdings', ...
+    """
+    return type(record.principal_element).__name__
+
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 2
+RECORD_INDEX_FILE = 'records.idx'
+
+def write_manifest(output_dir, parts, counts=None, diagnostics=None):
+    """
+    Write the record index of output_dir (see write_record_index), then
+    atomically manifest.json, listing parts (ShardedWriter.close entries),
+    in element type and range order, with record counts by element type,
+    and a summary of the data problems found (Diagnostics snapshot diagnostics).
+    """
+    parts = sorted(parts, key=lambda part: (part['element_type'], part['ctrlno_range'][0], part['writer']))
+    element_type_counts = {}
+    for part in parts:
+        element_type_counts[part['element_type']] = element_type_counts.get(part['element_type'], 0) + part['records']
+    write_record_index(output_dir, parts)
+    manifest = { 'manifest_version' : MANIFEST_VERSION, 'counts' : counts or {},
+                 'element_types' : element_type_counts, 'record_index' : RECORD_INDEX_FILE,
+                 'diagnostics' : Diagnostics.summarize(diagnostics or {}), 'parts' : parts }
+    IndexManifest.write_atomic(Path(output_dir) / MANIFEST_FILE, json.dumps(manifest, indent=2).encode('utf-8'))
+
+def read_manifest(output_dir, verify_hashes=False):
+    """
+    Returns manifest dict of output_dir; raises ValueError if a part
+    isn't as listed (size, or if verify_hashes, content).
+    """
+    output_dir = Path(output_dir)
+    with (output_dir / MANIFEST_FILE).open('r') as inf:
+        manifest = json.load(inf)
+    if manifest.get('manifest_version') != MANIFEST_VERSION:
+        raise ValueError(f"{output_dir / MANIFEST_FILE}: manifest version {manifest.get('manifest_version')}, expected {MANIFEST_VERSION}")
+    for part in manifest['parts']:
+        path = output_dir / part['name']
+        if not path.exists() or path.stat().st_size != part['size']:
+            raise ValueError(f"{path}: missing, or size differs from manifest")
+        if verify_hashes and IndexManifest.hash_file(path) != part['sha256']:
+            raise ValueError(f"{path}: content differs from manifest")
+        if not (output_dir / part['index']).exists():
+            raise ValueError(f"{output_dir / part['index']}: missing")
+    if not (output_dir / manifest['record_index']).exists():
+        raise ValueError(f"{output_dir / manifest['record_index']}: missing")
+    return manifest
+
+
+def write_record_index(output_dir, parts, fan_in=ShardedWriter.MAX_OPEN_FILES):
+    """
+    Write records.idx in output_dir: every record of parts, one per line,
+    tab-separated: id, canonical hash, part name, offset, length; in id order.
+    Merges the parts' (sorted) sidecar indexes, at most fan_in files at once,
+    in passes through temporary files if there are more.
+    """
+    output_dir = Path(output_dir)
+    def read_part_index(part):
+        with (output_dir / part['index']).open('r', encoding='utf-8') as inf:
+            for line in inf:
+                record_id, offset, length, record_hash = line.rstrip('\n').rsplit('\t', 3)
+                yield f"{record_id}\t{record_hash}\t{part['name']}\t{offset}\t{length}\n"
+    def read_lines(path):
+        with path.open('r', encoding='utf-8') as inf:
+            yield from inf
+        path.unlink()
+    def merge(runs, path):
+        with path.open('w', encoding='utf-8') as outf:
+            outf.writelines(heapq.merge(*runs, key=lambda line: line.split('\t', 1)[0]))
+    runs, n_temp = [read_part_index(part) for part in parts], 0
+    while len(runs) > fan_in:
+        merged_runs = []
+        for i in range(0, len(runs), fan_in):
+            path = output_dir / f"{RECORD_INDEX_FILE}.{n_temp}.tmp"
+            n_temp += 1
+            merge(runs[i:i+fan_in], path)
+            merged_runs.append(read_lines(path))
+        runs = merged_runs
+    merge(runs, output_dir / RECORD_INDEX_FILE)
+
+def read_record_index(output_dir):
+    """
+    Yields (record id, canonical hash, part name, offset, length)
+    of every record in output_dir, in id order (see write_record_index).
+    """
+    with (Path(output_dir) / RECORD_INDEX_FILE).open('r', encoding='utf-8') as inf:
+        for line in inf:
+            record_id, record_hash, name, offset, length = line.rstrip('\n').rsplit('\t', 4)
+            yield record_id, record_hash, name, int(offset), int(length)
+
+
+class ShardedReader:
+    """
+    Random access to records in the parts of an output_dir by id, through
+    the parts' sidecar indexes (loaded on first use): reads only the
+    bytes of each record requested. At most MAX_OPEN_FILES parts are
+    kept open.
+    """
+    MAX_OPEN_FILES = ShardedWriter.MAX_OPEN_FILES
+
+    def __init__(self, output_dir, verify_hashes=False):
+        self.output_dir = Path(output_dir)
+        self.manifest = read_manifest(output_dir, verify_hashes)
+        # { record id : (part name, offset, length) }
+        self.offset_index = None
+        # { part name : file }, least recently used first
+        self.open_files = OrderedDict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        for inf in self.open_files.values():
+            inf.close()
+        self.open_files.clear()
+
+    def __load_offset_index(self):
+        self.offset_index = {}
+        for part in self.manifest['parts']:
+            with (self.output_dir / part['index']).open('r', encoding='utf-8') as inf:
+                for line in inf:
+                    record_id, offset, length, record_hash = line.rstrip('\n').rsplit('\t', 3)
+                    self.offset_index[record_id] = (part['name'], int(offset), int(length))
+
+    def lookup(self, record_id):
+        """
+        (part name, offset, length) of record with record_id, or None.
+        """
+        if self.offset_index is None:
+            self.__load_offset_index()
+        return self.offset_index.get(record_id)
+
+    def get_xml(self, record_id):
+        """
+        Serialized record with record_id, or None.
+        """
+        location = self.lookup(record_id)
+        if location is None:
+            return None
+        return self.read(*location)
+
+    def read(self, name, offset, length):
+        """
+        length bytes at offset in part name (e.g. a record, as located by read_record_index).
+        """
+        inf = self.open_files.get(name)
+        if inf is None:
+            if len(self.open_files) >= self.MAX_OPEN_FILES:
+                self.open_files.popitem(last=False)[1].close()
+            inf = self.open_files[name] = (self.output_dir / name).open('rb')
+        else:
+            self.open_files.move_to_end(name)
+        inf.seek(offset)
+        return inf.read(length)
+
+    def get_element(self, record_id):
+        """
+        Record with record_id as an lxml Element, or None.
+        """
+        xml = self.get_xml(record_id)
+        return None if xml is None else etree.fromstring(xml)
+
+    def get_xmls(self, record_ids):
+        """
+        Yields (record id, serialized record or None) for record_ids,
+        reading in file and offset order.
+        """
+        for record_id in sorted(record_ids, key=lambda record_id: self.lookup(record_id) or ('', 0, 0)):
+            yield record_id, self.get_xml(record_id)
+
+
+def run_sharded(db, record_types, output_dir, processes=None, chunksize=64, range_size=100000, queue_size=8,
+                cache_path=None):
+    """
+    Transform records of record_types ('bib', 'aut', 'hdg') from RecordSource db
+    in processes worker processes, each writing its own parts with a ShardedWriter,
+    then write the manifest. Returns counts.
+    Data problems found are summarized in the manifest, and logged.
+    If cache_path is given, records in the ResultCache there are not transformed again.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    processes = processes or os.cpu_count()
+    tasks, results = multiprocessing.Queue(maxsize=queue_size), multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=shard_worker, args=(writer_id, output_dir, range_size, tasks, results, cache_path))
+               for writer_id in range(processes)]
+    for worker in workers:
+        worker.start()
+    counts, diagnostics = { 'read' : 0, 'transformed' : 0, 'skipped' : 0, 'errors' : 0 }, {}
+
+    def check_workers():
+        # (workers exit with 0 only once they have reported)
+        if any(worker.exitcode not in (None, 0) for worker in workers):
+            raise RuntimeError("sharded writer worker process failed")
+
+    def put(task):
+        # with a timeout, so as not to wait forever on workers that have died
+        while True:
+            try:
+                tasks.put(task, timeout=1)
+                return
+            except queue.Full:
+                check_workers()
+
+    try:
+        chunk = []
+        for record_type in record_types:
+            # raw records as in the source, decoded only by the workers
+            for ctrlno, data in RecordSource.get_raw_records_of(db, record_type):
+                chunk.append((ctrlno, data))
+                if len(chunk) == chunksize:
+                    put(chunk)
+                    counts['read'] += len(chunk)
+                    chunk = []
+        if chunk:
+            put(chunk)
+            counts['read'] += len(chunk)
+        for worker in workers:
+            put(None)
+        parts = []
+        for _ in workers:
+            while True:
+                try:
+                    worker_parts, worker_counts, errors, worker_diagnostics = results.get(timeout=1)
+                    break
+                except queue.Empty:
+                    check_workers()
+            parts.extend(worker_parts)
+            for name, count in worker_counts.items():
+                counts[name] += count
+            Diagnostics.merge(diagnostics, worker_diagnostics)
+            for ctrlno, error in errors:
+                logger.error(f"{ctrlno}: transform failed\n{error}")
+    except BaseException:
+        for worker in workers:
+            worker.terminate()
+        raise
+    for worker in workers:
+        worker.join()
+    write_manifest(output_dir, parts, counts, diagnostics)
+    Diagnostics.log_summary(diagnostics)
+    return counts
+
+def shard_worker(writer_id, output_dir, range_size, tasks, results, cache_path=None):
+    """
+    Transform chunks of (ctrlno, raw MARC record) from tasks until None,
+    writing them with a ShardedWriter, then put its parts, counts, errors and
+    Diagnostics snapshot on results. Records in the ResultCache at
+    cache_path (if given) are read from it rather than transformed.
+    """
+    transformer, writer = RecordTransformer(), ShardedWriter(output_dir, writer_id, range_size)
+    # after the RecordTransformer, which generates the FieldTransposer map the fingerprint includes
+    cache = ResultCache(cache_path) if cache_path else None
+    counts, errors = { 'transformed' : 0, 'skipped' : 0, 'errors' : 0 }, []
+    for chunk in iter(tasks.get, None):
+        new_results = []
+        for ctrlno, data in chunk:
+            # one bad record (or control number) fails only itself
+            try:
+                xml = ResultCache.MISS if cache is None else cache.get(data)
+                if xml is ResultCache.MISS:
+                    result = transformer.transform(LazyLaneMARCRecord(data))
+                    xml = None if result is None else serialize(result)
+                    new_results.append((data, xml))
+                elif xml is not None:
+                    # only what is needed to place it
+                    result = parse_record(etree.fromstring(xml), ('control_data', 'principal_element'))
+                if xml is None:
+                    counts['skipped'] += 1
+                    continue
+                writer.write(get_element_type(result), ctrlno, xml, get_record_id(result))
+            except Exception:
+                counts['errors'] += 1
+                errors.append((ctrlno, traceback.format_exc()))
+                continue
+            counts['transformed'] += 1
+        if cache is not None and new_results:
+            # together, so as to keep other processes waiting on the cache's write lock only briefly
+            for data, xml in new_results:
+                cache.put(data, xml)
+            cache.commit()
+    results.put((writer.close(), counts, errors, Diagnostics.collect()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transform records to XOBIS XML part files by element type and control number range.")
+    parser.add_argument('output_dir', help="directory for part files and manifest.json")
+    parser.add_argument('--types', nargs='+', choices=('bib', 'aut', 'hdg'), default=['bib', 'aut', 'hdg'])
+    parser.add_argument('--processes', type=int, default=None, help="worker processes, each writing its own parts (default: CPU count)")
+    parser.add_argument('--chunksize', type=int, default=64, help="records per task")
+    parser.add_argument('--range-size', type=int, default=100000, help="control numbers per part")
+    parser.add_argument('--cache', default=None, help="ResultCache file: transform only records not cached there")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with RecordSource.get_default() as db:
+        counts = run_sharded(db, args.types, args.output_dir, args.processes, args.chunksize, args.range_size,
+                             cache_path=args.cache)
+    print(f"{', '.join(f'{count} {name}' for name, count in counts.items())} in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
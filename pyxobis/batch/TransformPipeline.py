@@ -0,0 +1,283 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Conversion pipeline overlapping record fetching, transformation and
+writing, with bounded queues between the stages for backpressure.
+
+    python -m pyxobis.batch.TransformPipeline --output records.xml
+        [--types bib aut hdg] [--processes N] [--chunksize 64] [--queue-size 8] [--share-index] [--format xml|json]
+        [--validate [--schema xobis.rng]] [--metrics metrics.prom|metrics.json [--metrics-interval 60]] [--cache PATH]
+"""
+
+import os, sys, time, asyncio, argparse, threading, traceback
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from lxml import etree
+from loguru import logger
+
+from ..transform import RecordTransformer, RecordSource, Indexer, LazyLaneMARCRecord, Diagnostics, Metrics
+from .ResultCache import ResultCache, serialize
+from .SchemaValidator import SchemaValidator, load_schema, validate_element
+from .MetricsWriter import MetricsWriter
+
+
+class TransformPipeline:
+    """
+    Three stages, run by asyncio:
+
+        reader       (thread)   fetch raw records from the RecordSource
+                                (get_raw_records), as chunks of ISO 2709 bytes
+        transform    (processes) RecordTransformer.transform + serialize
+        writer       (thread)   write serialized records, in source order
+
+    The reader waits when queue_size chunks are waiting to be transformed,
+    and transforming waits when processes + queue_size chunks are being
+    transformed or waiting to be written (so that every process has work),
+    so memory stays bounded whichever stage is slowest.
+    Records that fail to transform are counted, and passed to reject (or logged).
+
+    If validate, each transformed record is also validated against the
+    RELAX NG schema at schema_path (default: PYXOBIS_SCHEMA_PATH; see
+    SchemaValidator) by the process that transformed it, which compiles
+    the schema once. Invalid records are still written, and are counted
+    and passed to invalid (or logged).
+
+    Data problems the transformers report to Diagnostics are collected
+    from the processes with each chunk, into diagnostics (a Diagnostics
+    snapshot), and a summary logged at the end of the run.
+    Likewise Metrics, into metrics, with the time to transform each
+    record and the bytes written; if metrics_writer (a MetricsWriter)
+    is given, they are written with it as they come, and at the end.
+
+    If cache_path is given, the processes look up each record in the
+    ResultCache there first, and transform only those not in it (or
+    changed), caching their output; cached output is still validated,
+    if validating (xml only).
+    """
+    def __init__(self, processes=None, chunksize=64, queue_size=8, share_index=False, format='xml',
+                       validate=False, schema_path=None, metrics_writer=None, cache_path=None):
+        self.processes, self.chunksize, self.queue_size = processes, chunksize, queue_size
+        self.share_index, self.format, self.cache_path = share_index, format, cache_path
+        self.schema_path = (schema_path or SchemaValidator.SCHEMA_PATH_STR) if validate else None
+        if validate:
+            assert self.schema_path, "no schema to validate with: pass schema_path, or set PYXOBIS_SCHEMA_PATH"
+            assert cache_path is None or format == 'xml', "cached output can only be validated as xml"
+            load_schema(self.schema_path)
+        self.counts = { 'read' : 0, 'transformed' : 0, 'skipped' : 0, 'errors' : 0, 'invalid' : 0 }
+        self.diagnostics, self.metrics, self.metrics_writer = {}, {}, metrics_writer
+
+    def run(self, db, record_types, write, reject=None, progress=None, skip=None, invalid=None):
+        """
+        Transform all records of record_types ('bib', 'aut', 'hdg') from
+        RecordSource db, calling write(xml) with serialized XML (or JSON, if
+        format is 'json') of each transformed record (from the writer thread).
+        Returns counts.
+
+        Records that fail to transform are passed to
+        reject(record_type, ctrlno, data, error) (default: logged).
+        After each chunk (of records of one type) is written,
+        progress(record_type, done, ctrlno) is called with the number of
+        records of the type done so far, and the control number of the last.
+        skip is an optional dict by record type of (count, ctrlno): records
+        to skip at the start (done before), and the control number of the
+        last of them, which is checked.
+        If validating, records that are not valid are passed to
+        invalid(record_type, ctrlno, errors), errors being a list of
+        (path in the record, message) (default: logged).
+        """
+        if self.share_index:
+            Indexer.share_index()
+        with ProcessPoolExecutor(self.processes, initializer=init_worker,
+                                 initargs=(self.format, self.schema_path, self.cache_path)) as pool:
+            asyncio.run(self.__run(db, record_types, write, reject or self.__log_reject, progress, skip or {},
+                                   invalid or self.__log_invalid, pool))
+        Diagnostics.log_summary(self.diagnostics)
+        if self.metrics_writer is not None:
+            self.metrics_writer.write(self.metrics)
+        return self.counts
+
+    async def __run(self, db, record_types, write, reject, progress, skip, invalid, pool):
+        loop = asyncio.get_running_loop()
+        # chunks of raw records to transform; futures of transformed chunks to write, in order
+        read_queue = asyncio.Queue(maxsize=self.queue_size)
+        write_queue = asyncio.Queue(maxsize=(self.processes or os.cpu_count()) + self.queue_size)
+        # records done by record type
+        done = { record_type : skip.get(record_type, (0, None))[0] for record_type in record_types }
+
+        # set if a stage fails, so that the reader thread stops
+        stop = threading.Event()
+
+        def put(chunk):
+            future = asyncio.run_coroutine_threadsafe(read_queue.put(chunk), loop)
+            while not stop.is_set():
+                if wait([future], timeout=1).done:
+                    return future.result()
+
+        def read():
+            for record_type in record_types:
+                # chunks are of one record type, so that progress covers all records of each chunk
+                chunk = []
+                skip_count, skip_ctrlno = skip.get(record_type, (0, None))
+                # raw records as in the source, not decoded here
+                records = iter(RecordSource.get_raw_records_of(db, record_type))
+                ctrlno = None
+                for _ in range(skip_count):
+                    ctrlno, _ = next(records, (None, None))
+                if skip_count and ctrlno != skip_ctrlno:
+                    raise ValueError(f"{record_type} record {skip_count} is {ctrlno}, expected {skip_ctrlno}; "
+                                     "record source has changed since the records skipped were done")
+                for ctrlno, data in records:
+                    if stop.is_set():
+                        return
+                    chunk.append((record_type, ctrlno, data))
+                    if len(chunk) == self.chunksize:
+                        put(chunk)
+                        chunk = []
+                if chunk:
+                    put(chunk)
+
+        async def reader():
+            await loop.run_in_executor(None, read)
+            await read_queue.put(None)
+
+        async def dispatcher():
+            while True:
+                chunk = await read_queue.get()
+                if chunk is None:
+                    break
+                self.counts['read'] += len(chunk)
+                await write_queue.put(loop.run_in_executor(pool, transform_chunk, chunk))
+            await write_queue.put(None)
+
+        async def writer():
+            while True:
+                future = await write_queue.get()
+                if future is None:
+                    break
+                results, diagnostics, metrics = await future
+                Diagnostics.merge(self.diagnostics, diagnostics)
+                Metrics.merge(self.metrics, metrics)
+                await loop.run_in_executor(None, self.__write_chunk, results, write, reject, progress, invalid, done)
+
+        tasks = [asyncio.create_task(stage()) for stage in (reader, dispatcher, writer)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            stop.set()
+            for task in tasks:
+                task.cancel()
+            raise
+
+    def __write_chunk(self, results, write, reject, progress, invalid, done):
+        output_bytes = 0
+        for record_type, ctrlno, data, xml, error, validation_errors in results:
+            if error is not None:
+                self.counts['errors'] += 1
+                reject(record_type, ctrlno, data, error)
+            elif xml is None:
+                self.counts['skipped'] += 1
+            else:
+                self.counts['transformed'] += 1
+                if validation_errors:
+                    self.counts['invalid'] += 1
+                    invalid(record_type, ctrlno, validation_errors)
+                write(xml)
+                output_bytes += len(xml)
+            done[record_type] += 1
+        Metrics.merge(self.metrics, { ('output_bytes', ()) : output_bytes })
+        if self.metrics_writer is not None:
+            self.metrics_writer.maybe_write(self.metrics)
+        if progress is not None:
+            progress(record_type, done[record_type], ctrlno)
+
+    @staticmethod
+    def __log_reject(record_type, ctrlno, data, error):
+        logger.error(f"{record_type} {ctrlno}: transform failed\n{error}")
+
+    @staticmethod
+    def __log_invalid(record_type, ctrlno, errors):
+        logger.warning(f"{record_type} {ctrlno}: not valid\n" + '\n'.join(f"{path}: {message}" for path, message in errors))
+
+
+# per-worker-process transformer, serialization format, compiled schema (if validating),
+# and ResultCache (if caching)
+worker_transformer, worker_format, worker_schema, worker_cache = None, 'xml', None, None
+
+def init_worker(format='xml', schema_path=None, cache_path=None):
+    global worker_transformer, worker_format, worker_schema, worker_cache
+    worker_transformer, worker_format = RecordTransformer(), format
+    worker_schema = load_schema(schema_path) if schema_path else None
+    # after the RecordTransformer, which generates the FieldTransposer map the fingerprint includes
+    worker_cache = ResultCache(cache_path, format=format) if cache_path else None
+
+def transform_chunk(chunk):
+    """
+    Transform chunk of (record type, ctrlno, raw MARC record), returning list of
+    (record type, ctrlno, raw MARC record if failed, serialized record or None, traceback or None,
+     validation errors or None), and Diagnostics and Metrics snapshots of the chunk.
+    Records in the worker's ResultCache (if any) are not transformed again.
+    """
+    results, new_results = [], []
+    for record_type, ctrlno, data in chunk:
+        try:
+            xml = ResultCache.MISS if worker_cache is None else worker_cache.get(data)
+            if xml is not ResultCache.MISS:
+                validation_errors = None if worker_schema is None or xml is None \
+                                    else validate_element(worker_schema, etree.fromstring(xml))
+                results.append((record_type, ctrlno, None, xml, None, validation_errors))
+                continue
+            start = time.perf_counter()
+            result = worker_transformer.transform(LazyLaneMARCRecord(data))
+            Metrics.observe('transform_seconds', (record_type,), time.perf_counter() - start)
+            validation_errors = None
+            if result is None:
+                xml = None
+            elif worker_schema is None:
+                xml = serialize(result, worker_format)
+            else:
+                # validate the element serialized, rather than parsing it again
+                record_e = result.serialize_xml()
+                validation_errors = validate_element(worker_schema, record_e)
+                xml = etree.tostring(record_e, encoding='UTF-8', xml_declaration=False) if worker_format == 'xml' \
+                      else serialize(result, worker_format)
+            results.append((record_type, ctrlno, None, xml, None, validation_errors))
+            new_results.append((data, xml))
+        except Exception:
+            results.append((record_type, ctrlno, data, None, traceback.format_exc(), None))
+    if worker_cache is not None and new_results:
+        # together, so as to keep other processes waiting on the cache's write lock only briefly
+        for data, xml in new_results:
+            worker_cache.put(data, xml)
+        worker_cache.commit()
+    return results, Diagnostics.collect(), Metrics.collect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transform records from the record source to XOBIS XML (or JSON), one record per line.")
+    parser.add_argument('--output', required=True, help="file to write transformed records to")
+    parser.add_argument('--types', nargs='+', choices=('bib', 'aut', 'hdg'), default=['bib', 'aut', 'hdg'])
+    parser.add_argument('--processes', type=int, default=None, help="transform processes (default: CPU count)")
+    parser.add_argument('--chunksize', type=int, default=64, help="records per transform task")
+    parser.add_argument('--queue-size', type=int, default=8, help="chunks waiting between stages")
+    parser.add_argument('--share-index', action='store_true', help="share one copy of the index between processes")
+    parser.add_argument('--format', choices=('xml', 'json'), default='xml', help="serialization of records")
+    parser.add_argument('--validate', action='store_true', help="validate records against the RELAX NG schema")
+    parser.add_argument('--schema', default=None, help="RELAX NG schema, .rng or .rnc (default: $PYXOBIS_SCHEMA_PATH)")
+    parser.add_argument('--metrics', default=None, help="write metrics to this file: Prometheus text format if .prom, else JSON")
+    parser.add_argument('--metrics-interval', type=float, default=60, help="seconds between metrics writes")
+    parser.add_argument('--cache', default=None, help="ResultCache file: transform only records not cached there")
+    args = parser.parse_args()
+
+    metrics_writer = MetricsWriter(args.metrics, args.metrics_interval) if args.metrics else None
+    pipeline = TransformPipeline(args.processes, args.chunksize, args.queue_size, args.share_index, args.format,
+                                 args.validate, args.schema, metrics_writer, args.cache)
+    start = time.perf_counter()
+    with RecordSource.get_default() as db, open(args.output, 'wb') as outf:
+        counts = pipeline.run(db, args.types, lambda xml: outf.write(xml + b'\n'))
+    print(f"{', '.join(f'{count} {name}' for name, count in counts.items())} in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+from .EquivalenceChecker import EquivalenceChecker, EquivalenceResult, ReferencePath, LazyRecordPath
+from .ResultCache import ResultCache
+from .DependencyIndex import DependencyIndex
+from .TransformPipeline import TransformPipeline
+from .BatchRunner import BatchRunner
+from .ShardedWriter import ShardedWriter, ShardedReader
+from .DeltaFeed import write_delta
+from .SchemaValidator import SchemaValidator
+from .MetricsWriter import MetricsWriter
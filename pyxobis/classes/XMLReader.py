@@ -0,0 +1,678 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Read XOBIS XML back into pyxobis.classes components: the inverse of serialize_xml.
+"""
+
+from lxml import etree
+
+from .common import *
+from .Record import *
+from .Being import *
+from .Concept import *
+from .Event import *
+from .String import *
+from .Language import *
+from .Organization import *
+from .Place import *
+from .Object import *
+from .Work import *
+from .Holdings import *
+from .Time import *
+from .Relationship import *
+
+
+NS = "{http://www.xobis.info/ns/2.0/}"
+RECORD_TAG = NS + "record"
+# parts of a Record that can be materialized (see parse_record)
+RECORD_PARTS = ('control_data', 'principal_element', 'relationships')
+
+
+class XMLReader:
+    """
+    Iterates over the Records in a file of XOBIS XML: either a document
+    whose root contains record elements (such as a <collection>),
+    or records one after another with no root (as written by BatchRunner).
+    Records are parsed incrementally, and each record element released
+    once it has been read back, so that files of any size can be read
+    in constant memory.
+
+    If parts is given, only those parts of each Record (of RECORD_PARTS)
+    are materialized; the others are left None.
+    """
+    CHUNK_SIZE = 1 << 20
+    ROOTLESS_WRAPPER = (b'<collection xmlns="http://www.xobis.info/ns/2.0/">', b'</collection>')
+
+    def __init__(self, source, parts=None):
+        # source: path or binary file
+        if parts is not None:
+            parts = frozenset(parts)
+            assert parts <= set(RECORD_PARTS), f"invalid record parts: {', '.join(parts - set(RECORD_PARTS))}"
+        self.parts = parts
+        self.close_source = not hasattr(source, 'read')
+        self.source = open(source, 'rb') if self.close_source else source
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.close_source:
+            self.source.close()
+
+    def __iter__(self):
+        for record_e in self.iter_elements():
+            yield parse_record(record_e, self.parts)
+
+    def iter_elements(self):
+        """
+        Yields each record element (lxml Element), unparsed; each is
+        released when the next is requested.
+        """
+        parser = etree.XMLPullParser(events=('end',), tag=RECORD_TAG, huge_tree=True)
+        chunk = self.source.read(self.CHUNK_SIZE)
+        # an empty (or blank) file has no records, rather than being malformed
+        while chunk and not chunk.strip():
+            chunk = self.source.read(self.CHUNK_SIZE)
+        if not chunk:
+            return
+        rootless = chunk.lstrip().startswith(b'<record')
+        if rootless:
+            parser.feed(self.ROOTLESS_WRAPPER[0])
+        while chunk:
+            parser.feed(chunk)
+            yield from self.__read_events(parser)
+            chunk = self.source.read(self.CHUNK_SIZE)
+        if rootless:
+            parser.feed(self.ROOTLESS_WRAPPER[1])
+        parser.close()
+        yield from self.__read_events(parser)
+
+    @staticmethod
+    def __read_events(parser):
+        for event, record_e in parser.read_events():
+            yield record_e
+            # release the record and anything before it
+            record_e.clear()
+            parent_e = record_e.getparent()
+            if parent_e is not None:
+                while record_e.getprevious() is not None:
+                    del parent_e[0]
+
+
+def read_records(source, parts=None):
+    """
+    Yields Records from a file (path or binary file) of XOBIS XML.
+    See XMLReader.
+    """
+    with XMLReader(source, parts) as reader:
+        yield from reader
+
+
+# elements
+
+def parse_record(record_e, parts=None):
+    """
+    Record from a record element. If parts is given, only those parts
+    (of RECORD_PARTS) are materialized and the others are left None;
+    such a Record cannot be serialized.
+    """
+    lang = record_e.get('lang')
+    control_data_e, principal_element_e, *relationships_e = record_e
+    relationships = [parse_relationship(relationship_e) for relationship_e in relationships_e[0]] \
+                    if relationships_e and (parts is None or 'relationships' in parts) else []
+    if parts is None:
+        return Record(parse_control_data(control_data_e),
+                      parse_principal_element(principal_element_e),
+                      lang, relationships)
+    record = object.__new__(Record)
+    record.lang = lang
+    record.control_data = parse_control_data(control_data_e) if 'control_data' in parts else None
+    record.principal_element = parse_principal_element(principal_element_e) if 'principal_element' in parts else None
+    record.relationships = relationships if 'relationships' in parts else None
+    return record
+
+
+def parse_control_data(control_data_e):
+    id_e = control_data_e.find(NS + 'id')
+    alternates_e = id_e.find(NS + 'alternates')
+    types_e = control_data_e.find(NS + 'types')
+    actions_e = control_data_e.find(NS + 'actions')
+    return ControlData(
+        parse_id_content(id_e),
+        id_alternates = [parse_id_content(alternate_e) for alternate_e in alternates_e] if alternates_e is not None else [],
+        types = [parse_generic_type(type_e) for type_e in types_e] if types_e is not None else [],
+        actions = [ControlDataAction(parse_generic_type(action_e[0]), parse_ref(action_e[1])) for action_e in actions_e] \
+                  if actions_e is not None else []
+    )
+
+
+def parse_id_content(id_e):
+    descriptions, id_value, note_list = [], None, None
+    for tag, child_e in children(id_e):
+        if tag == 'description':
+            descriptions.append(child_e.text)
+        elif tag in ('organization', 'work'):
+            descriptions.append(parse_ref(child_e))
+        elif tag == 'value':
+            id_value = child_e.text or ''
+        elif tag in ('note', 'noteList'):
+            note_list = parse_note_list(child_e)
+    return IDContent(descriptions, id_value, id_e.get('status'), note_list)
+
+
+def parse_relationship(relationship_e):
+    enumeration, time_or_duration_ref, note_list = None, None, None
+    for tag, child_e in children(relationship_e):
+        if tag == 'name':
+            relationship_name = RelationshipName(parse_generic_content(child_e), parse_link_attributes(child_e))
+        elif tag == 'string':
+            enumeration = parse_ref(child_e)
+        elif tag in ('time', 'duration'):
+            time_or_duration_ref = parse_ref(child_e)
+        elif tag == 'target':
+            element_ref = parse_ref(child_e[0])
+        elif tag in ('note', 'noteList'):
+            note_list = parse_note_list(child_e)
+    return Relationship(RelationshipContent(relationship_name, element_ref,
+                                            relationship_e.get('type'), relationship_e.get('degree'),
+                                            enumeration, time_or_duration_ref, note_list))
+
+
+# principal elements
+
+def parse_principal_element(e):
+    """
+    PrincipalElement from its element.
+    """
+    tag = localname(e)
+    try:
+        parse = PRINCIPAL_ELEMENT_PARSERS[tag]
+    except KeyError:
+        raise ValueError(f"not a principal element: {tag}") from None
+    return parse(e)
+
+
+def parse_being(being_e):
+    entry_e, variants, note_list = parse_principal_element_parts(being_e)
+    entry_type, time_or_duration_ref = None, None
+    for tag, child_e in children(entry_e):
+        if tag == 'type':
+            entry_type = parse_generic_type(child_e)
+        elif tag in ('time', 'duration'):
+            time_or_duration_ref = parse_ref(child_e)
+    return Being(RoleAttributes(being_e.get('role')), parse_being_entry_content(entry_e),
+                 type_ = being_e.get('type'),
+                 class_ = being_e.get('class'),
+                 scheme_attribute = parse_scheme_attribute(entry_e),
+                 entry_group_attributes = parse_entry_group_attributes(entry_e),
+                 entry_type = entry_type,
+                 time_or_duration_ref = time_or_duration_ref,
+                 variants = variants,
+                 note_list = note_list)
+
+
+def parse_concept(concept_e):
+    entry_e, variants, note_list = parse_principal_element_parts(concept_e)
+    return Concept(parse_concept_entry_content(entry_e),
+                   type_ = concept_e.get('type'),
+                   usage = concept_e.get('usage'),
+                   subtype = concept_e.get('subtype'),
+                   scheme_attribute = parse_scheme_attribute(entry_e),
+                   entry_group_attributes = parse_entry_group_attributes(entry_e),
+                   variants = variants,
+                   note_list = note_list)
+
+
+def parse_event(event_e):
+    entry_e, variants, note_list = parse_principal_element_parts(event_e)
+    return Event(parse_event_entry_content(entry_e),
+                 type_ = event_e.get('type'),
+                 class_attribute = parse_class_attribute(event_e),
+                 scheme_attribute = parse_scheme_attribute(entry_e),
+                 entry_group_attributes = parse_entry_group_attributes(entry_e),
+                 variants = variants,
+                 note_list = note_list)
+
+
+def parse_string(string_e):
+    entry_e, variants, note_list = parse_principal_element_parts(string_e)
+    return String(parse_string_entry_content(entry_e),
+                  type_ = string_e.get('type'),
+                  class_ = string_e.get('class'),
+                  entry_group_attributes = parse_entry_group_attributes(entry_e),
+                  variants = variants,
+                  note_list = note_list)
+
+
+def parse_language(language_e):
+    entry_e, variants, note_list = parse_principal_element_parts(language_e)
+    return Language(parse_language_entry_content(entry_e),
+                    type_ = language_e.get('type'),
+                    class_attribute = parse_class_attribute(language_e),
+                    usage = language_e.get('usage'),
+                    entry_group_attributes = parse_entry_group_attributes(entry_e),
+                    variants = variants,
+                    note_list = note_list)
+
+
+def parse_organization(organization_e):
+    entry_e, variants, note_list = parse_principal_element_parts(organization_e)
+    return Organization(parse_organization_entry_content(entry_e),
+                        type_ = organization_e.get('type'),
+                        class_attribute = parse_class_attribute(organization_e),
+                        scheme_attribute = parse_scheme_attribute(entry_e),
+                        entry_group_attributes = parse_entry_group_attributes(entry_e),
+                        variants = variants,
+                        note_list = note_list)
+
+
+def parse_place(place_e):
+    entry_e, variants, note_list = parse_principal_element_parts(place_e)
+    return Place(RoleAttributes(place_e.get('role')), parse_place_entry_content(entry_e),
+                 type_ = place_e.get('type'),
+                 class_attribute = parse_class_attribute(place_e),
+                 usage = place_e.get('usage'),
+                 scheme_attribute = parse_scheme_attribute(entry_e),
+                 entry_group_attributes = parse_entry_group_attributes(entry_e),
+                 variants = variants,
+                 note_list = note_list)
+
+
+def parse_object(object_e):
+    entry_e, variants, note_list = parse_principal_element_parts(object_e)
+    role = object_e.get('role')
+    is_authority = role in Object.ROLES_2
+    return Object(role, parse_object_entry_content(entry_e),
+                  class_ = None if is_authority else object_e.get('class'),
+                  class_attribute = parse_class_attribute(object_e) if is_authority else None,
+                  type_ = object_e.get('type'),
+                  entry_group_attributes = parse_entry_group_attributes(entry_e),
+                  variants = variants,
+                  note_list = note_list)
+
+
+def parse_work(work_e):
+    entry_e, variants, note_list = parse_principal_element_parts(work_e)
+    work_content = WorkContent(parse_work_entry_content(entry_e),
+                               class_ = entry_e.get('class'),
+                               entry_group_attributes = parse_entry_group_attributes(entry_e),
+                               variants = variants,
+                               note_list = note_list)
+    return Work(RoleAttributes(work_e.get('role')), work_content, type_=work_e.get('type'))
+
+
+def parse_holdings(holdings_e):
+    holdings_summary, note_list = None, None
+    for tag, child_e in children(holdings_e):
+        if tag == 'entry':
+            holdings_entry_content = parse_holdings_entry_content(child_e)
+        elif tag == 'summary':
+            summary_parts = { summary_tag : summary_part_e for summary_tag, summary_part_e in children(child_e) }
+            holdings_summary = HoldingsSummary(
+                enumeration = summary_parts['enumeration'].text or '' if 'enumeration' in summary_parts else None,
+                chronology = summary_parts['chronology'].text or '' if 'chronology' in summary_parts else None,
+                note_list = parse_note_list(summary_parts.get('note', summary_parts.get('noteList')))
+            )
+        elif tag in ('note', 'noteList'):
+            note_list = parse_note_list(child_e)
+    return Holdings(holdings_entry_content, holdings_summary, note_list)
+
+
+def parse_time(time_e):
+    entry_e, variants, note_list = parse_principal_element_parts(time_e)
+    if localname(time_e) == 'duration':
+        time_or_duration_entry = DurationEntry(*(parse_duration_entry_part(part_e) for part_e in entry_e),
+                                               entry_group_attributes=parse_entry_group_attributes(entry_e))
+    else:
+        time_or_duration_entry = parse_time_instance_entry(entry_e)
+    return Time(time_or_duration_entry,
+                class_attribute = parse_class_attribute(time_e),
+                usage = time_e.get('usage'),
+                variants = variants,
+                note_list = note_list)
+
+
+def parse_principal_element_parts(e):
+    """
+    (entry element, variants, note list) of a principal element.
+    """
+    entry_e, variants, note_list = None, [], None
+    for tag, child_e in children(e):
+        if tag == 'entry':
+            entry_e = child_e
+        elif tag == 'variants':
+            variants = [parse_variant(variant_e) for variant_e in child_e]
+        elif tag in ('note', 'noteList'):
+            note_list = parse_note_list(child_e)
+    return entry_e, variants, note_list
+
+
+# entry contents (from the element containing them: an entry or ref element)
+
+def parse_being_entry_content(e):
+    qualifiers = None
+    for tag, child_e in children(e):
+        if tag == 'name':
+            if len(child_e):
+                name_content = [(part_e.get('type'), parse_name_content(part_e)) for part_e in child_e]
+            else:
+                name_content = parse_name_content(child_e)
+        elif tag == 'qualifiers':
+            qualifiers = parse_qualifiers(child_e)
+    return BeingEntryContent(name_content, qualifiers)
+
+
+def parse_entry_content(entry_content_class):
+    """
+    Parser for an entry content class of the form:
+    prequalifiers?, genericName, (partOfSpeech*), qualifiers?
+    """
+    def parse(e):
+        kwargs, parts_of_speech = {}, []
+        for tag, child_e in children(e):
+            if tag == 'name':
+                kwargs['generic_name'] = parse_generic_name(child_e)
+            elif tag == 'prequalifiers':
+                kwargs['prequalifiers'] = Prequalifiers([parse_ref(ref_e) for ref_e in child_e])
+            elif tag == 'qualifiers':
+                kwargs['qualifiers'] = parse_qualifiers(child_e)
+            elif tag == 'pos':
+                parts_of_speech.append(PartOfSpeech(parse_generic_content(child_e), parse_link_attributes(child_e)))
+        if parts_of_speech:
+            kwargs['parts_of_speech'] = parts_of_speech
+        return entry_content_class(**kwargs)
+    return parse
+
+parse_concept_entry_content      = parse_entry_content(ConceptEntryContent)
+parse_event_entry_content        = parse_entry_content(EventEntryContent)
+parse_string_entry_content       = parse_entry_content(StringEntryContent)
+parse_language_entry_content     = parse_entry_content(LanguageEntryContent)
+parse_organization_entry_content = parse_entry_content(OrganizationEntryContent)
+parse_place_entry_content        = parse_entry_content(PlaceEntryContent)
+parse_object_entry_content       = parse_entry_content(ObjectEntryContent)
+
+
+def parse_work_entry_content(e):
+    generic_name_content, content_parts, parts = None, [], []
+    for tag, child_e in children(e):
+        if tag == 'name':
+            generic_name_content = parse_name_content(child_e)
+        elif tag == 'part':
+            parts.append((child_e.get('type'), parse_name_content(child_e)))
+        elif tag == 'qualifiers':
+            if generic_name_content is not None:
+                return WorkEntryContent(WorkEntryContentSingleGeneric(generic_name_content, parse_qualifiers(child_e)))
+            # qualifiers end a group of parts
+            content_parts.append(WorkEntryContentPart(parts, parse_qualifiers(child_e)))
+            parts = []
+    if generic_name_content is not None:
+        return WorkEntryContent(WorkEntryContentSingleGeneric(generic_name_content))
+    if parts:
+        content_parts.append(WorkEntryContentPart(parts))
+    return WorkEntryContent(content_parts)
+
+
+def parse_holdings_entry_content(e):
+    work_or_object_ref_e, concept_ref_e, *qualifiers_e = e
+    return HoldingsEntryContent(parse_ref(work_or_object_ref_e), parse_ref(concept_ref_e),
+                                parse_qualifiers(qualifiers_e[0]) if qualifiers_e else None)
+
+
+# variants
+
+def parse_variant(variant_e):
+    """
+    VariantEntry from its element.
+    """
+    tag = localname(variant_e)
+    kwargs = { 'variant_attributes' : parse_variant_attributes(variant_e) }
+    for child_tag, child_e in children(variant_e):
+        if child_tag == 'type':
+            kwargs['type_'] = parse_generic_type(child_e)
+        elif child_tag in ('time', 'duration'):
+            kwargs['time_or_duration_ref'] = parse_ref(child_e)
+        elif child_tag == 'entry':
+            entry_e = child_e
+        elif child_tag in ('note', 'noteList'):
+            kwargs['note_list'] = parse_note_list(child_e)
+    if tag == 'time':
+        return TimeVariant(parse_time_instance_entry(entry_e), **kwargs)
+    if tag == 'duration':
+        duration_entry = DurationEntry(*(parse_duration_entry_part(part_e) for part_e in entry_e),
+                                       entry_group_attributes=parse_entry_group_attributes(entry_e))
+        return DurationVariant(duration_entry, **kwargs)
+    try:
+        variant_class, parse_entry_content = VARIANT_CLASSES[tag]
+    except KeyError:
+        raise ValueError(f"not a variant: {tag}") from None
+    kwargs['substitute_attribute'] = parse_substitute_attribute(entry_e)
+    kwargs['entry_group_attributes'] = parse_entry_group_attributes(entry_e)
+    scheme_attribute = parse_scheme_attribute(entry_e)
+    if scheme_attribute is not None:
+        # (not taken by string and language variants)
+        kwargs['scheme_attribute'] = scheme_attribute
+    return variant_class(parse_entry_content(entry_e), **kwargs)
+
+
+# refs
+
+def parse_ref(ref_e):
+    """
+    RefElement from its element.
+    """
+    tag = localname(ref_e)
+    if tag == 'time':
+        return TimeRef(parse_time_content(ref_e), parse_calendar(ref_e))
+    if tag == 'duration':
+        time1_e, time2_e = ref_e
+        return DurationRef(parse_time_content(time1_e), parse_time_content(time2_e),
+                           parse_calendar(time1_e), parse_calendar(time2_e))
+    try:
+        ref_class, parse_entry_content = REF_CLASSES[tag]
+    except KeyError:
+        raise ValueError(f"not a ref: {tag}") from None
+    kwargs = { 'link_attributes' : parse_link_attributes(ref_e) }
+    if ref_class is not HoldingsRef:
+        kwargs['substitute_attribute'] = parse_substitute_attribute(ref_e)
+    if ref_class is ConceptRef:
+        subdivisions_e = ref_e.find(NS + 'subdivisions')
+        if subdivisions_e is not None:
+            kwargs['subdivisions'] = Subdivisions([parse_ref(subdivision_e) for subdivision_e in subdivisions_e])
+    return ref_class(parse_entry_content(ref_e), **kwargs)
+
+
+def parse_qualifiers(qualifiers_e):
+    return Qualifiers([parse_ref(ref_e) for ref_e in qualifiers_e])
+
+
+# time
+
+TIME_PARTS = { 'year' : Year, 'month' : Month, 'day' : Day,
+               'hour' : Hour, 'minute' : Minute, 'second' : Second, 'millisecond' : Millisecond,
+               'tzHour' : TZHour, 'tzMinute' : TZMinute }
+
+def parse_time_instance_entry(entry_e):
+    return TimeInstanceEntry(parse_time_content_single(entry_e),
+                             scheme_attribute = parse_scheme_attribute(entry_e),
+                             entry_group_attributes = parse_entry_group_attributes(entry_e),
+                             calendar = parse_calendar(entry_e))
+
+
+def parse_duration_entry_part(time_e):
+    return DurationEntryPart(parse_time_content(time_e), parse_scheme_attribute(time_e), parse_calendar(time_e))
+
+
+def parse_time_content(e):
+    part_elements = e.findall(NS + 'part')
+    if part_elements:
+        return TimeContent(*map(parse_time_content_part, part_elements))
+    return TimeContent(parse_time_content_part(e))
+
+
+def parse_time_content_part(e):
+    return TimeContentPart(parse_time_content_single(e), parse_link_attributes(e), parse_substitute_attribute(e))
+
+
+def parse_time_content_single(e):
+    time_contents, type_ = [], None
+    for tag, child_e in children(e):
+        if tag == 'type':
+            type_ = parse_generic_type(child_e)
+        elif tag == 'name':
+            time_contents.append(parse_generic_name(child_e))
+        elif tag == 'year':
+            time_contents.append(Year(int(child_e.text)))
+        elif tag == 'tzHour':
+            time_contents.append(TZHour(child_e.text.lstrip('+-'), is_negative=child_e.text.startswith('-')))
+        elif tag in TIME_PARTS:
+            time_contents.append(TIME_PARTS[tag](child_e.text))
+    return TimeContentSingle(time_contents, type_, e.get('certainty'), e.get('quality'))
+
+
+def parse_calendar(e):
+    calendar_e = e.find(NS + 'calendar')
+    if calendar_e is None:
+        return None
+    return Calendar(parse_link_attributes(calendar_e), XSDAnyURI(calendar_e.get('set')))
+
+
+# common components
+
+def parse_generic_name(name_e):
+    if len(name_e):
+        return GenericName([parse_name_content(part_e) for part_e in name_e])
+    return GenericName(parse_name_content(name_e))
+
+
+def parse_name_content(e):
+    return NameContent(e.text, e.get('lang'), e.get('script'), e.get('nonfiling', 0))
+
+
+def parse_generic_content(e):
+    return GenericContent(e.text, e.get('lang'))
+
+
+def parse_generic_type(type_e):
+    return GenericType(parse_link_attributes(type_e), XSDAnyURI(type_e.get('set')))
+
+
+def parse_note_list(e):
+    if e is None:
+        return None
+    if localname(e) == 'note':
+        return NoteList([parse_note(e)])
+    return NoteList([parse_note(note_e) for note_e in e])
+
+
+def parse_note(note_e):
+    generic_type, source = None, []
+    for tag, child_e in children(note_e):
+        if tag == 'type':
+            generic_type = parse_generic_type(child_e)
+        elif tag == 'source':
+            source = [source_part_e.text if localname(source_part_e) == 'description' else parse_ref(source_part_e)
+                      for source_part_e in child_e]
+    has_set = note_e.get('set') is not None
+    return Note(parse_generic_content(note_e),
+                role = note_e.get('role'),
+                link_attributes = parse_link_attributes(note_e) if has_set else None,
+                set_ref = XSDAnyURI(note_e.get('set')) if has_set else None,
+                generic_type = generic_type,
+                source = source)
+
+
+# attributes
+
+def parse_link_attributes(e):
+    title, href = e.get('title'), e.get('href')
+    if title is None and href is None:
+        return None
+    return LinkAttributes(title, XSDAnyURI(href) if href is not None else None)
+
+
+def parse_substitute_attribute(e):
+    substitute = e.get('substitute')
+    return SubstituteAttribute(substitute == 'true') if substitute is not None else None
+
+
+def parse_scheme_attribute(e):
+    scheme = e.get('scheme')
+    return SchemeAttribute(scheme) if scheme is not None else None
+
+
+def parse_class_attribute(e):
+    class_ = e.get('class')
+    return ClassAttribute(class_) if class_ is not None else None
+
+
+def parse_variant_attributes(e):
+    includes = e.get('includes')
+    return VariantAttributes(includes) if includes is not None else None
+
+
+def parse_entry_group_attributes(e):
+    id, group, preferred = e.get('id'), e.get('group'), e.get('preferred')
+    if id is None and group is None and preferred is None:
+        return None
+    return EntryGroupAttributes(id, group, { 'true' : True, 'false' : False }.get(preferred))
+
+
+# functions
+
+def localname(e):
+    return e.tag[len(NS):] if e.tag.startswith(NS) else e.tag
+
+def children(e):
+    """
+    Yields (local name, element) of the child elements of e (skipping comments etc.).
+    """
+    for child_e in e:
+        if isinstance(child_e.tag, str):
+            yield localname(child_e), child_e
+
+
+PRINCIPAL_ELEMENT_PARSERS = {
+    'being'        : parse_being,
+    'concept'      : parse_concept,
+    'event'        : parse_event,
+    'string'       : parse_string,
+    'language'     : parse_language,
+    'organization' : parse_organization,
+    'place'        : parse_place,
+    'object'       : parse_object,
+    'work'         : parse_work,
+    'holdings'     : parse_holdings,
+    'time'         : parse_time,
+    'duration'     : parse_time,
+}
+
+# { tag : (VariantEntry subclass, entry content parser) }
+VARIANT_CLASSES = {
+    'being'        : (BeingVariantEntry,        parse_being_entry_content),
+    'concept'      : (ConceptVariantEntry,      parse_concept_entry_content),
+    'event'        : (EventVariantEntry,        parse_event_entry_content),
+    'string'       : (StringVariantEntry,       parse_string_entry_content),
+    'language'     : (LanguageVariantEntry,     parse_language_entry_content),
+    'organization' : (OrganizationVariantEntry, parse_organization_entry_content),
+    'place'        : (PlaceVariantEntry,        parse_place_entry_content),
+    'object'       : (ObjectVariantEntry,       parse_object_entry_content),
+    'work'         : (WorkVariantEntry,         parse_work_entry_content),
+}
+
+# { tag : (RefElement subclass, entry content parser) }
+REF_CLASSES = {
+    'being'        : (BeingRef,        parse_being_entry_content),
+    'concept'      : (ConceptRef,      parse_concept_entry_content),
+    'event'        : (EventRef,        parse_event_entry_content),
+    'string'       : (StringRef,       parse_string_entry_content),
+    'language'     : (LanguageRef,     parse_language_entry_content),
+    'organization' : (OrganizationRef, parse_organization_entry_content),
+    'place'        : (PlaceRef,        parse_place_entry_content),
+    'object'       : (ObjectRef,       parse_object_entry_content),
+    'work'         : (WorkRef,         parse_work_entry_content),
+    'holdings'     : (HoldingsRef,     parse_holdings_entry_content),
+}
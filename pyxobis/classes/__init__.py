@@ -23,3 +23,5 @@ from .Place import *
 from .Relationship import *
 
 from .Holdings import *
+
+from .XMLReader import XMLReader, read_records, parse_record, parse_principal_element
@@ -1,6 +1,9 @@
 #!/usr/bin/python3
 # -*- coding: UTF-8 -*-
 
+import json
+from itertools import islice
+
 from lxml.builder import ElementMaker
 E = ElementMaker(namespace="http://www.xobis.info/ns/2.0/",
                  nsmap={None:"http://www.xobis.info/ns/2.0/"})
@@ -15,11 +18,108 @@ class Component:
     def serialize(self, format="xml"):
         if format == "xml":
             return self.serialize_xml()
+        elif format == "json":
+            return self.serialize_json()
         else:
             raise ValueError(f"unknown serialize format: {format}")
     def serialize_xml(self):
         # Returns None.
         return None
+    def serialize_json(self, shapes=None):
+        """
+        Returns the whole component tree as a JSON-compatible list:
+        [shapes, tree]. Each shape is a class name and attribute names;
+        in tree, each component is an array of its shape index and its
+        attribute values, lists (and tuples) are {"": [items]},
+        and dicts {"~": [[key, value], ...]}. See deserialize_json.
+
+        To serialize a sequence of components (e.g. as JSON lines),
+        pass the same shapes dict to each call: shapes are then only
+        output with the first component that uses them.
+        """
+        if shapes is None:
+            shapes = {}
+        n_shapes = len(shapes)
+        def encode(value):
+            if isinstance(value, Component):
+                attrs = vars(value)
+                shape = (type(value).__name__, *attrs)
+                shape_index = shapes.get(shape)
+                if shape_index is None:
+                    shape_index = shapes[shape] = len(shapes)
+                return [shape_index, *map(encode, attrs.values())]
+            if isinstance(value, (list, tuple)):
+                return { '' : list(map(encode, value)) }
+            if isinstance(value, dict):
+                return { '~' : [[encode(key), encode(item)] for key, item in value.items()] }
+            if value is None or isinstance(value, (str, int, float, bool)):
+                return value
+            raise TypeError(f"cannot serialize {type(value).__name__} as json")
+        tree = encode(self)
+        return [[list(shape) for shape in islice(shapes, n_shapes, None)], tree]
+
+
+def deserialize_json(data, shapes=None):
+    """
+    Component tree from the output of Component.serialize_json,
+    or JSON text of it. Components are restored attribute by attribute,
+    without rerunning their constructors' checks.
+
+    For a sequence serialized with shared shapes, pass the same shapes
+    list to each call, in the same order.
+    """
+    if isinstance(data, (str, bytes)):
+        data = json.loads(data)
+    new_shapes, tree = data
+    if shapes is None:
+        shapes = []
+    shapes.extend((get_component_class(class_name), attr_names) for class_name, *attr_names in new_shapes)
+    def decode(value):
+        value_type = type(value)
+        if value_type is list:
+            cls, attr_names = shapes[value[0]]
+            component = object.__new__(cls)
+            component.__dict__.update(zip(attr_names, map(decode, value[1:])))
+            return component
+        if value_type is dict:
+            if '' in value:
+                return list(map(decode, value['']))
+            return { decode(key) : decode(item) for key, item in value['~'] }
+        return value
+    return decode(tree)
+
+
+def write_json_lines(components, outf):
+    """
+    Write components to binary file outf as JSON lines, with shared shapes.
+    """
+    shapes = {}
+    for component in components:
+        outf.write(json.dumps(component.serialize_json(shapes), ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n')
+
+def read_json_lines(inf):
+    """
+    Yields components from a file of JSON lines written by write_json_lines.
+    """
+    shapes = []
+    for line in inf:
+        yield deserialize_json(line, shapes)
+
+
+# { class name : Component subclass }
+component_classes = {}
+
+def get_component_class(name):
+    if name not in component_classes:
+        # (re)collect subclasses, including those defined since
+        pending = [Component]
+        while pending:
+            cls = pending.pop()
+            component_classes[cls.__name__] = cls
+            pending.extend(cls.__subclasses__())
+        if name not in component_classes:
+            raise ValueError(f"unknown component class: {name}")
+    return component_classes[name]
 
 
 class PrincipalElement(Component):
@@ -9,6 +9,8 @@ from pylmldb.xobis_constants import *
 from ..builders import TimeContentSingleBuilder, TimeRefBuilder, DurationRefBuilder
 
 from .Indexer import Indexer
+from .Vocabulary import Vocabulary
+from .Diagnostics import Diagnostics
 
 
 class DateTimeParser:
@@ -231,7 +233,7 @@ class DateTimeParser:
             if type_kwargs:
                 start_type_kwargs = end_type_kwargs = type_kwargs
             else:
-                start_type_kwargs, end_type_kwargs = cls.default_type_kwargs[element_type]
+                start_type_kwargs, end_type_kwargs = map(cls.__time_type_string_to_kwargs, cls.default_time_types[element_type])
                 # defaults given as arguments override the defaults by element
                 if default_start_type:
                     start_type_kwargs = cls.__time_type_string_to_kwargs(default_start_type)
@@ -268,7 +270,7 @@ class DateTimeParser:
 
         else:
             # Did not split as expected; log warning and treat as named
-            logger.warning(f"problem splitting datestring, treating as name: {datestring}")
+            Diagnostics.report("problem splitting datestring, treating as name", detail=datestring)
             return cls.build_simple_named_datetime(datestring)
 
 
@@ -468,8 +470,8 @@ class DateTimeParser:
 
         calendar_kwargs = {
             'link_title' : calendar,
-            'set_URI'    : Indexer.simple_lookup("Calendars", CONCEPT),
-            'href_URI'   : Indexer.simple_lookup(calendar, CONCEPT)
+            'set_URI'    : Vocabulary.href("Calendars", CONCEPT),
+            'href_URI'   : Vocabulary.href(calendar, CONCEPT)
             } if calendar else None
 
         return calendar_kwargs, datestring
@@ -499,26 +501,27 @@ class DateTimeParser:
         return time_kwargs
 
 
-    default_type_kwargs = {}
+    # default starting and ending Time Types by PE type
+    default_time_types = { None  : ("", ""),
+                           WORK_AUT  : ("", ""),
+                           WORK_INST  : ("", ""),
+                           BEING : ("Born", "Died"),
+                           EVENT : ("Began", "Ended"),
+                           ORGANIZATION : ("Began", "Ended") }
 
     @classmethod
     def init_default_type_kwargs(cls):
         """
-        Default starting and ending Time Types by PE type
+        Resolve the fixed vocabulary of Time Types and Calendars up front.
         """
-        for element_type, time_types in { None  : ("", ""),
-                                          WORK_AUT  : ("", ""),
-                                          WORK_INST  : ("", ""),
-                                          BEING : ("Born", "Died"),
-                                          EVENT : ("Began", "Ended"),
-                                          ORGANIZATION : ("Began", "Ended") }.items():
-            cls.default_type_kwargs[element_type] = ( cls.__time_type_string_to_kwargs(time_types[0]),
-                                                      cls.__time_type_string_to_kwargs(time_types[1]) )
+        Vocabulary.register(CONCEPT, ["Time Type", "Calendars", "Calendar, Islamic", "Calendar, French Revolutionary"])
+        Vocabulary.register(RELATIONSHIP, list(dict.fromkeys(time_type for time_types in cls.default_time_types.values()
+                                                             for time_type in time_types if time_type)))
 
 
     @staticmethod
     def __time_type_string_to_kwargs(type_string):
         return { 'link_title' : type_string,
-                 'set_URI'  : Indexer.simple_lookup("Time Type", CONCEPT),
-                 'href_URI' : Indexer.simple_lookup(type_string, RELATIONSHIP) }  \
+                 'set_URI'  : Vocabulary.href("Time Type", CONCEPT),
+                 'href_URI' : Vocabulary.href(type_string, RELATIONSHIP) }  \
                if type_string else {}
@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Collector of the data problems the transformers find in records
+(invalid indicators, unmatched fields, etc.), counted rather than logged
+one by one, with a few examples of each, for a summary at the end of a run.
+"""
+
+import os
+
+from loguru import logger
+
+
+class Diagnostics:
+    """
+    Problems are counted by (code, tag, element type): code names the
+    problem (e.g. "invalid indicator(s)"), tag is the MARC tag of the field
+    (or None), and element type is that of the record being transformed.
+    The first MAX_EXAMPLES (ctrlno, detail) of each are kept.
+
+    If VERBOSE (PYXOBIS_VERBOSE_DIAGNOSTICS set), each is also logged as
+    it is reported.
+
+    Worker processes collect() what they have reported, and the process
+    running them merge()s these snapshots, which are dicts:
+
+        { (code, tag, element type) : [count, [(ctrlno, detail), ...]] }
+    """
+    VERBOSE = bool(os.environ.get("PYXOBIS_VERBOSE_DIAGNOSTICS"))
+    MAX_EXAMPLES = 5
+
+    # record being transformed
+    ctrlno, element_type = None, None
+    # { (code, tag, element type) : [count, [(ctrlno, detail), ...]] }
+    diagnostics = {}
+
+
+    @classmethod
+    def set_record(cls, ctrlno, element_type):
+        """
+        Set the record that problems reported are in.
+        """
+        cls.ctrlno, cls.element_type = ctrlno, element_type
+
+    @classmethod
+    def report(cls, code, tag=None, detail=None):
+        """
+        Count a problem in the current record. detail (e.g. the field) is
+        only formatted if kept as an example, or logged.
+        """
+        key = (code, tag, cls.element_type)
+        entry = cls.diagnostics.get(key)
+        if entry is None:
+            entry = cls.diagnostics[key] = [0, []]
+        entry[0] += 1
+        if len(entry[1]) < cls.MAX_EXAMPLES or cls.VERBOSE:
+            detail = None if detail is None else str(detail)
+            if len(entry[1]) < cls.MAX_EXAMPLES:
+                entry[1].append((cls.ctrlno, detail))
+            if cls.VERBOSE:
+                logger.warning(f"{cls.ctrlno}: {code}" + ('' if detail is None else f": {detail}"))
+
+    @classmethod
+    def collect(cls):
+        """
+        Returns snapshot of problems reported since the last collect(), and resets.
+        """
+        diagnostics, cls.diagnostics = cls.diagnostics, {}
+        return diagnostics
+
+
+    @classmethod
+    def merge(cls, diagnostics, snapshot):
+        """
+        Add the counts and examples of snapshot to diagnostics (a snapshot), in place.
+        Returns diagnostics.
+        """
+        for key, (count, examples) in snapshot.items():
+            entry = diagnostics.get(key)
+            if entry is None:
+                entry = diagnostics[key] = [0, []]
+            entry[0] += count
+            entry[1].extend(examples[:max(cls.MAX_EXAMPLES - len(entry[1]), 0)])
+        return diagnostics
+
+    @staticmethod
+    def summarize(diagnostics):
+        """
+        List of dicts of code, tag, element type, count and examples,
+        most frequent first, of snapshot diagnostics (e.g. to write as JSON).
+        """
+        return [{ 'code' : code, 'tag' : tag, 'element_type' : element_type,
+                  'count' : count, 'examples' : [list(example) for example in examples] }
+                for (code, tag, element_type), (count, examples)
+                in sorted(diagnostics.items(), key=lambda item: (-item[1][0], tuple(map(str, item[0]))))]
+
+    @staticmethod
+    def from_summary(summary):
+        """
+        Snapshot of list summary, as summarize returns.
+        """
+        return { (entry['code'], entry['tag'], entry['element_type']) :
+                     [entry['count'], [tuple(example) for example in entry['examples']]]
+                 for entry in summary }
+
+    @classmethod
+    def log_summary(cls, diagnostics):
+        """
+        Log a report of snapshot diagnostics: one line per (code, tag, element type),
+        with the count and examples.
+        """
+        if not diagnostics:
+            return
+        lines = []
+        for entry in cls.summarize(diagnostics):
+            examples = '; '.join(f"{ctrlno}" + ('' if detail is None else f": {detail}") for ctrlno, detail in entry['examples'])
+            lines.append(f"{entry['count']:>8}  {entry['element_type']}  {entry['tag'] or '-'}  {entry['code']}  e.g. {examples}")
+        logger.warning(f"{sum(count for count, _ in diagnostics.values())} data problems found:\n" + '\n'.join(lines))
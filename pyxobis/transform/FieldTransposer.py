@@ -10,9 +10,11 @@ from loguru import logger
 
 from pymarc import Field, Record
 
-from pylmldb import LMLDB, LaneMARCRecord
+from pylmldb import LaneMARCRecord
 
 from .Indexer import Indexer
+from .RecordSource import RecordSource
+from .IndexManifest import IndexManifest
 
 class FieldTransposer:
     """
@@ -21,21 +23,32 @@ class FieldTransposer:
 
     # file path for pickle
     FIELD_TRANSPOSER_MAP_FILE = Indexer.INDEX_DIR / "field_transposer_map.pickle"
+    # increment when the structure of the map changes
+    FIELD_TRANSPOSER_MAP_FORMAT_VERSION = 1
 
     def __init__(self):
-        try:
-            with self.FIELD_TRANSPOSER_MAP_FILE.open('rb') as inf:
-                self.map = pickle.load(inf)
-        except:
-            # with access to LMLDB, creates dict of format:
+        manifest = IndexManifest(Indexer.INDEX_MANIFEST_FILE)
+        problems = manifest.check([self.FIELD_TRANSPOSER_MAP_FILE], self.FIELD_TRANSPOSER_MAP_FORMAT_VERSION,
+                                  RecordSource.get_default_snapshot_id())
+        if not problems:
+            try:
+                self.map = pickle.loads(manifest.load(self.FIELD_TRANSPOSER_MAP_FILE))
+            except (OSError, ValueError, pickle.UnpicklingError) as e:
+                problems = [str(e)]
+        if problems:
+            logger.warning(f"field transposer map needs regenerating ({'; '.join(problems)}); regenerating from record source")
+            # with access to LMLDB (or dump files), creates dict of format:
             #   { LaneMARCRecord.BIB : { target_record_ctrlno : [pymarc Field, Field, ...], ... },
             #     LaneMARCRecord.AUT : [pymarc Record, Record, ...] }
             self.map = {}
-            with LMLDB() as db:
+            source = RecordSource.get_default_snapshot_id()
+            with RecordSource.get_default() as db:
                 self.__generate_hdgs_from_auts(db)
                 self.__add_hdgs_fields_from_bibs(db)
-            with self.FIELD_TRANSPOSER_MAP_FILE.open('wb') as outf:
-                pickle.dump(self.map, outf)
+            # map is generated using the bib to hdg index
+            manifest.save(self.FIELD_TRANSPOSER_MAP_FILE, pickle.dumps(self.map), self.FIELD_TRANSPOSER_MAP_FORMAT_VERSION,
+                          source=source, counts={ 'bib' : len(self.map[LaneMARCRecord.BIB]), 'aut' : len(self.map[LaneMARCRecord.AUT]) },
+                          depends_on=[Indexer.INDEX_BIB_TO_HDG_FILE])
 
 
     def __add_hdgs_fields_from_bibs(self, db):
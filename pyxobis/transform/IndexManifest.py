@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Manifest of generated index artifacts (Indexer files, FieldTransposer map),
+for verified loads, atomic writes, and checking whether they need regenerating.
+"""
+
+import os, json, hashlib, tempfile
+from pathlib import Path
+
+
+class IndexManifest:
+    """
+    JSON file listing, for each artifact file (by name, in the same directory):
+    its SHA-256 and size, the format version of its contents, an identifier
+    of the record source snapshot it was generated from (if known), counts
+    (records read, entries), and the hashes of other artifacts it was
+    generated from.
+
+    Artifacts are written through a temporary file and renamed into place,
+    then the manifest likewise, so an interrupted write leaves a mismatch
+    that check reports rather than a file that loads silently.
+    """
+    # version of the manifest's own structure
+    MANIFEST_VERSION = 1
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def read(self):
+        """
+        Returns dict of artifact name to entry, or {} if no (valid) manifest.
+        """
+        try:
+            with self.path.open('r') as inf:
+                manifest = json.load(inf)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('manifest_version') != self.MANIFEST_VERSION:
+            return {}
+        return manifest.get('artifacts', {})
+
+    def check(self, paths, format_version, source=None, verify_hashes=False):
+        """
+        Returns list of reasons the artifact files at paths need regenerating
+        (empty if none): missing from manifest or disk, size (or, if
+        verify_hashes, content) not as written, other format version,
+        generated from another source snapshot (if source given and recorded),
+        or generated from other versions of artifacts it depends on.
+        """
+        artifacts, problems = self.read(), []
+        for path in map(Path, paths):
+            entry = artifacts.get(path.name)
+            if entry is None:
+                problems.append(f"{path.name} not in manifest")
+            elif not path.exists():
+                problems.append(f"{path.name} missing")
+            elif path.stat().st_size != entry['size']:
+                problems.append(f"{path.name} size differs from manifest")
+            elif verify_hashes and self.hash_file(path) != entry['sha256']:
+                problems.append(f"{path.name} content differs from manifest")
+            elif entry['format_version'] != format_version:
+                problems.append(f"{path.name} format version {entry['format_version']}, expected {format_version}")
+            elif source is not None and entry['source'] is not None and entry['source'] != source:
+                problems.append(f"{path.name} generated from other record source snapshot")
+            else:
+                for dependency_name, dependency_hash in entry['depends_on'].items():
+                    if artifacts.get(dependency_name, {}).get('sha256') != dependency_hash:
+                        problems.append(f"{path.name} generated from other version of {dependency_name}")
+        return problems
+
+    def load(self, path):
+        """
+        Returns contents of artifact file at path, verified against the manifest;
+        raises ValueError if not listed or not as written.
+        """
+        path = Path(path)
+        entry = self.read().get(path.name)
+        if entry is None:
+            raise ValueError(f"{path.name} not in manifest")
+        with path.open('rb') as inf:
+            data = inf.read()
+        if len(data) != entry['size'] or hashlib.sha256(data).hexdigest() != entry['sha256']:
+            raise ValueError(f"{path.name} content differs from manifest")
+        return data
+
+    def save(self, path, data, format_version, source=None, counts=None, depends_on=()):
+        """
+        Atomically write bytes data to artifact file at path,
+        then record it in the manifest, with the current hashes
+        of the artifact files (paths) in depends_on.
+        """
+        self.save_many([(path, data, format_version, source, counts, depends_on)])
+
+    def save_many(self, artifacts_data):
+        """
+        Atomically write several artifacts (tuples of save's arguments, in
+        order), then record them all in the manifest with one write, so that
+        anything watching the manifest (IndexServer) sees all of them
+        change together, not some new artifacts listed beside old ones.
+        """
+        artifacts = self.read()
+        for path, data, format_version, source, counts, depends_on in artifacts_data:
+            path = Path(path)
+            self.write_atomic(path, data)
+            artifacts[path.name] = {
+                'sha256'         : hashlib.sha256(data).hexdigest(),
+                'size'           : len(data),
+                'format_version' : format_version,
+                'source'         : source,
+                'counts'         : counts or {},
+                'depends_on'     : { Path(dependency).name : artifacts.get(Path(dependency).name, {}).get('sha256')
+                                     for dependency in depends_on },
+            }
+        manifest = { 'manifest_version' : self.MANIFEST_VERSION, 'artifacts' : artifacts }
+        self.write_atomic(self.path, json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    def get_counts(self, path):
+        return self.read().get(Path(path).name, {}).get('counts', {})
+
+    @staticmethod
+    def write_atomic(path, data):
+        """
+        Write bytes data to a temporary file beside path, then rename it to path.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as outf:
+                outf.write(data)
+                outf.flush()
+                os.fsync(outf.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    @staticmethod
+    def hash_file(path):
+        file_hash = hashlib.sha256()
+        with Path(path).open('rb') as inf:
+            for chunk in iter(lambda: inf.read(1 << 20), b''):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
@@ -0,0 +1,392 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Local lookup service holding one copy of the Indexer tables for several
+jobs (over a Unix socket, or TCP), reloading them when regenerated.
+
+    python -m pyxobis.transform.IndexServer unix:/tmp/pyxobis-index.sock
+    python -m pyxobis.transform.IndexServer tcp:127.0.0.1:8765
+
+Jobs with PYXOBIS_INDEXER_SERVER set to the same address then look up
+through the server instead of loading the index (see Indexer.init_index).
+Start the server itself without PYXOBIS_INDEXER_SERVER set.
+"""
+
+import os, json, time, signal, socket, argparse, threading, socketserver
+from collections.abc import Mapping
+
+from loguru import logger
+
+from .Metrics import Metrics
+
+
+class IndexServer:
+    """
+    Answers batches of operations on the Indexer tables, one JSON line per
+    batch in each direction:
+
+        {"ops": [["get", table, element_type, key], ["items", table, element_type], ["info"], ...]}
+        {"generation": n, "results": [...]}   or   {"generation": n, "error": message}
+
+    table is one of TABLES; element_type is only used for the main index.
+    "get" results are [found, value]. Batches on a connection are answered
+    in order, so clients may send several before reading (pipelining).
+
+    Tables are reloaded (by Indexer.init_index) when the index manifest
+    changes, checked every reload_interval seconds, or on SIGHUP; each
+    reload increments the generation, so that clients can drop cached results.
+    """
+    TABLES = ('index', 'index_reverse', 'index_rel_type', 'index_bib_to_hdg')
+
+    def __init__(self, address, reload_interval=10):
+        from .Indexer import Indexer
+        self.indexer = Indexer
+        self.address, self.reload_interval = address, reload_interval
+        self.generation, self.tables = 0, None
+        self.reload_lock = threading.Lock()
+        # the server always loads the index itself
+        os.environ.pop("PYXOBIS_INDEXER_SERVER", None)
+        self.reload(force=Indexer.index_client is not None)
+        self.server = self.__make_server(address)
+
+    def reload(self, force=True):
+        """
+        (Re)load the index tables (unless already loaded and not force),
+        then swap them in for new requests.
+        """
+        with self.reload_lock:
+            manifest_state = self.__get_manifest_state()
+            if force:
+                self.indexer.index = self.indexer.index_reverse = None
+                self.indexer.index_rel_type = self.indexer.index_bib_to_hdg = None
+                self.indexer.index_client = None
+            self.indexer.init_index()
+            self.tables = { table : getattr(self.indexer, table) for table in self.TABLES }
+            self.manifest_state = manifest_state
+            self.generation += 1
+            logger.info(f"index server: loaded index (generation {self.generation})")
+
+    def serve_forever(self):
+        threading.Thread(target=self.__watch_manifest, daemon=True).start()
+        signal.signal(signal.SIGHUP, lambda signum, frame: threading.Thread(target=self.reload, daemon=True).start())
+        logger.info(f"index server listening on {self.address}")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if self.address.startswith('unix:'):
+                os.remove(self.address[len('unix:'):])
+
+    def shutdown(self):
+        self.server.shutdown()
+
+    def handle_batch(self, request):
+        """
+        Returns response dict to request dict.
+        """
+        # tables as of the start of the batch, consistent across its ops
+        tables, generation = self.tables, self.generation
+        try:
+            return { 'generation' : generation, 'results' : [self.__handle_op(tables, *op) for op in request['ops']] }
+        except Exception as e:
+            return { 'generation' : generation, 'error' : f"{type(e).__name__}: {e}" }
+
+    def __handle_op(self, tables, op, *args):
+        if op == 'get':
+            table, element_type, key = args
+            mapping = tables[table][element_type] if table == 'index' else tables[table]
+            if mapping is None or key not in mapping:
+                return [False, None]
+            return [True, mapping[key]]
+        if op == 'items':
+            table, element_type = args
+            mapping = tables[table][element_type] if table == 'index' else tables[table]
+            return list(mapping.items())
+        if op == 'info':
+            return { 'element_types' : list(tables['index'].keys()) }
+        raise ValueError(f"unknown operation: {op}")
+
+    def __get_manifest_state(self):
+        try:
+            stat = self.indexer.INDEX_MANIFEST_FILE.stat()
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+
+    def __watch_manifest(self):
+        while True:
+            time.sleep(self.reload_interval)
+            if self.__get_manifest_state() != self.manifest_state:
+                try:
+                    self.reload()
+                except Exception:
+                    logger.exception("index server: reload failed; serving previous index")
+
+    def __make_server(self, address):
+        index_server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    for line in self.rfile:
+                        response = index_server.handle_batch(json.loads(line))
+                        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+                        self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # client closed the connection after an error, with responses unread
+                    pass
+
+        if address.startswith('unix:'):
+            path = address[len('unix:'):]
+            if os.path.exists(path):
+                os.remove(path)
+            server = socketserver.ThreadingUnixStreamServer(path, Handler)
+        else:
+            server = socketserver.ThreadingTCPServer(parse_tcp_address(address), Handler)
+        server.daemon_threads = True
+        return server
+
+
+class IndexClient:
+    """
+    Connection to an IndexServer, with a cache of results per table,
+    cleared when the server's generation changes (after which
+    reload callbacks are called).
+
+    A process forked from one with a client reconnects on first use,
+    rather than sharing the connection. After an error during a call,
+    responses may be left unread, so the connection is closed, and
+    reopened on the next call.
+    """
+    # ops per request line when sending many at once
+    BATCH_SIZE = 1000
+    # batches sent ahead of responses read
+    PIPELINE_DEPTH = 4
+    # cached results per table before the cache for it is cleared
+    CACHE_SIZE = 200000
+
+    def __init__(self, address, timeout=60):
+        self.address, self.timeout = address, timeout
+        self.sock, self.rfile = None, None
+        self.pid, self.lock = os.getpid(), threading.RLock()
+        self.generation, self.caches, self.reload_callbacks = None, {}, []
+        # connect now, so that an unavailable server is known at once
+        self.__connect()
+
+    def __connect(self):
+        if self.address.startswith('unix:'):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.settimeout(self.timeout)
+                sock.connect(self.address[len('unix:'):])
+            except OSError:
+                sock.close()
+                raise
+        else:
+            sock = socket.create_connection(parse_tcp_address(self.address), timeout=self.timeout)
+        self.sock, self.rfile = sock, sock.makefile('rb')
+
+    def __check_fork(self):
+        # the connection (and lock) inherited across fork are the parent's
+        if self.pid != os.getpid():
+            self.pid, self.lock = os.getpid(), threading.RLock()
+            self.close()
+
+    def close(self):
+        if self.sock is not None:
+            self.rfile.close()
+            self.sock.close()
+        self.sock, self.rfile = None, None
+
+    def add_reload_callback(self, callback):
+        self.reload_callbacks.append(callback)
+
+    def call_many(self, ops):
+        """
+        Send ops in batches of BATCH_SIZE, and return their results in order.
+        Responses to more than one batch are read on another thread while
+        the batches are sent, up to PIPELINE_DEPTH ahead: the server writes
+        each response before reading the next batch, so reading only between
+        sends could leave both waiting on full socket buffers (for large values).
+        """
+        ops = list(ops)
+        batches = [ops[i:i + self.BATCH_SIZE] for i in range(0, len(ops), self.BATCH_SIZE)]
+        results, reloaded = [], False
+        self.__check_fork()
+        with self.lock:
+            if self.sock is None:
+                self.__connect()
+            try:
+                if len(batches) == 1:
+                    self.__send_batch(batches[0])
+                    reloaded = self.__read_response(results)
+                elif batches:
+                    reloaded = self.__call_pipelined(batches, results)
+            except BaseException:
+                # responses to batches sent may be left unread
+                self.close()
+                raise
+            if reloaded:
+                for callback in self.reload_callbacks:
+                    callback()
+        return results
+
+    def __send_batch(self, batch):
+        self.sock.sendall(json.dumps({ 'ops' : batch }).encode('utf-8') + b'\n')
+
+    def __call_pipelined(self, batches, results):
+        """
+        Send batches, reading their responses (appending their results to
+        results) on another thread. Returns whether the server has reloaded.
+        """
+        # released as each response is read
+        sendable = threading.Semaphore(self.PIPELINE_DEPTH)
+        outcome = { 'reloaded' : False, 'error' : None }
+        def read_responses():
+            try:
+                for _ in batches:
+                    outcome['reloaded'] |= self.__read_response(results)
+                    sendable.release()
+            except BaseException as e:
+                outcome['error'] = e
+                # in case waiting to send, or sending to a server waiting for its responses to be read
+                self.__shutdown()
+                sendable.release()
+        reader = threading.Thread(target=read_responses, daemon=True)
+        reader.start()
+        try:
+            for batch in batches:
+                sendable.acquire()
+                if outcome['error'] is not None:
+                    break
+                self.__send_batch(batch)
+        except BaseException:
+            # in case reading
+            self.__shutdown()
+            reader.join()
+            # the reader's error, if sending failed for it
+            if outcome['error'] is None:
+                raise
+            raise outcome['error']
+        reader.join()
+        if outcome['error'] is not None:
+            raise outcome['error']
+        return outcome['reloaded']
+
+    def __shutdown(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def __read_response(self, results):
+        """
+        Read a response, appending its results to results.
+        Returns whether the server has reloaded since the last response.
+        """
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError(f"index server {self.address} closed connection")
+        response = json.loads(line)
+        reloaded = False
+        if response['generation'] != self.generation:
+            reloaded = self.generation is not None
+            self.generation, self.caches = response['generation'], {}
+        if 'error' in response:
+            raise RuntimeError(f"index server error: {response['error']}")
+        results.extend(response['results'])
+        return reloaded
+
+    def call(self, *op):
+        return self.call_many([op])[0]
+
+    def get_many(self, table, element_type, keys):
+        """
+        Returns list of (found, value) for keys, from the cache where possible.
+        """
+        self.__check_fork()
+        with self.lock:
+            cache = self.caches.get((table, element_type), {})
+            results = { key : cache[key] for key in keys if key in cache }
+            missing = list(dict.fromkeys(key for key in keys if key not in results))
+            Metrics.count('index_client_cache', (table, 'hit'), len(results))
+            Metrics.count('index_client_cache', (table, 'miss'), len(missing))
+            if missing:
+                fetched = dict(zip(missing, map(tuple, self.call_many(['get', table, element_type, key] for key in missing))))
+                # (caches are replaced if the generation changed)
+                cache = self.caches.setdefault((table, element_type), {})
+                if len(cache) + len(fetched) > self.CACHE_SIZE:
+                    cache.clear()
+                cache.update(fetched)
+                results.update(fetched)
+            return [results[key] for key in keys]
+
+    def get_tables(self):
+        """
+        Dict of RemoteIndexTables for each of IndexServer.TABLES,
+        with the main index by element type.
+        """
+        tables = { table : RemoteIndexTable(self, table) for table in IndexServer.TABLES if table != 'index' }
+        tables['index'] = { element_type : RemoteIndexTable(self, 'index', element_type)
+                            for element_type in self.call('info')['element_types'] }
+        return tables
+
+
+class RemoteIndexTable(Mapping):
+    """
+    Read-only Mapping view of a table on an IndexServer, through an IndexClient.
+    """
+    def __init__(self, client, table, element_type=None):
+        self.client, self.table, self.element_type = client, table, element_type
+
+    def __getitem__(self, key):
+        found, value = self.client.get_many(self.table, self.element_type, [key])[0]
+        if not found:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.client.get_many(self.table, self.element_type, [key])[0][0]
+
+    def get_many(self, keys, default=None):
+        """
+        Values for keys (or default if not found), in one round trip for all uncached keys.
+        """
+        return [value if found else default for found, value in self.client.get_many(self.table, self.element_type, keys)]
+
+    def items(self):
+        items = self.client.call('items', self.table, self.element_type)
+        # fill cache, since items are usually iterated to be looked up
+        cache = self.client.caches.setdefault((self.table, self.element_type), {})
+        if len(cache) + len(items) <= self.client.CACHE_SIZE:
+            cache.update((key, (True, value)) for key, value in items)
+        return [tuple(item) for item in items]
+
+    def __iter__(self):
+        return (key for key, value in self.items())
+
+    def __len__(self):
+        return len(self.items())
+
+
+def parse_tcp_address(address):
+    """
+    (host, port) of "tcp:host:port" or "host:port".
+    """
+    if address.startswith('tcp:'):
+        address = address[len('tcp:'):]
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Indexer lookups to other processes.")
+    parser.add_argument('address', help="unix:/path/to/socket or tcp:127.0.0.1:port")
+    parser.add_argument('--reload-interval', type=float, default=10, help="seconds between checks for a regenerated index")
+    args = parser.parse_args()
+    IndexServer(args.address, args.reload_interval).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
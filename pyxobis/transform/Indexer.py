@@ -5,7 +5,7 @@
 Enables lookup between record identities and control numbers.
 """
 
-import os, json
+import os, json, atexit
 from pathlib import Path
 
 from tqdm import tqdm
@@ -13,9 +13,16 @@ from loguru import logger
 
 from pymarc import MARCReader, Field
 
-from pylmldb import LaneMARCRecord, LMLDB
+from pylmldb import LaneMARCRecord
 from pylmldb.xobis_constants import *
 
+from .RecordSource import RecordSource
+from .IndexManifest import IndexManifest
+from .SharedIndex import SharedIndex
+from .IndexServer import IndexClient
+from .SQLiteIndex import SQLiteIndex
+from .Metrics import Metrics
+
 DEFAULT_INDEX_DIR_STR = "/home/alex/py/lib/pylmldb"    # @@@@@@@@@@@@@@@@@@
 
 class Indexer:
@@ -28,6 +35,15 @@ class Indexer:
     INDEX_REVERSE_FILE = INDEX_DIR / "index_reverse.json"
     INDEX_REL_TYPE_FILE = INDEX_DIR / "index_rel_type.json"
     INDEX_BIB_TO_HDG_FILE = INDEX_DIR / "index_bib_to_hdg.json"
+    INDEX_FILES = (INDEX_FILE, INDEX_REVERSE_FILE, INDEX_REL_TYPE_FILE, INDEX_BIB_TO_HDG_FILE)
+    # manifest of index files (and FieldTransposer map)
+    INDEX_MANIFEST_FILE = INDEX_DIR / "manifest.json"
+    # increment when the structure of index file contents changes
+    INDEX_FORMAT_VERSION = 1
+    # storage backend: "json" (loaded into memory) or "sqlite" (SQLiteIndex, built from the record source)
+    INDEX_BACKEND = os.environ.get("PYXOBIS_INDEXER_BACKEND") or "json"
+    INDEX_SQLITE_FILE = INDEX_DIR / "index.sqlite"
+    INDEX_SQLITE_CACHE_KB = int(os.environ.get("PYXOBIS_INDEXER_SQLITE_CACHE_KB") or 16384)
 
     # constants for lookups unable to be resolved,
     # either due to conflict or having no match
@@ -45,7 +61,15 @@ class Indexer:
         assert element_type in cls.index, f"element type {element_type} not indexed"
         identity = LaneMARCRecord.get_identity_from_field(field, element_type)
         value = cls.index[element_type].get(identity)
-        return cls.UNVERIFIED if value is None else value
+        cls.__count_lookups('lookup', (value,))
+        if cls.dependencies is not None:
+            # record the identity whatever the result, since a record added or changed later could change it
+            cls.dependencies.add(cls.identity_dependency(element_type, identity))
+            if value not in (None, cls.CONFLICT):
+                cls.dependencies.add(value)
+        if value is None:
+            return cls.UNVERIFIED
+        return value
 
 
     @classmethod
@@ -75,14 +99,116 @@ class Indexer:
         of the associated record,
         or None if not found.
         """
+        if cls.dependencies is not None and ctrlno not in (cls.UNVERIFIED, cls.CONFLICT):
+            # record even if not found, since a record created later would change the result
+            cls.dependencies.add(ctrlno if ctrlno.startswith('(') else "(CStL)" + ctrlno)
         if not ctrlno.startswith('('):
             ctrlno = "(CStL)" + ctrlno
         main_entry = cls.index_reverse.get(ctrlno)
+        cls.__count_lookups('reverse_lookup', (main_entry,))
         if main_entry is None:
             return None
         return main_entry.split(LaneMARCRecord.UNNORMALIZED_SEP)
 
 
+    @classmethod
+    def lookup_many(cls, fields, element_type):
+        """
+        Batch lookup: given a list of pymarc fields interpreted as a particular
+        XOBIS element type, return a list of their associated control numbers
+        (or CONFLICT or UNVERIFIED), as lookup would for each.
+        Identities are generated once per distinct field, and looked up
+        together, in one round trip if the index is on an IndexServer.
+        """
+        assert element_type in cls.index, f"element type {element_type} not indexed"
+        identities = {}
+        for field in fields:
+            field_key = (field.tag, tuple(field.indicators or ()), tuple(field.subfields))
+            if field_key not in identities:
+                identities[field_key] = LaneMARCRecord.get_identity_from_field(field, element_type)
+        values = dict(zip(identities.values(), cls.get_many(cls.index[element_type], identities.values())))
+        cls.__count_lookups('lookup_many', values.values())
+        results = []
+        for field in fields:
+            value = values[identities[(field.tag, tuple(field.indicators or ()), tuple(field.subfields))]]
+            results.append(cls.UNVERIFIED if value is None else value)
+        if cls.dependencies is not None:
+            cls.dependencies.update(cls.identity_dependency(element_type, identity) for identity in values)
+            cls.dependencies.update(value for value in values.values() if value not in (None, cls.CONFLICT))
+        return results
+
+
+    @classmethod
+    def simple_lookup_many(cls, texts, element_type=None):
+        """
+        Batch simple_lookup: given a list of strings, return a list of their
+        associated control numbers (or CONFLICT or UNVERIFIED).
+        Each distinct string is looked up once.
+        If element type is unspecified, it is determined for each string
+        as simple_lookup does.
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        if element_type is None:
+            text_element_types = { text : cls.simple_element_type_from_value(text) for text in unique_texts }
+        else:
+            text_element_types = dict.fromkeys(unique_texts, element_type)
+        # look up together by element type
+        texts_by_element_type = {}
+        for text, text_element_type in text_element_types.items():
+            texts_by_element_type.setdefault(text_element_type, []).append(text)
+        values = {}
+        for text_element_type, element_type_texts in texts_by_element_type.items():
+            if text_element_type is None:
+                values.update(dict.fromkeys(element_type_texts, cls.UNVERIFIED))
+                continue
+            subf = LaneMARCRecord.IDENTITY_SUBFIELD_MAP[text_element_type][0]
+            values.update(zip(element_type_texts, cls.lookup_many([Field('   ','  ',[subf, text]) for text in element_type_texts],
+                                                                  text_element_type)))
+        return [values[text] for text in texts]
+
+
+    @classmethod
+    def reverse_lookup_many(cls, ctrlnos):
+        """
+        Batch reverse_lookup: given a list of control numbers, return a list
+        of the identity subfield lists of the main entries of their records
+        (or None if not found). Each distinct control number is looked up once.
+        """
+        full_ctrlnos = { ctrlno : ctrlno if ctrlno.startswith('(') else "(CStL)" + ctrlno for ctrlno in ctrlnos }
+        unique_full_ctrlnos = list(dict.fromkeys(full_ctrlnos.values()))
+        if cls.dependencies is not None:
+            cls.dependencies.update(full_ctrlno for ctrlno, full_ctrlno in full_ctrlnos.items()
+                                    if ctrlno not in (cls.UNVERIFIED, cls.CONFLICT))
+        main_entries = dict(zip(unique_full_ctrlnos, cls.get_many(cls.index_reverse, unique_full_ctrlnos)))
+        cls.__count_lookups('reverse_lookup_many', main_entries.values())
+        results = []
+        for ctrlno in ctrlnos:
+            main_entry = main_entries[full_ctrlnos[ctrlno]]
+            results.append(None if main_entry is None else main_entry.split(LaneMARCRecord.UNNORMALIZED_SEP))
+        return results
+
+
+    @classmethod
+    def __count_lookups(cls, method, values):
+        """
+        Count lookups by method in Metrics, by result: hit, miss (not found) or conflict.
+        """
+        for value in values:
+            Metrics.count('indexer_lookups', (method, 'miss' if value is None else 'conflict' if value == cls.CONFLICT else 'hit'))
+
+
+    @staticmethod
+    def get_many(table, keys):
+        """
+        Values of keys in an index table (None if not found), using the
+        table's own batch get_many if it has one (e.g. RemoteIndexTable).
+        """
+        keys = list(keys)
+        if hasattr(table, 'get_many'):
+            return table.get_many(keys)
+        return [table.get(key) for key in keys]
+
+
     @classmethod
     def lookup_rel_types(cls, rel_name):
         """
@@ -96,6 +222,39 @@ class Indexer:
         return sorted(list(set(rel_types) - set(["Equivalence"])))
 
 
+    @classmethod
+    def lookup_rel_type(cls, rel_name):
+        """
+        Given a relationship name string, return its single relationship type
+        (lowercased), or None if it has none or more than one.
+        Names not found as given are retried in normalized form;
+        names not found at all are collected for list_unresolved_rel_names.
+        """
+        try:
+            rel_type = cls.rel_type_table[rel_name]
+            cls.__count_lookups('lookup_rel_type', (rel_type,))
+            return rel_type
+        except KeyError:
+            pass
+        rel_type = cls.rel_type_table.get(cls.normalize_rel_name(rel_name), cls.__UNRESOLVED)
+        cls.__count_lookups('lookup_rel_type', (None if rel_type is cls.__UNRESOLVED else rel_type,))
+        if rel_type is cls.__UNRESOLVED:
+            cls.unresolved_rel_names.add(rel_name)
+            rel_type = None
+        # cache so the next occurrence of this exact string is a single probe
+        cls.rel_type_table[rel_name] = rel_type
+        return rel_type
+
+
+    @staticmethod
+    def normalize_rel_name(rel_name):
+        """
+        Normalized form of a relationship name (relator) string for
+        rel type lookup: trailing punctuation stripped, case-folded.
+        """
+        return rel_name.rstrip(': ').strip().casefold()
+
+
     @classmethod
     def element_type_from_value(cls, field):
         """
@@ -105,6 +264,8 @@ class Indexer:
         results = []
         for element_type, identities in cls.index.items():
             field_identity = LaneMARCRecord.get_identity_from_field(field, element_type)
+            if cls.dependencies is not None:
+                cls.dependencies.add(cls.identity_dependency(element_type, field_identity))
             if field_identity in identities.keys():
                 results.append(element_type)
         return results[0] if len(results) == 1 else None
@@ -122,6 +283,52 @@ class Indexer:
         results = list(filter(None, [cls.element_type_from_value(bespoke_field) for bespoke_field in bespoke_fields]))
         return results[0] if len(results) == 1 else None
 
+    @classmethod
+    def start_recording_dependencies(cls):
+        """
+        Start collecting the control numbers that lookups and reverse lookups
+        resolve to, i.e. the records whose headings a transform depends on,
+        and the identities looked up (see identity_dependency), found or not.
+        Relationship types (lookup_rel_type) are not recorded.
+        """
+        cls.dependencies = set()
+
+    @classmethod
+    def stop_recording_dependencies(cls):
+        """
+        Stop collecting dependencies, returning the set of control numbers
+        and identity dependencies collected since start_recording_dependencies.
+        """
+        dependencies, cls.dependencies = cls.dependencies or set(), None
+        return dependencies
+
+    @staticmethod
+    def identity_dependency(element_type, identity):
+        """
+        Dependency recorded for a lookup of identity string as element type.
+        Unlike control numbers, these don't start with '('.
+        """
+        return f"{element_type}\t{identity}"
+
+    @classmethod
+    def get_identity_dependencies(cls, record):
+        """
+        Identity dependencies of the main and variant identities of a
+        LaneMARCRecord, as indexed, i.e. those of the lookups whose results
+        a change to the record could change. The record is left as it was.
+        """
+        ctrlno, element_type, id_string, auth_form = record.get_identity_information()
+        if not (element_type and id_string):
+            return set()
+        fields = list(record.fields)
+        try:
+            cls.__add_division_variants(record, element_type)
+            variants = record.get_variant_types_and_ids()
+        finally:
+            record.fields = fields
+        return set(cls.identity_dependency(variant_element_type, variant_id_string)
+                   for variant_element_type, variant_id_string in [(element_type, id_string), *variants])
+
     @classmethod
     def get_hdgs_for_bib(cls, bibid):
         return cls.index_bib_to_hdg.get(bibid, [])
@@ -131,40 +338,235 @@ class Indexer:
         """
         Returns a dict by element type listing identities with conflicts in the main index.
         """
-        return { element_type : [identity for identity, value in index.items() if value == cls.CONFLICT] for element_type, index in cls.index.items() }
+        conflicts = {}
+        for element_type, index in cls.index.items():
+            if hasattr(index, 'keys_with_value'):
+                # by secondary index, rather than a full scan
+                conflicts[element_type] = index.keys_with_value(cls.CONFLICT)
+            else:
+                conflicts[element_type] = [identity for identity, value in index.items() if value == cls.CONFLICT]
+        return conflicts
+
+    @classmethod
+    def lookup_prefix(cls, prefix, element_type):
+        """
+        Returns a sorted list of (identity, control number) of identities of
+        element type starting with (normalized identity string) prefix.
+        Uses an index with the sqlite backend, else scans.
+        """
+        assert element_type in cls.index, f"element type {element_type} not indexed"
+        index = cls.index[element_type]
+        if hasattr(index, 'items_with_prefix'):
+            return index.items_with_prefix(prefix)
+        return sorted((identity, value) for identity, value in index.items() if identity.startswith(prefix))
+
+    @classmethod
+    def list_unresolved_rel_names(cls):
+        """
+        Returns a sorted list of relationship names looked up so far
+        that matched no name in the rel type index.
+        """
+        return sorted(cls.unresolved_rel_names)
 
 
     index, index_reverse, index_rel_type, index_bib_to_hdg = None, None, None, None
 
+    # control numbers resolved to and identity dependencies since start_recording_dependencies, or None if not recording
+    dependencies = None
+
+    # compiled from index_rel_type: rel name (and normalized rel name) --> single rel type or None
+    rel_type_table, unresolved_rel_names = {}, set()
+    __UNRESOLVED = object()
+
+    # SharedIndex the tables are read from, if shared
+    shared_index = None
+    # IndexClient the tables are read through, if using an IndexServer
+    index_client = None
+    # SQLiteIndex the tables are read from, if using the sqlite backend
+    sqlite_index = None
+
     @classmethod
     def init_index(cls):
         # Store index as json (for now, maybe change to pickle later?)
-        if not all((cls.index, cls.index_reverse, cls.index_rel_type, cls.index_bib_to_hdg)):
-            # read index from file, or generate it
+        # by identity: remote and sqlite tables would be counted for truthiness, and empty tables are loaded
+        if any(table is None for table in (cls.index, cls.index_reverse, cls.index_rel_type, cls.index_bib_to_hdg)):
+            cls.__clear_vocabulary()
+            # attach to index shared by another process, if any
+            shared_index_name = os.environ.get("PYXOBIS_INDEXER_SHM")
+            if shared_index_name:
+                cls.__use_shared_index(SharedIndex.attach(shared_index_name))
+                cls.__compile_rel_type_table()
+                return
+            # else look up through index server, if any
+            index_server_address = os.environ.get("PYXOBIS_INDEXER_SERVER")
+            if index_server_address:
+                try:
+                    cls.__use_index_client(IndexClient(index_server_address))
+                    cls.__compile_rel_type_table()
+                    return
+                except OSError as e:
+                    logger.warning(f"index server {index_server_address} unavailable ({e}); loading index locally")
+            if cls.INDEX_BACKEND == "sqlite":
+                cls.__use_sqlite_index()
+            else:
+                cls.__load_index_files()
+            cls.__compile_rel_type_table()
+
+    @classmethod
+    def __load_index_files(cls):
+        # read index from file if it checks out against the manifest, or generate it
+        manifest = IndexManifest(cls.INDEX_MANIFEST_FILE)
+        problems = cls.check_index()
+        if not problems:
             try:
-                with cls.INDEX_FILE.open('r') as inf:
-                    cls.index = json.load(inf)
-                with cls.INDEX_REVERSE_FILE.open('r') as inf:
-                    cls.index_reverse = json.load(inf)
-                with cls.INDEX_REL_TYPE_FILE.open('r') as inf:
-                    cls.index_rel_type = json.load(inf)
-                with cls.INDEX_BIB_TO_HDG_FILE.open('r') as inf:
-                    cls.index_bib_to_hdg = json.load(inf)
-            except:
-                logger.warning("index files not found; regenerating from LMLDB")
-                cls.__generate_index()
-                with cls.INDEX_FILE.open('w') as outf:
-                    json.dump(cls.index, outf)
-                with cls.INDEX_REVERSE_FILE.open('w') as outf:
-                    json.dump(cls.index_reverse, outf)
-                with cls.INDEX_REL_TYPE_FILE.open('w') as outf:
-                    json.dump(cls.index_rel_type, outf)
-                with cls.INDEX_BIB_TO_HDG_FILE.open('w') as outf:
-                    json.dump(cls.index_bib_to_hdg, outf)
-
-    @classmethod
-    def __generate_index(cls):
+                cls.index, cls.index_reverse, cls.index_rel_type, cls.index_bib_to_hdg = \
+                    (json.loads(manifest.load(path)) for path in cls.INDEX_FILES)
+            except (OSError, ValueError) as e:
+                problems = [str(e)]
+        if problems:
+            logger.warning(f"index files need regenerating ({'; '.join(problems)}); regenerating from record source")
+            source = RecordSource.get_default_snapshot_id()
+            record_counts = cls.__generate_index()
+            # manifest written once, after all the files
+            manifest.save_many([(path, json.dumps(index).encode('utf-8'), cls.INDEX_FORMAT_VERSION,
+                                 source, { **record_counts, 'entries' : len(index) }, ())
+                                for path, index in zip(cls.INDEX_FILES, (cls.index, cls.index_reverse,
+                                                                          cls.index_rel_type, cls.index_bib_to_hdg))])
+
+    @classmethod
+    def __use_sqlite_index(cls):
+        # read index from SQLite database, building it from the record source if need be
+        sqlite_index = SQLiteIndex(cls.INDEX_SQLITE_FILE, cls.INDEX_SQLITE_CACHE_KB)
+        problems = sqlite_index.check(RecordSource.get_default_snapshot_id())
+        if problems:
+            # generated rather than read from the index files, which don't say which records each identity came from
+            logger.warning(f"sqlite index needs building ({'; '.join(problems)}); building from record source")
+            source = RecordSource.get_default_snapshot_id()
+            identity_sources = []
+            record_counts = cls.__generate_index(identity_sources)
+            # not to go on reading the database replaced
+            sqlite_index.close()
+            SQLiteIndex.build(cls.INDEX_SQLITE_FILE, cls.index, cls.index_reverse, cls.index_rel_type, cls.index_bib_to_hdg,
+                              identity_sources, source=source, counts=record_counts)
+        cls.sqlite_index = sqlite_index
+        tables = sqlite_index.get_tables()
+        cls.index, cls.index_reverse = tables['index'], tables['index_reverse']
+        cls.index_rel_type, cls.index_bib_to_hdg = tables['index_rel_type'], tables['index_bib_to_hdg']
+
+    @classmethod
+    def update_record(cls, record):
+        """
+        With the sqlite backend, replace the index entries (main and variant
+        identities, authorized form) of a LaneMARCRecord, in one transaction.
+        Relationship types and bib to hdg links are not updated.
+        """
+        assert cls.sqlite_index is not None, "incremental updates need the sqlite index backend"
+        ctrlno, element_type, id_string, auth_form = record.get_identity_information()
+        if not (element_type and id_string):
+            cls.sqlite_index.update_record(ctrlno, None, [])
+            cls.__clear_vocabulary()
+            return
+        cls.__add_division_variants(record, element_type)
+        cls.sqlite_index.update_record(ctrlno, auth_form, [(element_type, id_string), *record.get_variant_types_and_ids()])
+        cls.__clear_vocabulary()
+
+    @classmethod
+    def share_index(cls):
+        """
+        Move the index tables into a shared memory segment (see SharedIndex),
+        so that worker processes read one copy rather than each gradually
+        copying the dicts. Processes forked after this use it directly;
+        this also sets PYXOBIS_INDEXER_SHM to the segment name, so that
+        processes spawned after this attach to it when initializing the index.
+        The segment is removed when this process exits.
+        Returns the segment name.
+        """
+        if cls.shared_index is None:
+            cls.init_index()
+            shared_index = SharedIndex.create(cls.index, cls.index_reverse, cls.index_rel_type, cls.index_bib_to_hdg)
+            atexit.register(shared_index.unlink)
+            cls.__use_shared_index(shared_index)
+            os.environ["PYXOBIS_INDEXER_SHM"] = shared_index.name
+        return cls.shared_index.name
+
+    @classmethod
+    def __use_shared_index(cls, shared_index):
+        cls.shared_index = shared_index
+        cls.index, cls.index_reverse = shared_index.index, shared_index.index_reverse
+        cls.index_rel_type, cls.index_bib_to_hdg = shared_index.index_rel_type, shared_index.index_bib_to_hdg
+
+    @classmethod
+    def __use_index_client(cls, index_client):
+        cls.index_client = index_client
+        cls.__use_index_client_tables()
+        # when the server reloads, element types and rel types may have changed
+        index_client.add_reload_callback(cls.__use_index_client_tables)
+        index_client.add_reload_callback(cls.__compile_rel_type_table)
+        index_client.add_reload_callback(cls.__clear_vocabulary)
+
+    @classmethod
+    def __use_index_client_tables(cls):
+        tables = cls.index_client.get_tables()
+        cls.index, cls.index_reverse = tables['index'], tables['index_reverse']
+        cls.index_rel_type, cls.index_bib_to_hdg = tables['index_rel_type'], tables['index_bib_to_hdg']
+
+    @classmethod
+    def check_index(cls, verify_hashes=False):
+        """
+        Returns list of reasons the index files need regenerating (empty if none):
+        not as last written, of another format version, or generated from
+        another snapshot of the record source (if it can be determined).
+        Size checks only, unless verify_hashes; loading always verifies hashes.
+        """
+        return IndexManifest(cls.INDEX_MANIFEST_FILE).check(cls.INDEX_FILES, cls.INDEX_FORMAT_VERSION,
+                                                            RecordSource.get_default_snapshot_id(), verify_hashes)
+
+    @classmethod
+    def __compile_rel_type_table(cls):
+        """
+        Resolve every name in the rel type index to its single type up front,
+        so that lookup_rel_type is a single dict probe per relationship.
+        """
+        exact_table, normalized_table, ambiguous_rel_names = {}, {}, []
+        for rel_name in cls.index_rel_type:
+            rel_types = cls.lookup_rel_types(rel_name)
+            rel_type = rel_types[0].lower() if len(rel_types) == 1 else None
+            if rel_type is None:
+                ambiguous_rel_names.append(rel_name)
+            exact_table[rel_name] = rel_type
+            # normalized forms of different names might disagree; if so, don't guess
+            normalized_rel_name = cls.normalize_rel_name(rel_name)
+            if normalized_table.get(normalized_rel_name, rel_type) != rel_type:
+                rel_type = None
+            normalized_table[normalized_rel_name] = rel_type
+        # names exactly as given take precedence over normalized forms
+        rel_type_table = {**normalized_table, **exact_table}
+        if ambiguous_rel_names:
+            logger.warning(f"{len(ambiguous_rel_names)} relationship names without a single rel type: {'; '.join(sorted(ambiguous_rel_names))}")
+        cls.rel_type_table, cls.unresolved_rel_names = rel_type_table, set()
+
+    @staticmethod
+    def __clear_vocabulary():
+        # vocabulary resolved against the tables before they changed may be stale
+        from .Vocabulary import Vocabulary
+        Vocabulary.clear()
+
+    @staticmethod
+    def __add_division_variants(record, element_type):
+        # for Organization and Event subdivisions, add variant fields with concatenated divisions as a single ^a
+        if element_type in (ORGANIZATION, EVENT):
+            for field in record.get_fields('110','410'):
+                if 'b' in field:
+                    record.add_field(Field('410','2 ',('a',' '.join(field.get_subfields('a','b')))))
+            for field in record.get_fields('111','411'):
+                if 'e' in field:
+                    record.add_field(Field('411','2 ',('a',' '.join(field.get_subfields('a','e')))))
+
+    @classmethod
+    def __generate_index(cls, identity_sources=None):
         # Generate index from given input MARC files.
+        # If identity_sources (a list) is given, append (element type, identity, ctrlno, is main)
+        # of every main and variant identity to it (see SQLiteIndex).
         # forward index (main or variant identity string --> ctrl number/conflict)
         index, index_variants = {}, {}
         conflicts, conflicts_variants = set(), set()
@@ -176,11 +578,14 @@ class Indexer:
             "Postordinate", "Associative", "Dissociative", "Equivalence"))
         # bib to hdg for field transposition etc (bib id --> list of hdg ids)
         index_bib_to_hdg = {}
+        # records read, by type
+        record_counts = { 'bib' : 0, 'aut' : 0, 'hdg' : 0 }
 
-        with LMLDB() as db:
-            for record_type, db_query in (('bib',db.get_bibs),('auth',db.get_auts)):
+        with RecordSource.get_default() as db:
+            for record_type, db_query in (('bib',db.get_bibs),('aut',db.get_auts)):
                 logger.info(f"reading {record_type}s...")
                 for _, record in tqdm(db_query()):
+                    record_counts[record_type] += 1
                     # if relationship, add to rel type index
                     if record.get_broad_category() == 'Relationships':
                         rel_types = sorted(list(all_rel_types & set(record.get_all_categories())))
@@ -197,21 +602,18 @@ class Indexer:
                         # Main entry:
                         if element_type not in index:
                             index[element_type] = {}
+                        if identity_sources is not None:
+                            identity_sources.append((element_type, id_string, ctrlno, True))
                         if id_string in index[element_type]:
                             # Multiple main entries have this same identity tuple
                             conflicts.add((element_type, id_string))
                         else:
                             index[element_type][id_string] = ctrlno
                         # Variant entries:
-                        # for Organization and Event subdivisions, add variant fields with concatenated divisions as a single ^a
-                        if element_type in (ORGANIZATION, EVENT):
-                            for field in record.get_fields('110','410'):
-                                if 'b' in field:
-                                    record.add_field(Field('410','2 ',('a',' '.join(field.get_subfields('a','b')))))
-                            for field in record.get_fields('111','411'):
-                                if 'e' in field:
-                                    record.add_field(Field('411','2 ',('a',' '.join(field.get_subfields('a','e')))))
+                        cls.__add_division_variants(record, element_type)
                         for variant_element_type, variant_id_string in record.get_variant_types_and_ids():
+                            if identity_sources is not None:
+                                identity_sources.append((variant_element_type, variant_id_string, ctrlno, False))
                             if variant_element_type not in index_variants:
                                 index_variants[variant_element_type] = {}
                             if variant_id_string in index_variants[variant_element_type]:
@@ -222,6 +624,7 @@ class Indexer:
 
             logger.info(f"reading hdgs...")
             for hdg_ctrlno, hdg_record in tqdm(db.get_hdgs()):
+                record_counts['hdg'] += 1
                 bib_ctrlno = hdg_record['004'].data
                 if bib_ctrlno not in index_bib_to_hdg:
                     index_bib_to_hdg[bib_ctrlno] = []
@@ -251,3 +654,4 @@ class Indexer:
 
         cls.index, cls.index_reverse = index, index_reverse
         cls.index_rel_type, cls.index_bib_to_hdg = index_rel_type, index_bib_to_hdg
+        return record_counts
@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+from pylmldb import LaneMARCRecord
+
+from . import iso2709
+
+
+class LazyLaneMARCRecord(LaneMARCRecord):
+    """
+    LaneMARCRecord built from raw MARC (ISO 2709) data, keeping the raw
+    directory and field data and decoding each field only when a tag it has
+    is first requested (get_fields, record[tag], tag in record).
+
+    Anything needing the full field list (record.fields, iteration,
+    adding/removing fields, serialization) decodes all remaining fields,
+    after which the record behaves as an ordinary LaneMARCRecord.
+    """
+    def __init__(self, data):
+        super().__init__()
+        self.leader, self.__base_address, self.__entries = iso2709.read_directory(data)
+        self.__data = data
+        # decoded fields by directory position, so each is decoded only once
+        self.__decoded = [None] * len(self.__entries)
+        self.__fields = None
+
+    @property
+    def fields(self):
+        if self.__fields is None:
+            self.__fields = [self.__get_field(i) for i in range(len(self.__entries))]
+            # raw data no longer needed
+            self.__data, self.__entries, self.__decoded = None, None, None
+        return self.__fields
+
+    @fields.setter
+    def fields(self, fields):
+        self.__fields = fields
+
+    def __get_field(self, i):
+        field = self.__decoded[i]
+        if field is None:
+            entry = self.__entries[i]
+            field_data = iso2709.get_field_data(self.__data, self.__base_address, entry)
+            field = self.__decoded[i] = iso2709.decode_field(entry[0], field_data, self.leader)
+        return field
+
+    def get_fields(self, *args):
+        if self.__fields is not None or not args:
+            return super().get_fields(*args)
+        return [self.__get_field(i) for i, entry in enumerate(self.__entries) if entry[0] in args]
+
+    def __getitem__(self, tag):
+        fields = self.get_fields(tag)
+        return fields[0] if fields else None
+
+    def __contains__(self, tag):
+        if self.__fields is not None:
+            return super().__contains__(tag)
+        return any(entry[0] == tag for entry in self.__entries)
+
+    def is_fully_decoded(self):
+        """
+        Whether all fields of this record have been decoded.
+        """
+        return self.__fields is not None
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Counters and histograms of conversion work (records by element type,
+skips by reason, Indexer lookups by method and result, result cache
+hits, transform latency), for export by batch runs (see MetricsWriter in pyxobis.batch).
+"""
+
+from bisect import bisect_left
+
+
+class Metrics:
+    """
+    Each metric has fixed label names (LABELS); series are keyed by
+    (metric name, tuple of label values), e.g.
+
+        ('indexer_lookups', ('lookup', 'hit')) : 1234
+
+    Counters are numbers. Histograms are lists of counts of observations
+    in each bucket (upper bounds HISTOGRAM_BUCKETS, then +Inf), followed
+    by the sum of the observations.
+
+    Worker processes collect() what they have counted, and the process
+    running them merge()s these snapshots, which are dicts of series.
+    """
+    LABELS = {
+        'records_transformed' : ('element_type',),
+        'records_skipped'     : ('reason',),
+        'indexer_lookups'     : ('method', 'result'),
+        'index_client_cache'  : ('table', 'result'),
+        'result_cache'        : ('result',),
+        'transform_seconds'   : ('record_type',),
+        'output_bytes'        : (),
+    }
+    HISTOGRAMS = { 'transform_seconds' }
+    # upper bounds of histogram buckets, in seconds
+    HISTOGRAM_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    # { (name, label values) : count, or [bucket counts..., sum] }
+    series = {}
+
+
+    @classmethod
+    def count(cls, name, labels=(), n=1):
+        """
+        Add n to counter name with label values labels.
+        """
+        key = (name, labels)
+        cls.series[key] = cls.series.get(key, 0) + n
+
+    @classmethod
+    def observe(cls, name, labels, value):
+        """
+        Record observation value in histogram name with label values labels.
+        """
+        key = (name, labels)
+        histogram = cls.series.get(key)
+        if histogram is None:
+            histogram = cls.series[key] = [0] * (len(cls.HISTOGRAM_BUCKETS) + 2)
+        histogram[bisect_left(cls.HISTOGRAM_BUCKETS, value)] += 1
+        histogram[-1] += value
+
+    @classmethod
+    def collect(cls):
+        """
+        Returns snapshot of series counted since the last collect(), and resets.
+        """
+        series, cls.series = cls.series, {}
+        return series
+
+
+    @staticmethod
+    def merge(metrics, snapshot):
+        """
+        Add the series of snapshot to metrics (a snapshot), in place.
+        Returns metrics.
+        """
+        for key, value in snapshot.items():
+            if isinstance(value, list):
+                histogram = metrics.get(key)
+                if histogram is None:
+                    histogram = metrics[key] = [0] * len(value)
+                for i, count in enumerate(value):
+                    histogram[i] += count
+            else:
+                metrics[key] = metrics.get(key, 0) + value
+        return metrics
+
+    @classmethod
+    def quantile(cls, histogram, q):
+        """
+        Upper bound of the bucket of histogram holding quantile q (e.g. 0.95),
+        or None if empty (or inf, if in the last bucket).
+        """
+        total = sum(histogram[:-1])
+        if not total:
+            return None
+        seen = 0
+        for upper_bound, count in zip(cls.HISTOGRAM_BUCKETS + (float('inf'),), histogram):
+            seen += count
+            if seen >= q * total:
+                return upper_bound
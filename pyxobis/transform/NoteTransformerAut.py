@@ -4,7 +4,7 @@
 from . import tf_common_methods as tfcm
 from pylmldb.xobis_constants import *
 
-from .Indexer import Indexer
+from .Vocabulary import Vocabulary
 
 
 class NoteTransformerAut:
@@ -13,7 +13,17 @@ class NoteTransformerAut:
     authority pymarc Records.
     """
     def __init__(self):
-        self.mesh_ref = tfcm.build_simple_ref("Medical subject headings", WORK_AUT)
+        # resolve fixed vocabulary up front
+        Vocabulary.register(CONCEPT, ["Note Type"])
+        Vocabulary.register(WORK_AUT, ["Medical subject headings"], as_refs=True)
+
+    @property
+    def mesh_ref(self):
+        return Vocabulary.ref("Medical subject headings", WORK_AUT)
+
+    @property
+    def note_type_set_href(self):
+        return Vocabulary.href("Note Type", CONCEPT)
 
 
     def transform_notes(self, record):
@@ -178,7 +188,7 @@ class NoteTransformerAut:
         # add href and set URIs to all types in notes
         for note in notes:
             if 'type_link_title' in note:
-                note['type_href_URI'] = Indexer.simple_lookup(note['type_link_title'], CONCEPT)
-                note['type_set_URI'] = Indexer.simple_lookup("Note Type", CONCEPT)
+                note['type_href_URI'] = Vocabulary.href(note['type_link_title'], CONCEPT)
+                note['type_set_URI'] = self.note_type_set_href
 
         return notes
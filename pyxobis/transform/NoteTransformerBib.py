@@ -8,7 +8,8 @@ from pymarc import Field
 from . import tf_common_methods as tfcm
 from pylmldb.xobis_constants import *
 
-from .Indexer import Indexer
+from .Vocabulary import Vocabulary
+from .Diagnostics import Diagnostics
 
 
 class NoteTransformerBib:
@@ -17,7 +18,12 @@ class NoteTransformerBib:
     bibliographic pymarc Records.
     """
     def __init__(self):
-        pass
+        # resolve fixed vocabulary up front
+        Vocabulary.register(CONCEPT, ["Note Type"])
+
+    @property
+    def note_type_set_href(self):
+        return Vocabulary.href("Note Type", CONCEPT)
 
     NOTE_FIELDS = [
         '043','245','250','256','260','264','265','300','306','310','321','351',
@@ -96,7 +102,7 @@ class NoteTransformerBib:
                                        '2' : "Intervening publisher:",
                                        '3' : "Latest publisher:" }][any(code in '3abc' for code in new_codes)].get(new_field.indicator1)
                     except:
-                        logger.warning(f"{record.get_control_number()}: invalid indicator(s): {field}")
+                        Diagnostics.report("invalid indicator(s)", field.tag, field)
                         continue
                     new_field.subfields = [ 'i', note_subf ] + new_field.subfields
                     notes.append({ 'content_text' : tfcm.concat_subfs(new_field),
@@ -127,7 +133,7 @@ class NoteTransformerBib:
                                           '2' : "Intervening manufacturer:",
                                           '3' : "Latest manufacturer:" } }.get(field.indicator2).get(field.indicator1)
                 except:
-                    logger.warning(f"{record.get_control_number()}: invalid indicator(s): {field}")
+                    Diagnostics.report("invalid indicator(s)", field.tag, field)
                     continue
                 field.subfields = [ 'i', note_subf ] + field.subfields
                 notes.append({ 'content_text' : tfcm.concat_subfs(field),
@@ -195,7 +201,7 @@ class NoteTransformerBib:
             elif field.tag == '490':
                 # @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
                 if field.indicator1!='0':
-                    logger.warning(f"{record.get_control_number()}: unmatched series note: {field}")
+                    Diagnostics.report("unmatched series note", field.tag, field)
                 # @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
                 notes.append({ 'content_text' : tfcm.concat_subfs(field, with_codes=False),
                                'role' : 'transcription',
@@ -488,7 +494,7 @@ class NoteTransformerBib:
         # add href and set URIs to all types in notes
         for note in notes:
             if 'type_link_title' in note:
-                note['type_href_URI'] = Indexer.simple_lookup(note['type_link_title'], CONCEPT)
-                note['type_set_URI'] = Indexer.simple_lookup("Note Type", CONCEPT)
+                note['type_href_URI'] = Vocabulary.href(note['type_link_title'], CONCEPT)
+                note['type_set_URI'] = self.note_type_set_href
 
         return notes
@@ -4,7 +4,7 @@
 from . import tf_common_methods as tfcm
 from pylmldb.xobis_constants import *
 
-from .Indexer import Indexer
+from .Vocabulary import Vocabulary
 
 
 class NoteTransformerHdg:
@@ -13,8 +13,21 @@ class NoteTransformerHdg:
     holdings pymarc Records.
     """
     def __init__(self):
-        self.lc_org_ref  = tfcm.build_simple_ref("Library of Congress", ORGANIZATION)
-        self.nlm_org_ref = tfcm.build_simple_ref("National Library of Medicine (U.S.)", ORGANIZATION)
+        # resolve fixed vocabulary up front
+        Vocabulary.register(CONCEPT, ["Note Type"])
+        Vocabulary.register(ORGANIZATION, ["Library of Congress", "National Library of Medicine (U.S.)"], as_refs=True)
+
+    @property
+    def lc_org_ref(self):
+        return Vocabulary.ref("Library of Congress", ORGANIZATION)
+
+    @property
+    def nlm_org_ref(self):
+        return Vocabulary.ref("National Library of Medicine (U.S.)", ORGANIZATION)
+
+    @property
+    def note_type_set_href(self):
+        return Vocabulary.href("Note Type", CONCEPT)
 
 
     def transform_notes(self, record):
@@ -120,7 +133,7 @@ class NoteTransformerHdg:
         # add href and set URIs to all types in notes
         for note in notes:
             if 'type_link_title' in note:
-                note['type_href_URI'] = Indexer.simple_lookup(note['type_link_title'], CONCEPT)
-                note['type_set_URI'] = Indexer.simple_lookup("Note Type", CONCEPT)
+                note['type_href_URI'] = Vocabulary.href(note['type_link_title'], CONCEPT)
+                note['type_set_URI'] = self.note_type_set_href
 
         return notes
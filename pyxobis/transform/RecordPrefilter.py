@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+from pylmldb.xobis_constants import *
+
+from .LazyLaneMARCRecord import LazyLaneMARCRecord
+
+
+class RecordPrefilter:
+    """
+    Determines whether a record would be skipped by RecordTransformer.transform,
+    either from a decoded record or directly from raw MARC bytes,
+    in which case only the fields needed to decide are decoded.
+    """
+    # reasons for skipping a record
+    SUPPRESSED         = "suppressed"
+    IMMI               = "immi"
+    NO_ELEMENT_TYPE    = "no element type"
+    COMPONENT_HOLDINGS = "component holdings"
+    NO_CONTROL_NUMBER  = "no control number"
+
+    @classmethod
+    def get_skip_reason(cls, record):
+        """
+        Given a LaneMARCRecord, return the reason it should not be transformed,
+        or None if it should be.
+        """
+        # Ignore record if suppressed
+        if record.is_suppressed():
+            return cls.SUPPRESSED
+
+        # @@@@@ TEMPORARY: IGNORE IMMI RECORDS @@@@@
+        if '040' in record and record['040']['a'] == "IMMI":
+            return cls.IMMI
+
+        element_type = record.get_xobis_element_type()
+        if element_type is None:
+            # @@@@@@@@@@@@@@@@@@@@@@@@@@@
+            # at this point these should all be 155 category dummy records
+            #   we want to skip, but maybe make this into a warning
+            #   just to make sure?
+            return cls.NO_ELEMENT_TYPE
+        elif element_type == HOLDINGS and record.get_holdings_type() is None:
+            # @@@@@@@@@@@@@@@@@@@@@@@@@@@
+            # skip component records (may erroneously skip others if
+            #   new/invalid loc codes added, so revisit this at some point)
+            return cls.COMPONENT_HOLDINGS
+
+        # @@@@@ TEMPORARY @@@@@@
+        if record.get_control_number() is None:
+            return cls.NO_CONTROL_NUMBER
+
+        return None
+
+    @classmethod
+    def get_raw_skip_reason(cls, data):
+        """
+        Given raw MARC record bytes, return the reason the record should not be
+        transformed, or None if it should be, decoding only the fields
+        the decision reads.
+        """
+        return cls.get_skip_reason(LazyLaneMARCRecord(data))
+
+    @classmethod
+    def filter_raw(cls, raw_records, skipped_counts=None):
+        """
+        Given an iterable of raw MARC record bytes, yield only those that
+        should be transformed.
+        If skipped_counts dict is given, tally skipped records there by reason.
+        """
+        for data in raw_records:
+            skip_reason = cls.get_raw_skip_reason(data)
+            if skip_reason is None:
+                yield data
+            elif skipped_counts is not None:
+                skipped_counts[skip_reason] = skipped_counts.get(skip_reason, 0) + 1
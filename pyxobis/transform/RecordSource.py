@@ -0,0 +1,270 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Sources of bib/aut/hdg records for building indices, as pairs of
+control number and LaneMARCRecord, as pylmldb's LMLDB provides.
+"""
+
+import os, re, io, mmap, hashlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+from loguru import logger
+
+from pymarc import parse_xml_to_array
+
+from pylmldb import LaneMARCRecord, LMLDB
+
+from . import iso2709
+from .LazyLaneMARCRecord import LazyLaneMARCRecord
+
+
+class RecordSource(ABC):
+    """
+    Interface for record sources; subclasses implement get_bibs, get_auts
+    and get_hdgs. Use as a context manager:
+
+        with RecordSource.get_default() as db:
+            for ctrlno, record in db.get_bibs():
+                ...
+    """
+    # directory of dump files to read instead of LMLDB, if set
+    SOURCE_DIR_STR = os.environ.get("PYXOBIS_RECORD_SOURCE_PATH")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        pass
+
+    @abstractmethod
+    def get_bibs(self, ids=None):
+        """
+        Yield (ctrlno, record) pairs for all bibs, or those with given ctrlnos.
+        """
+
+    @abstractmethod
+    def get_auts(self, ids=None):
+        """
+        Yield (ctrlno, record) pairs for all auts, or those with given ctrlnos.
+        """
+
+    @abstractmethod
+    def get_hdgs(self, ids=None):
+        """
+        Yield (ctrlno, record) pairs for all hdgs, or those with given ctrlnos.
+        """
+
+    def get_raw_records(self, record_type):
+        """
+        Yield (ctrlno, raw ISO 2709 bytes) pairs for all records of record type
+        ('bib', 'aut', 'hdg'), e.g. to hand to worker processes to decode
+        (as LazyLaneMARCRecord). Sources without raw records encode each
+        one (see encode_record).
+        """
+        for ctrlno, record in getattr(self, f"get_{record_type}s")():
+            yield ctrlno, RecordSource.encode_record(record)
+
+    @staticmethod
+    def get_raw_records_of(db, record_type):
+        """
+        db.get_raw_records(record_type), or for sources that are not
+        RecordSources (LMLDB), their records encoded likewise.
+        """
+        if isinstance(db, RecordSource):
+            return db.get_raw_records(record_type)
+        return RecordSource.get_raw_records(db, record_type)
+
+    @staticmethod
+    def encode_record(record):
+        """
+        Raw ISO 2709 bytes of a decoded record, in UTF-8 (leader/09 'a'):
+        pymarc would write a record read as MARC-8 as Latin-1, losing
+        or failing on characters it can't hold.
+        """
+        leader = str(record.leader)
+        record.leader, record.force_utf8 = leader[:9] + 'a' + leader[10:], True
+        return record.as_marc()
+
+    def get_snapshot_id(self):
+        """
+        Identifier of the current state of the source's records,
+        or None if it cannot be determined cheaply.
+        """
+        return None
+
+    @classmethod
+    def get_default_snapshot_id(cls):
+        """
+        Snapshot identifier of the default source (see get_default), without opening it.
+        """
+        if cls.SOURCE_DIR_STR:
+            return FileRecordSource(cls.SOURCE_DIR_STR).get_snapshot_id()
+        return None
+
+    @classmethod
+    def get_default(cls):
+        """
+        FileRecordSource of PYXOBIS_RECORD_SOURCE_PATH if set, else LMLDB.
+        """
+        if cls.SOURCE_DIR_STR:
+            logger.info(f"reading records from dump files in {cls.SOURCE_DIR_STR}")
+            return FileRecordSource(cls.SOURCE_DIR_STR)
+        return LMLDB()
+
+
+class FileRecordSource(RecordSource):
+    """
+    Reads records from MARC 21 (.mrc) or MARCXML (.xml) dump files in a
+    directory, named by record type: bib*.mrc, aut*.xml, hdg_001.mrc, etc.
+    Files of a type are read in sorted name order.
+
+    Lookups by ctrlno use a byte-offset index of each record in each file,
+    built for a record type the first time it is needed.
+
+    If shard_count > 1, iterating all records of a type reads only every
+    shard_count-th file starting from shard_index, so that workers can each
+    take a shard; lookups by ctrlno still cover all files.
+    """
+    RECORD_TYPES = ('bib', 'aut', 'hdg')
+    MARC_EXT, XML_EXT = '.mrc', '.xml'
+
+    # record element boundaries and 001 in MARCXML, with any namespace prefix
+    XML_RECORD_START_RE = re.compile(rb'<(?:\w+:)?record[\s>]')
+    XML_RECORD_END_RE = re.compile(rb'</(?:\w+:)?record\s*>')
+    XML_001_RE = re.compile(rb'<(?:\w+:)?controlfield\s+tag\s*=\s*["\']001["\']\s*>([^<]*)<')
+    XML_WRAPPER = (b'<collection xmlns="http://www.loc.gov/MARC21/slim" '
+                   b'xmlns:marc="http://www.loc.gov/MARC21/slim">', b'</collection>')
+
+    def __init__(self, directory, shard_index=0, shard_count=1):
+        directory = Path(directory)
+        assert 0 <= shard_index < shard_count, f"invalid shard: {shard_index} of {shard_count}"
+        self.shard_index, self.shard_count = shard_index, shard_count
+        self.files = {}
+        for record_type in self.RECORD_TYPES:
+            self.files[record_type] = sorted(path for path in directory.glob(f'{record_type}*')
+                                             if path.suffix in (self.MARC_EXT, self.XML_EXT))
+            if not self.files[record_type]:
+                logger.warning(f"no {record_type} files found in {directory}")
+        # { record type : { ctrlno : (file path, offset, length) } }
+        self.offset_index = {}
+        self.open_files = {}
+
+    def close(self):
+        for f in self.open_files.values():
+            f.close()
+        self.open_files = {}
+
+    def get_bibs(self, ids=None):
+        return self.get_records('bib', ids)
+
+    def get_auts(self, ids=None):
+        return self.get_records('aut', ids)
+
+    def get_hdgs(self, ids=None):
+        return self.get_records('hdg', ids)
+
+    def get_raw_records(self, record_type):
+        """
+        Yield (ctrlno, raw ISO 2709 bytes) of all records of record type,
+        in file order: as in the .mrc files, or encoded from .xml files.
+        """
+        for path in self.files[record_type][self.shard_index::self.shard_count]:
+            with path.open('rb') as inf:
+                for offset, data in self.iter_raw_records(path, inf):
+                    if path.suffix == self.MARC_EXT:
+                        yield self.read_ctrlno(path, data), data
+                    else:
+                        ctrlno, record = self.read_record(path, data)
+                        yield ctrlno, self.encode_record(record)
+
+    def get_snapshot_id(self):
+        """
+        Hash of the names, sizes and modification times of the dump files.
+        """
+        snapshot_hash = hashlib.sha256()
+        for record_type in self.RECORD_TYPES:
+            for path in self.files[record_type]:
+                stat = path.stat()
+                snapshot_hash.update(f"{record_type}\t{path.name}\t{stat.st_size}\t{stat.st_mtime_ns}\n".encode('utf-8'))
+        return snapshot_hash.hexdigest()
+
+    def get_records(self, record_type, ids=None):
+        """
+        Yield (ctrlno, record) pairs of record type, either all in file order
+        or those with ctrlnos in ids, in that order (missing ctrlnos skipped).
+        """
+        if ids is None:
+            for path in self.files[record_type][self.shard_index::self.shard_count]:
+                with path.open('rb') as inf:
+                    for offset, data in self.iter_raw_records(path, inf):
+                        yield self.read_record(path, data)
+        else:
+            if record_type not in self.offset_index:
+                self.offset_index[record_type] = self.build_offset_index(record_type)
+            offset_index = self.offset_index[record_type]
+            for ctrlno in ids:
+                location = offset_index.get(str(ctrlno))
+                if location is not None:
+                    yield self.read_record(location[0], self.read_raw_record(*location))
+
+    def build_offset_index(self, record_type):
+        """
+        Map ctrlno of every record of record type to its file, offset and length.
+        """
+        logger.info(f"indexing {record_type} file offsets...")
+        offset_index = {}
+        for path in self.files[record_type]:
+            with path.open('rb') as inf:
+                for offset, data in self.iter_raw_records(path, inf):
+                    ctrlno = self.read_ctrlno(path, data)
+                    if ctrlno is not None:
+                        offset_index[ctrlno] = (path, offset, len(data))
+        return offset_index
+
+    def read_raw_record(self, path, offset, length):
+        if path not in self.open_files:
+            self.open_files[path] = path.open('rb')
+        f = self.open_files[path]
+        f.seek(offset)
+        return f.read(length)
+
+    def iter_raw_records(self, path, inf):
+        """
+        Yield (offset, raw bytes) of each record in open dump file.
+        """
+        if path.suffix == self.MARC_EXT:
+            yield from iso2709.iter_raw_records(inf)
+        elif os.fstat(inf.fileno()).st_size > 0:
+            with mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                for start_match in self.XML_RECORD_START_RE.finditer(content):
+                    end_match = self.XML_RECORD_END_RE.search(content, start_match.end())
+                    if end_match is None:
+                        break
+                    yield start_match.start(), content[start_match.start():end_match.end()]
+
+    def read_ctrlno(self, path, data):
+        if path.suffix == self.MARC_EXT:
+            leader, base_address, entries = iso2709.read_directory(data)
+            for entry in entries:
+                if entry[0] == '001':
+                    return iso2709.get_field_data(data, base_address, entry).decode('utf-8')
+            return None
+        ctrlno_match = self.XML_001_RE.search(data)
+        return ctrlno_match.group(1).decode('utf-8') if ctrlno_match else None
+
+    def read_record(self, path, data):
+        """
+        Return (ctrlno, LaneMARCRecord) from raw record bytes.
+        """
+        if path.suffix == self.MARC_EXT:
+            record = LazyLaneMARCRecord(data)
+        else:
+            xml_open, xml_close = self.XML_WRAPPER
+            record = parse_xml_to_array(io.BytesIO(xml_open + data + xml_close))[0]
+            record.__class__ = LaneMARCRecord
+        return record['001'].data if '001' in record else None, record
@@ -19,6 +19,10 @@ from .Indexer import Indexer
 from .DateTimeParser import DateTimeParser
 from .NameParser import NameParser
 from .FieldTransposer import FieldTransposer
+from .RecordPrefilter import RecordPrefilter
+from .Vocabulary import Vocabulary
+from .Diagnostics import Diagnostics
+from .Metrics import Metrics
 
 from .VariantTransformer import VariantTransformer
 from .RelationshipTransformer import RelationshipTransformer
@@ -47,13 +51,16 @@ class RecordTransformer:
             HOLDINGS     : self.init_holdings_builder
         }
 
-        self.lane_org_ref = tfcm.build_simple_ref("Lane Medical Library", ORGANIZATION)
-        self.lc_org_ref   = tfcm.build_simple_ref("Library of Congress", ORGANIZATION)
-        self.nlm_org_ref  = tfcm.build_simple_ref("National Library of Medicine (U.S.)", ORGANIZATION)
-        self.oclc_org_ref = tfcm.build_simple_ref("OCLC", ORGANIZATION)
-
-        self.subset_set_href = Indexer.simple_lookup("Subset", CONCEPT)
-        self.action_type_set_href = Indexer.simple_lookup("Action Type", CONCEPT)
+        # resolve fixed vocabulary up front
+        Vocabulary.register(CONCEPT, ["Subset", "Action Type", self.subset_907a_default_title] +
+                                     [title for title_map in self.subset_title_maps for title in title_map.values()])
+        Vocabulary.register(RELATIONSHIP, ["Lane revised", "Batch imported"] +
+                                          [f"{record_creator} created" for record_creator in ("Record", "Lane", "NLM", "LC")])
+        Vocabulary.register(CONCEPT, self.holdings_type_concept_name_map.values(), as_refs=True)
+        Vocabulary.register(ORGANIZATION, ["Lane Medical Library", "Library of Congress",
+                                           "National Library of Medicine (U.S.)", "OCLC"], as_refs=True)
+        for element_type, names in self.id_description_ref_names.items():
+            Vocabulary.register(element_type, names, as_refs=True)
 
         self.ft = FieldTransposer()
 
@@ -63,34 +70,50 @@ class RecordTransformer:
         self.nt  = NoteTransformer()
 
 
+    # fixed vocabulary, read through Vocabulary on use so that it follows Indexer changes
+    @property
+    def lane_org_ref(self):
+        return Vocabulary.ref("Lane Medical Library", ORGANIZATION)
+
+    @property
+    def lc_org_ref(self):
+        return Vocabulary.ref("Library of Congress", ORGANIZATION)
+
+    @property
+    def nlm_org_ref(self):
+        return Vocabulary.ref("National Library of Medicine (U.S.)", ORGANIZATION)
+
+    @property
+    def oclc_org_ref(self):
+        return Vocabulary.ref("OCLC", ORGANIZATION)
+
+    @property
+    def subset_set_href(self):
+        return Vocabulary.href("Subset", CONCEPT)
+
+    @property
+    def action_type_set_href(self):
+        return Vocabulary.href("Action Type", CONCEPT)
+
+
     def transform(self, record):
         """
-        Transform a pymarc Record object into a pyxobis Record object.
+        Transform a pymarc Record object (or LaneMARCRecord subclass,
+        e.g. LazyLaneMARCRecord) into a pyxobis Record object.
 
         Returns None if unable to transform.
         """
-        record.__class__ = LaneMARCRecord
+        if not isinstance(record, LaneMARCRecord):
+            record.__class__ = LaneMARCRecord
 
-        # Ignore record if suppressed
-        if record.is_suppressed():
-            return None
-
-        # @@@@@ TEMPORARY: IGNORE IMMI RECORDS @@@@@
-        if '040' in record and record['040']['a'] == "IMMI":
+        # Ignore suppressed/IMMI/component records etc.
+        skip_reason = RecordPrefilter.get_skip_reason(record)
+        if skip_reason is not None:
+            Metrics.count('records_skipped', (skip_reason,))
             return None
 
         element_type = record.get_xobis_element_type()
-        if element_type is None:
-            # @@@@@@@@@@@@@@@@@@@@@@@@@@@
-            # at this point these should all be 155 category dummy records
-            #   we want to skip, but maybe make this into a warning
-            #   just to make sure?
-            return None
-        elif element_type == HOLDINGS and record.get_holdings_type() is None:
-            # @@@@@@@@@@@@@@@@@@@@@@@@@@@
-            # skip component records (may erroneously skip others if
-            #   new/invalid loc codes added, so revisit this at some point)
-            return None
+        Diagnostics.set_record(record.get_control_number(), element_type)
 
         rb = RecordBuilder()
 
@@ -116,9 +139,6 @@ class RecordTransformer:
         # ---
         # institutional prefix + record type prefix + field 001 data
         record_control_no = record.get_control_number()
-        # @@@@@ TEMPORARY @@@@@@
-        if record_control_no is None:
-            return None
         rb.set_id_value(record_control_no)
 
         # ID STATUS
@@ -215,8 +235,67 @@ class RecordTransformer:
         for relationship in self.rlt.transform_relationships(record):
             rb.add_relationship(relationship)
 
+        Metrics.count('records_transformed', (element_type,))
         return rb.build()
 
+    # Subset titles by code, for transform_record_types
+    subset_906d_title_map = {
+        'AB'     : "Subset, Component, Alpha+Monograph Parents",
+        'AS'     : "Subset, Component, Alpha Parent",
+        'AS BDM' : "Subset, Component, Alpha Parent Batch",
+        'ASV'    : "Subset, Component, Alpha Parent Visual",
+        'CB'     : "Subset, Component, Classed Parents",
+        'CM'     : "Subset, Component, Classed Monograph Parent",
+        'CMV'    : "Subset, Component, Classed Parent Visual",
+        'CS'     : "Subset, Component, Classed Serial Parent",
+        'CU'     : "Subset, Component, Classed Unknown Parent",
+        'pubmed2marc' : "Subset, Component, pubmed2marc" }
+    subset_907a_title_map = {
+        'INC' : "Subset, Serial, Chiefly Articles",
+        'EXC' : "Subset, Serial, Chiefly Nonarticles",
+        'INR' : "Subset, Serial, Reference" }
+    subset_907a_default_title = "Subset, Serial, Pending"
+    subset_907b_title_map = {
+        'AA': "Subset, Analysis, Full",
+        'CA': "Subset, Analysis, Consider",
+        'DA': "Subset, Analysis, Do Not",
+        'PA': "Subset, Analysis, Partial",
+        'NA': "Subset, Analysis, Not Applicable" }
+    subset_907c_title_map = {
+        'SCN': "Subset, Classed Together",
+        'VCN': "Subset, Classed Separately" }
+    subset_907f_title_map = {
+        'aa': "Subset, Components, Complete/Ongoing",
+        'ab': "Subset, Components, Serial",
+        'pa': "Subset, Components, Selected Only",
+        'ca': "Subset, Components, Consider" }
+    subset_907x_title_map = {
+        'ceased':     "Subset, Acquisitions, Print Subscription Ceased",
+        'eceased':    "Subset, Acquisitions, Digital Subscription Ceased",
+        'changed':    "Subset, Acquisitions, Print Subscription Changed Title",
+        'echanged':   "Subset, Acquisitions, Digital Subscription Changed Title",
+        'current':    "Subset, Acquisitions, Print Subscription Current",
+        'ecurrent':   "Subset, Acquisitions, Digital Subscription Current",
+        'inactive':   "Subset, Acquisitions, Print Subscription Inactive",
+        'einactive':  "Subset, Acquisitions, Digital Subscription Inactive",
+        'individual': "Subset, Acquisitions, Print Subscription, Individual",
+        'edelayed':   "Subset, Acquisitions, Digital Subscription Delayed",
+        'eunknown':   "Subset, Acquisitions, Digital Subscription Unknown" }
+    subset_907y_title_map = {
+        'digicoop':  "Subset, Acquisitions Payment, Digital Acquired Cooperatively",
+        'digicopay': "Subset, Acquisitions Payment, Digital Acquired CoPay",
+        'sulcopay':  "Subset, Acquisitions Payment, Digital Acquired CoPay SUL",
+        'digifree':  "Subset, Acquisitions Payment, Digital Acquired Free",
+        'digisomcc': "Subset, Acquisitions Payment, Digital Acquired SOMCC Pays",
+        'digitrial': "Subset, Acquisitions Payment, Digital Acquired Trial",
+        'digipay':   "Subset, Acquisitions Payment, Digital Lane Pays",
+        'digipda':   "Subset, Acquisitions Payment, Digital Acquired Trial, Patron Driven Acquisition",
+        'digiq':     "Subset, Acquisitions Payment, Digital Question",
+        'prtfree':   "Subset, Acquisitions Payment, Print Acquired Free",
+        'prtpay':    "Subset, Acquisitions Payment, Print Acquired Lane Pays" }
+    subset_title_maps = (subset_906d_title_map, subset_907a_title_map, subset_907b_title_map,
+        subset_907c_title_map, subset_907f_title_map, subset_907x_title_map, subset_907y_title_map)
+
     def transform_record_types(self, record, rb):
         """
         For each field describing a Record Type (Subset) in record,
@@ -245,7 +324,7 @@ class RecordTransformer:
                 else:
                     title = f"Subset, New Resource {val[3:].strip()}"
                 rb.add_type(title = title,
-                            href  = Indexer.simple_lookup(title, CONCEPT),
+                            href  = Vocabulary.href(title, CONCEPT),
                             set_ref = self.subset_set_href)
 
         # 906 ^a/^d (+ sometimes ^c) to Subsets
@@ -256,28 +335,19 @@ class RecordTransformer:
                     val = "Alpha Parent Visual"
                 title = f"Subset, Component, {val}"
                 rb.add_type(title = title,
-                            href  = Indexer.simple_lookup(title, CONCEPT),
+                            href  = Vocabulary.href(title, CONCEPT),
                             set_ref = self.subset_set_href)
             for val in field.get_subfields('c'):
                 if val in ('LIB','REF'):
                     title = f"Subset, Component, {val}"
                     rb.add_type(title = title,
-                                href  = Indexer.simple_lookup(title, CONCEPT),
+                                href  = Vocabulary.href(title, CONCEPT),
                                 set_ref = self.subset_set_href)
             for val in field.get_subfields('d'):
-                title = {'AB'     : "Subset, Component, Alpha+Monograph Parents",
-                         'AS'     : "Subset, Component, Alpha Parent",
-                         'AS BDM' : "Subset, Component, Alpha Parent Batch",
-                         'ASV'    : "Subset, Component, Alpha Parent Visual",
-                         'CB'     : "Subset, Component, Classed Parents",
-                         'CM'     : "Subset, Component, Classed Monograph Parent",
-                         'CMV'    : "Subset, Component, Classed Parent Visual",
-                         'CS'     : "Subset, Component, Classed Serial Parent",
-                         'CU'     : "Subset, Component, Classed Unknown Parent",
-                         'pubmed2marc' : "Subset, Component, pubmed2marc" }.get(val)
+                title = self.subset_906d_title_map.get(val)
                 assert title is not None, f"{record.get_control_number()}: invalid 906 $d: {field}"
                 rb.add_type(title = title,
-                            href  = Indexer.simple_lookup(title, CONCEPT),
+                            href  = Vocabulary.href(title, CONCEPT),
                             set_ref = self.subset_set_href)
 
         # hdg 907 to Subsets
@@ -288,80 +358,50 @@ class RecordTransformer:
                     if val == '???':
                         continue
                     val = val.strip(" ;:.,'/").upper()
-                    title = {'INC' : "Subset, Serial, Chiefly Articles",
-                             'EXC' : "Subset, Serial, Chiefly Nonarticles",
-                             'INR' : "Subset, Serial, Reference"}.get(val, "Subset, Serial, Pending")
+                    title = self.subset_907a_title_map.get(val, self.subset_907a_default_title)
                     rb.add_type(title = title,
-                                href  = Indexer.simple_lookup(title, CONCEPT),
+                                href  = Vocabulary.href(title, CONCEPT),
                                 set_ref = self.subset_set_href)
                 # b  Analysis treatment (AA CA DA PA NA) (NR)
                 for val in field.get_subfields('b'):
                     # values should be cleaned up already from preprocessing
-                    title = {'AA': "Subset, Analysis, Full",
-                             'CA': "Subset, Analysis, Consider",
-                             'DA': "Subset, Analysis, Do Not",
-                             'PA': "Subset, Analysis, Partial",
-                             'NA': "Subset, Analysis, Not Applicable"}.get(val)
+                    title = self.subset_907b_title_map.get(val)
                     assert title is not None, \
                         f"{record.get_control_number()}: problem parsing 907 $b: {field}"
                     rb.add_type(title = title,
-                                href  = Indexer.simple_lookup(title, CONCEPT),
+                                href  = Vocabulary.href(title, CONCEPT),
                                 set_ref = self.subset_set_href)
                 # c  Classification/shelving pattern (PER EPER SCN VCN MST N/A) (NR)
                 for val in field.get_subfields('c'):
                     val = val.strip(" ;:.,'/").upper()
-                    title = {'SCN': "Subset, Classed Together",
-                             'VCN': "Subset, Classed Separately"}.get(val)
+                    title = self.subset_907c_title_map.get(val)
                     if title is not None:
                         rb.add_type(title = title,
-                                    href  = Indexer.simple_lookup(title, CONCEPT),
+                                    href  = Vocabulary.href(title, CONCEPT),
                                     set_ref = self.subset_set_href)
                 # f  Component parts indicator (aa, aa selected, ca) (NR)
                 for val in field.get_subfields('f'):
                     val = val.strip(" ;:.,'/").lower()
-                    title = {'aa': "Subset, Components, Complete/Ongoing",
-                             'ab': "Subset, Components, Serial",
-                             'pa': "Subset, Components, Selected Only",
-                             'ca': "Subset, Components, Consider"}.get(val)
+                    title = self.subset_907f_title_map.get(val)
                     if title is not None:
                         rb.add_type(title = title,
-                                    href  = Indexer.simple_lookup(title, CONCEPT),
+                                    href  = Vocabulary.href(title, CONCEPT),
                                     set_ref = self.subset_set_href)
                 # x  Subscription Status (Current, eCurrent, Ceased, On Order, etc.) (NR)
                 for val in field.get_subfields('x'):
                     val = val.strip(" ;:.,'/").lower()
-                    title = {'ceased':     "Subset, Acquisitions, Print Subscription Ceased",
-                             'eceased':    "Subset, Acquisitions, Digital Subscription Ceased",
-                             'changed':    "Subset, Acquisitions, Print Subscription Changed Title",
-                             'echanged':   "Subset, Acquisitions, Digital Subscription Changed Title",
-                             'current':    "Subset, Acquisitions, Print Subscription Current",
-                             'ecurrent':   "Subset, Acquisitions, Digital Subscription Current",
-                             'inactive':   "Subset, Acquisitions, Print Subscription Inactive",
-                             'einactive':  "Subset, Acquisitions, Digital Subscription Inactive",
-                             'individual': "Subset, Acquisitions, Print Subscription, Individual",
-                             'edelayed':   "Subset, Acquisitions, Digital Subscription Delayed",
-                             'eunknown':   "Subset, Acquisitions, Digital Subscription Unknown"}.get(val)
+                    title = self.subset_907x_title_map.get(val)
                     if title is not None:
                         rb.add_type(title = title,
-                                    href  = Indexer.simple_lookup(title, CONCEPT),
+                                    href  = Vocabulary.href(title, CONCEPT),
                                     set_ref = self.subset_set_href)
                 # y  Payment Type (DigiPay, DigiCopay, DigiCoop, DigiFree, PrtPay, PrtFree) (NR)
                 for val in field.get_subfields('y'):
                     val = val.strip(" ;:.,'/").lower()
-                    title = {'digicoop':  "Subset, Acquisitions Payment, Digital Acquired Cooperatively",
-                             'digicopay': "Subset, Acquisitions Payment, Digital Acquired CoPay",
-                             'sulcopay':  "Subset, Acquisitions Payment, Digital Acquired CoPay SUL",
-                             'digifree':  "Subset, Acquisitions Payment, Digital Acquired Free",
-                             'digisomcc': "Subset, Acquisitions Payment, Digital Acquired SOMCC Pays",
-                             'digitrial': "Subset, Acquisitions Payment, Digital Acquired Trial",
-                             'digipay':   "Subset, Acquisitions Payment, Digital Lane Pays",
-                             'digipda':   "Subset, Acquisitions Payment, Digital Acquired Trial, Patron Driven Acquisition",
-                             'digiq':     "Subset, Acquisitions Payment, Digital Question",
-                             'prtfree':   "Subset, Acquisitions Payment, Print Acquired Free",
-                             'prtpay':    "Subset, Acquisitions Payment, Print Acquired Lane Pays"}.get(val)
+                    title = self.subset_907y_title_map.get(val)
                     if title is not None:
                         rb.add_type(title = title,
-                                    href  = Indexer.simple_lookup(title, CONCEPT),
+                                    href  = Vocabulary.href(title, CONCEPT),
                                     set_ref = self.subset_set_href)
 
 
@@ -416,7 +456,7 @@ class RecordTransformer:
         for field in record.get_fields('915'):
             subf_as, subf_es = field.get_subfields('a'), field.get_subfields('e')
             if len(subf_as) != 1 or len(subf_es) != 1:
-                logger.warning(f"{record.get_control_number()}: invalid 915: {field}")
+                Diagnostics.report("invalid field", field.tag, field)
                 continue
             timestamp, action_type = subf_as[0], subf_es[0]
             time_ref = DateTimeParser.parse_as_ref(timestamp)
@@ -434,7 +474,7 @@ class RecordTransformer:
         for action_type, action_time_or_duration_ref in actions:
             rb.add_action(action_time_or_duration_ref,
                           title = action_type,
-                          href  = Indexer.simple_lookup(action_type, RELATIONSHIP),
+                          href  = Vocabulary.href(action_type, RELATIONSHIP),
                           set_ref = self.action_type_set_href)
 
 
@@ -478,16 +518,16 @@ class RecordTransformer:
             being_class = 'referential'
         elif broad_category == 'Peoples':
             if record['100'].indicator1 != '9':
-                logger.warning(f"{self.get_control_number()}: Peoples without I1=9")
+                Diagnostics.report("Peoples without I1=9", '100')
             else:
                 being_class = 'collective'
         elif broad_category == 'Persons, Families or Groups':
             if record['100'].indicator1 != '3':
-                logger.warning(f"{self.get_control_number()}: Family/Group without I1=3")
+                Diagnostics.report("Family/Group without I1=3", '100')
             being_class = 'familial'
         else:
             if record['100'].indicator1 not in '01':
-                logger.warning(f"{self.get_control_number()}: Individual without I1=[01]")
+                Diagnostics.report("Individual without I1=[01]", '100')
             being_class = 'individual'
 
         bb.set_class(being_class)
@@ -939,6 +979,11 @@ class RecordTransformer:
         return ob
 
 
+    holdings_type_concept_name_map = {
+        LaneMARCRecord.PHYSICAL  : "Physical Resources",
+        LaneMARCRecord.DIGITAL   : "Internet Resources",
+        LaneMARCRecord.COMPONENT : "Components" }
+
     def init_holdings_builder(self, record):
         hb = HoldingsBuilder()
 
@@ -969,10 +1014,8 @@ class RecordTransformer:
         # i.e. digital/physical
         holdings_type = record.get_holdings_type()
         assert holdings_type is not None, f"{record.get_control_number()}: invalid holdings type"
-        holdings_type_concept_name = { LaneMARCRecord.PHYSICAL  : "Physical Resources",
-                                       LaneMARCRecord.DIGITAL   : "Internet Resources",
-                                       LaneMARCRecord.COMPONENT : "Components" }.get(holdings_type)
-        concept_ref = tfcm.build_simple_ref(holdings_type_concept_name, CONCEPT)
+        holdings_type_concept_name = self.holdings_type_concept_name_map.get(holdings_type)
+        concept_ref = Vocabulary.ref(holdings_type_concept_name, CONCEPT)
         hb.set_concept_ref(concept_ref)
 
         # QUALIFIER(S)
@@ -1010,11 +1053,11 @@ class RecordTransformer:
             summary_enum, summary_chron = None, None
             if 'v' in record_summary_field:
                 if len(record_summary_field.get_subfields('v')) > 1:
-                    logger.warning(f"{record.get_control_number()}: >1 866v")
+                    Diagnostics.report(">1 $v", '866')
                 summary_enum = record_summary_field['v']
             if 'y' in record_summary_field:
                 if len(record_summary_field.get_subfields('y')) > 1:
-                    logger.warning(f"{record.get_control_number()}: >1 866y")
+                    Diagnostics.report(">1 $y", '866')
                 summary_chron = record_summary_field['y']
             hb.set_summary(summary_enum, summary_chron)
             for code, val in record_summary_field.get_subfields('x','z', with_codes=True):
@@ -1024,6 +1067,12 @@ class RecordTransformer:
         return hb
 
 
+    # names of standard identifier sources given as refs, for transform_id_alternates
+    id_description_ref_names = {
+        ORGANIZATION : ("International DOI Foundation", "ORCID Initiative", "Stanford University",
+                        "United States Social Security Administration"),
+        WORK_INST    : ("PubMed", "LaneConnex", "Bassett collection of stereoscopic images of human anatomy") }
+
     def transform_id_alternates(self, record, rb):
         # 010  Library of Congress Control Number (NR)
         for field in record.get_fields('010'):
@@ -1075,7 +1124,7 @@ class RecordTransformer:
             if field.indicator1 == '7':
                 id_source = field['2'] if '2' in field else 'unknown'
                 if id_source.strip().lower() == 'doi':
-                    id_description = tfcm.build_simple_ref("International DOI Foundation", ORGANIZATION)
+                    id_description = Vocabulary.ref("International DOI Foundation", ORGANIZATION)
                 else:
                     id_description = f"Standard identifier; source: {id_source}"
             else:
@@ -1151,17 +1200,17 @@ class RecordTransformer:
                     elif val_lower.startswith("(ocolc)"):
                         id_desc = self.oclc_org_ref
                     elif val_lower.startswith("(pmid)"):
-                        id_desc = tfcm.build_simple_ref("PubMed", WORK_INST)
+                        id_desc = Vocabulary.ref("PubMed", WORK_INST)
                     elif val_lower.startswith("(orcid)"):
-                        id_desc = tfcm.build_simple_ref("ORCID Initiative", ORGANIZATION)
+                        id_desc = Vocabulary.ref("ORCID Initiative", ORGANIZATION)
                     elif val_lower.startswith("(stanf)"):
-                        id_desc = tfcm.build_simple_ref("Stanford University", ORGANIZATION)
+                        id_desc = Vocabulary.ref("Stanford University", ORGANIZATION)
                     elif val_lower.startswith("(ssn)"):
-                        id_desc = tfcm.build_simple_ref("United States Social Security Administration", ORGANIZATION)
+                        id_desc = Vocabulary.ref("United States Social Security Administration", ORGANIZATION)
                     elif val_lower.startswith("(laneconnex)"):
-                        id_desc = tfcm.build_simple_ref("LaneConnex", WORK_INST)
+                        id_desc = Vocabulary.ref("LaneConnex", WORK_INST)
                     elif val_lower.startswith("(bassett)"):
-                        id_desc = tfcm.build_simple_ref("Bassett collection of stereoscopic images of human anatomy", WORK_INST)
+                        id_desc = Vocabulary.ref("Bassett collection of stereoscopic images of human anatomy", WORK_INST)
                     elif val_lower.startswith("(geonameid)"):
                         id_desc = "GeoNames"
                     elif val_lower.startswith("(isni)"):
@@ -1370,7 +1419,7 @@ class RecordTransformer:
             codes = ''.join(field.subfields[::2])
             if any(code not in 'abc' for code in codes):
                 # warn of invalid code and ignore this field
-                logger.warning(f"{record.get_control_number()}: field contains invalid subfield: {field}")
+                Diagnostics.report("field contains invalid subfield", field.tag, field)
                 continue
 
             record.remove_field(field)
@@ -1481,7 +1530,7 @@ class RecordTransformer:
             # ^6 130, 630, 730, 740, 830 --> note on relationship; deal with this during bib rel transform for those fields
             # but log a warning here if there are multiple candidates
             if linked_field_tag in ('130','630','730','740','830') and len(record.get_fields(linked_field_tag)) > 1:
-                logger.warning(f"{record.get_control_number()}: multiple candidates for 880 with linked tag {linked_field_tag}")
+                Diagnostics.report("multiple candidates for 880 with linked tag", linked_field_tag, field)
 
         return record
 
@@ -1544,7 +1593,7 @@ class RecordTransformer:
                     record.remove_field(field_901)
                 else:
                     # if no match to a single 830, keep the 901 to transform to a record-level note
-                    logger.warning(f"{record.get_control_number()}: no 830 match for 901, default to Series Note: {field_901}")
+                    Diagnostics.report("no 830 match for 901, default to Series Note", '901', field_901)
 
 
     @staticmethod
@@ -1,12 +1,14 @@
 #!/usr/bin/python3
 # -*- coding: UTF-8 -*-
 
+from types import MethodType
+
 from pymarc import Field
 
 from pylmldb import LaneMARCRecord
 from pylmldb.xobis_constants import *
 
-from ..builders import ConceptRefBuilder
+from ..builders import ConceptRefBuilder, RelationshipBuilder
 
 from . import tf_common_methods as tfcm
 
@@ -41,10 +43,119 @@ class RelationshipTransformer:
         return self.reltaut.transform_relationships(record)
 
     def get_relation_type(self, rel_name):
-        rel_types = Indexer.lookup_rel_types(rel_name)
-        if len(rel_types) == 1:
-            return rel_types[0].lower()
-        return None
+        return Indexer.lookup_rel_type(rel_name)
+
+    def compile_field_map(self, field_map, transformer):
+        """
+        Prepare a declarative relationship field map (a sequence of rule dicts,
+        in output order) for use with transform_mapped_relationships.
+
+        Each rule has 'tags', and either a 'handler' function taking
+        (transformer, record, fields), or any of these for a generic mapping:
+            relator      : subfield code holding relationship names (default: none)
+            default      : relationship name if no relator subfields
+            strip        : whether to rstrip ': ' from names (default: True)
+            condition    : function of field; fields failing it are skipped
+            degree       : string, dict by I1, or function of field
+            enumeration  : whether to extract enumeration from field
+            chronology   : whether to extract chronology from field
+            element_type : element type of target
+            notes        : dict of subfield code --> note role
+            linked_880_notes : whether to add linked 880s as notes
+
+        Returns a map of tag --> rule index, and the list of rules
+        with handlers bound to transformer.
+        """
+        rules = []
+        for rule in field_map:
+            if 'handler' in rule:
+                rule = dict(rule, handler=MethodType(rule['handler'], transformer))
+            rules.append(rule)
+        tag_map = { tag : i for i, rule in enumerate(rules) for tag in rule['tags'] }
+        return tag_map, rules
+
+    def transform_mapped_relationships(self, record, tag_map, rules):
+        """
+        Build Relationships for all fields of record covered by a field map
+        compiled with compile_field_map, in a single pass over the record.
+
+        Relationships are returned grouped by rule, in field map order
+        (and within each rule, in record order).
+        """
+        fields_by_rule = [[] for rule in rules]
+        for field in record.get_fields(*tag_map):
+            fields_by_rule[tag_map[field.tag]].append(field)
+        relationships = []
+        for rule, fields in zip(rules, fields_by_rule):
+            if not fields:
+                continue
+            if 'handler' in rule:
+                relationships.extend(rule['handler'](record, fields))
+                continue
+            condition = rule.get('condition')
+            for field in fields:
+                if condition is None or condition(field):
+                    relationships.extend(self.build_mapped_relationships(record, field, rule))
+        return relationships
+
+    def build_mapped_relationships(self, record, field, rule):
+        """
+        Build one Relationship per relationship name in field,
+        according to a generic field map rule.
+        """
+        relator = rule.get('relator')
+        rel_names = (relator and field.get_subfields(relator)) or [rule['default']]
+        strip = rule.get('strip', True)
+
+        # Degree
+        degree = rule.get('degree')
+        if isinstance(degree, dict):
+            degree = degree.get(field.indicator1)
+        elif callable(degree):
+            degree = degree(field)
+
+        # Enumeration / Chronology / Target: same for all names in field
+        enumeration = self.extract_enumeration(field) if rule.get('enumeration') else None
+        time_or_duration_ref = tfcm.get_field_chronology(field) if rule.get('chronology') else None
+        target_ref = self.build_ref_from_field(field, rule['element_type'])
+
+        note_roles = rule.get('notes')
+        relationships = []
+        for rel_name in rel_names:
+            rb = RelationshipBuilder()
+
+            # Name/Type
+            if strip:
+                rel_name = rel_name.rstrip(': ')
+            rb.set_name(rel_name)
+            rb.set_type(self.get_relation_type(rel_name))
+
+            rb.set_degree(degree)
+            rb.set_enumeration(enumeration)
+            rb.set_time_or_duration_ref(time_or_duration_ref)
+            rb.set_target(target_ref)
+
+            # Notes
+            if note_roles:
+                for code, val in field.get_subfields(*note_roles, with_codes=True):
+                    rb.add_note(val,
+                                role = note_roles[code])
+            if rule.get('linked_880_notes'):
+                self.add_linked_880s_as_notes(record, field.tag, rb)
+
+            relationships.append(rb.build())
+        return relationships
+
+    def add_linked_880s_as_notes(self, record, tag, rb):
+        """
+        Add any 880s linked (by ^6) to fields with the given tag
+        as notes on RelationshipBuilder rb.
+        """
+        # ^6 130, 630, 730, 740, 830 --> note on relationship
+        for field_880 in record.get_fields('880'):
+            if '6' in field_880 and field_880['6'][:3] == tag:
+                rb.add_note(tfcm.concat_subfs(field_880),
+                            role = "transcription")
 
     def build_ref_from_field(self, field, element_type):
         """
@@ -23,6 +23,8 @@ class RelationshipTransformerAut:
         self.get_relation_type = rlt.get_relation_type
         self.build_ref_from_field = rlt.build_ref_from_field
         self.extract_enumeration = rlt.extract_enumeration
+        self.transform_mapped_relationships = rlt.transform_mapped_relationships
+        self.field_map_tags, self.field_map_rules = rlt.compile_field_map(self.RELATIONSHIP_FIELD_MAP, self)
 
 
     def transform_relationships(self, record):
@@ -33,205 +35,16 @@ class RelationshipTransformerAut:
 
         Returns a list of zero or more Relationship objects.
         """
+        return self.transform_mapped_relationships(record, self.field_map_tags, self.field_map_rules)
 
-        relationships = []
-
-        ...
-        ...
-        ...
-        ...
-        ...
-        ...
-        ...
-        ...
-        ...
-
-        # See Also From Reference, Personal Name (R) / Related Subject, Personal Name (Lane) (R)
-        for field in record.get_fields('500','600'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Related"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-                # Enumeration: n/a
-
-                # Chronology
-                rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, BEING))
-
-                # Notes:
-                for val in field.get_subfields('j'):
-                    rb.add_note(val,
-                                content_lang = None,
-                                role = "annotation")
-
-                relationships.append(rb.build())
-
-        # See Also From Reference, Organization Name (R) / Related Subject, Organization Name (Lane) (R)
-        for field in record.get_fields('510','610'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Related"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-                # Enumeration: n/a
-
-                # Chronology
-                rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, ORGANIZATION))
-
-                # Notes:
-                for val in field.get_subfields('j'):
-                    rb.add_note(val,
-                                content_lang = None,
-                                role = "annotation")
-
-                relationships.append(rb.build())
-
-        # See Also From Reference, Event Name (R) / Related Subject, Event Name (Lane) (R)
-        for field in record.get_fields('511','611'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('i') or ["Related"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-                # Enumeration: n/a
-
-                # Chronology
-                rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, EVENT))
-
-                # Notes
-                for val in field.get_subfields('j'):
-                    rb.add_note(val,
-                                content_lang = None,
-                                role = "annotation")
-
-                relationships.append(rb.build())
-
-        # See Also From Reference, Uniform Title (R) (Lane) / Related Subject, Uniform Title (Lane) (R)
-        for field in record.get_fields('530','630'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Related"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-                # Enumeration: n/a
-                # Chronology: n/a
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, WORK_AUT))
-
-                # Notes:
-                for val in field.get_subfields('j'):
-                    rb.add_note(val,
-                                content_lang = None,
-                                role = "annotation")
-
-                relationships.append(rb.build())
 
+    def __transform_550(self, record, fields):
         # See Also From Reference, Topical/Language/Time Term (R)
-        for field in record.get_fields('550'):
+        relationships = []
+        for field in fields:
             # if no ^a, field will be treated as a record-level Note instead
-            if 'a' in field:
-                # Relationship Name(s)
-                rel_names = field.get_subfields('e') or ["Related"]
-                for rel_name in rel_names:
-                    rb = RelationshipBuilder()
-
-                    # Name/Type
-                    rel_name = rel_name.rstrip(': ')
-                    rb.set_name(rel_name)
-                    rb.set_type(self.get_relation_type(rel_name))
-
-                    # Degree: n/a
-                    # Enumeration: n/a
-
-                    # Chronology
-                    rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                    # Target
-                    target_element_type = Indexer.simple_element_type_from_value(field['a'])
-
-                    if target_element_type == TIME:
-                        # ^x is the second part of a Duration
-                        datetime_str, end_datetime_str = field['a'], field['x']
-                        if end_datetime_str:
-                            datetime_str = datetime_str.rstrip('-') + '-' + end_datetime_str
-                        target_ref = DateTimeParser.parse_as_ref(datetime_str, None)
-                    else:
-                        if target_element_type != LANGUAGE:
-                            target_element_type = CONCEPT
-                        target_ref = self.build_ref_from_field(field, target_element_type)
-                    rb.set_target(target_ref)
-
-                    # Notes: n/a
-
-                    relationships.append(rb.build())
-
-        # See Also From Reference, Geographic Name (R)
-        for field in record.get_fields('551'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Related"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-
-                # Enumeration
-                rb.set_enumeration(self.extract_enumeration(field))
-
-                # Chronology
-                rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, PLACE))
-
-                # Notes
-                for val in field.get_subfields('2'):
-                    rb.add_note(val,
-                                content_lang = None,
-                                role = "annotation")
-
-                relationships.append(rb.build())
-
-        # See Also From Reference, Category (Form/Genre) Term (R)
-        for field in record.get_fields('555'):
+            if 'a' not in field:
+                continue
             # Relationship Name(s)
             rel_names = field.get_subfields('e') or ["Related"]
             for rel_name in rel_names:
@@ -249,41 +62,30 @@ class RelationshipTransformerAut:
                 rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
 
                 # Target
-                rb.set_target(self.build_ref_from_field(field, CONCEPT))
-
-                # Notes
-                for val in field.get_subfields('2'):
-                    rb.add_note(val,
-                                content_lang = None,
-                                role = "annotation")
-
-                relationships.append(rb.build())
-
-        # See Also From Reference, General Qualifier (R)
-        for field in record.get_fields('580'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Related"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
+                target_element_type = Indexer.simple_element_type_from_value(field['a'])
 
-                # Degree: n/a
-                # Enumeration: n/a
-                # Chronology: n/a
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, CONCEPT))
+                if target_element_type == TIME:
+                    # ^x is the second part of a Duration
+                    datetime_str, end_datetime_str = field['a'], field['x']
+                    if end_datetime_str:
+                        datetime_str = datetime_str.rstrip('-') + '-' + end_datetime_str
+                    target_ref = DateTimeParser.parse_as_ref(datetime_str, None)
+                else:
+                    if target_element_type != LANGUAGE:
+                        target_element_type = CONCEPT
+                    target_ref = self.build_ref_from_field(field, target_element_type)
+                rb.set_target(target_ref)
 
                 # Notes: n/a
 
                 relationships.append(rb.build())
+        return relationships
+
 
+    def __transform_582(self, record, fields):
         # See Also From Reference, Textword (Lane defined) (R)
-        for field in record.get_fields('582'):
+        relationships = []
+        for field in fields:
             # Relationship Name(s)
             rel_names = field.get_subfields('e') or ["Related"]
             for rel_name in rel_names:
@@ -309,9 +111,13 @@ class RelationshipTransformerAut:
                 # Notes: n/a
 
                 relationships.append(rb.build())
+        return relationships
+
 
+    def __transform_650(self, record, fields):
         # Topical/Language/Time Entry (Lane) (R)
-        for field in record.get_fields('650'):
+        relationships = []
+        for field in fields:
             # Relationship Name(s)
             rel_names = field.get_subfields('e') or ["Related"]
             for rel_name in rel_names:
@@ -358,108 +164,13 @@ class RelationshipTransformerAut:
                                 role = "annotation")
 
                 relationships.append(rb.build())
+        return relationships
 
-        # Geographic Entry (Lane) (R)
-        for field in record.get_fields('651'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Related"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree
-                rb.set_degree({'1': 'primary',
-                               '2': 'secondary'}.get(field.indicator1))
-
-                # Enumeration
-                rb.set_enumeration(self.extract_enumeration(field))
-
-                # Chronology
-                rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, PLACE))
-
-                # Notes
-                for val in field.get_subfields('j'):
-                    rb.add_note(val,
-                                content_lang = None,
-                                role = "annotation")
-
-                relationships.append(rb.build())
-
-        # Category Entry (Lane) (R)
-        for field in record.get_fields('655'):
-            if field.indicator1 in '124':
-                # Relationship Name(s)
-                rel_names = field.get_subfields('e') or ["Category"]
-                for rel_name in rel_names:
-                    rb = RelationshipBuilder()
-
-                    # Name/Type
-                    rel_name = rel_name.rstrip(': ')
-                    rb.set_name(rel_name)
-                    rb.set_type(self.get_relation_type(rel_name))
-
-                    # Degree
-                    rb.set_degree({'1': 'primary',
-                                   '2': 'secondary',
-                                   '4': 'broad'}.get(field.indicator1))
-
-                    # Enumeration: n/a
-                    # Chronology
-                    rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                    # Target
-                    rb.set_target(self.build_ref_from_field(field, CONCEPT))
-
-                    # Notes
-                    for val in field.get_subfields('j'):
-                        rb.add_note(val,
-                                    content_lang = None,
-                                    role = "annotation")
-
-                    relationships.append(rb.build())
-
-        ...
-        ...
-        ...
-        ...
-        ...
-        ...
-        ...
-        ...
-        ...
-
-        # External Relationship Entry (Lane: to PubMed, e.g.) (R)
-        for field in record.get_fields('789'):
-            rel_names = field.get_subfields('e') or ["Related title:"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-
-                # Enumeration: n/a
-                # Chronology
-                rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, WORK_INST))
-
-                # Notes: n/a
-
-                relationships.append(rb.build())
 
+    def __transform_856(self, record, fields):
         # Electronic Location and Access (Lane: use MFHD) (R)
-        for field in record.get_fields('856'):
+        relationships = []
+        for field in fields:
             # only those marked as "related resource" and not the resource itself
             if field.indicator2 != '2':
                 continue
@@ -503,9 +214,13 @@ class RelationshipTransformerAut:
             rb.set_target(wrb.build())
 
             relationships.append(rb.build())
+        return relationships
 
+
+    def __transform_925(self, record, fields):
         # Allowable Subheadings (Lane: MeSH only when 450 $w/3 = a) (R)
-        for field in record.get_fields('925'):
+        relationships = []
+        for field in fields:
             rb = RelationshipBuilder()
 
             # Name/Type
@@ -527,8 +242,90 @@ class RelationshipTransformerAut:
                         content_lang = None,
                         role = "annotation")
 
-
             relationships.append(rb.build())
+        return relationships
 
 
-        return relationships
+    # Relationship fields, in order of output.
+    # See RelationshipTransformer.compile_field_map for rule format.
+    RELATIONSHIP_FIELD_MAP = (
+        # See Also From Reference, Personal Name (R) / Related Subject, Personal Name (Lane) (R)
+        { 'tags' : ('500','600'),
+          'relator' : 'e', 'default' : "Related",
+          'chronology' : True,
+          'element_type' : BEING,
+          'notes' : {'j': "annotation"} },
+        # See Also From Reference, Organization Name (R) / Related Subject, Organization Name (Lane) (R)
+        { 'tags' : ('510','610'),
+          'relator' : 'e', 'default' : "Related",
+          'chronology' : True,
+          'element_type' : ORGANIZATION,
+          'notes' : {'j': "annotation"} },
+        # See Also From Reference, Event Name (R) / Related Subject, Event Name (Lane) (R)
+        { 'tags' : ('511','611'),
+          'relator' : 'i', 'default' : "Related",
+          'chronology' : True,
+          'element_type' : EVENT,
+          'notes' : {'j': "annotation"} },
+        # See Also From Reference, Uniform Title (R) (Lane) / Related Subject, Uniform Title (Lane) (R)
+        { 'tags' : ('530','630'),
+          'relator' : 'e', 'default' : "Related",
+          'element_type' : WORK_AUT,
+          'notes' : {'j': "annotation"} },
+        # See Also From Reference, Topical/Language/Time Term (R)
+        { 'tags' : ('550',),
+          'handler' : __transform_550 },
+        # See Also From Reference, Geographic Name (R)
+        { 'tags' : ('551',),
+          'relator' : 'e', 'default' : "Related",
+          'enumeration' : True,
+          'chronology' : True,
+          'element_type' : PLACE,
+          'notes' : {'2': "annotation"} },
+        # See Also From Reference, Category (Form/Genre) Term (R)
+        { 'tags' : ('555',),
+          'relator' : 'e', 'default' : "Related",
+          'chronology' : True,
+          'element_type' : CONCEPT,
+          'notes' : {'2': "annotation"} },
+        # See Also From Reference, General Qualifier (R)
+        { 'tags' : ('580',),
+          'relator' : 'e', 'default' : "Related",
+          'element_type' : CONCEPT },
+        # See Also From Reference, Textword (Lane defined) (R)
+        { 'tags' : ('582',),
+          'handler' : __transform_582 },
+        # Topical/Language/Time Entry (Lane) (R)
+        { 'tags' : ('650',),
+          'handler' : __transform_650 },
+        # Geographic Entry (Lane) (R)
+        { 'tags' : ('651',),
+          'relator' : 'e', 'default' : "Related",
+          'degree' : {'1': 'primary',
+                      '2': 'secondary'},
+          'enumeration' : True,
+          'chronology' : True,
+          'element_type' : PLACE,
+          'notes' : {'j': "annotation"} },
+        # Category Entry (Lane) (R)
+        { 'tags' : ('655',),
+          'condition' : lambda field: field.indicator1 in '124',
+          'relator' : 'e', 'default' : "Category",
+          'degree' : {'1': 'primary',
+                      '2': 'secondary',
+                      '4': 'broad'},
+          'chronology' : True,
+          'element_type' : CONCEPT,
+          'notes' : {'j': "annotation"} },
+        # External Relationship Entry (Lane: to PubMed, e.g.) (R)
+        { 'tags' : ('789',),
+          'relator' : 'e', 'default' : "Related title:", 'strip' : False,
+          'chronology' : True,
+          'element_type' : WORK_INST },
+        # Electronic Location and Access (Lane: use MFHD) (R)
+        { 'tags' : ('856',),
+          'handler' : __transform_856 },
+        # Allowable Subheadings (Lane: MeSH only when 450 $w/3 = a) (R)
+        { 'tags' : ('925',),
+          'handler' : __transform_925 },
+    )
@@ -13,6 +13,8 @@ from ..builders import RelationshipBuilder
 from . import tf_common_methods as tfcm
 
 from .Indexer import Indexer
+from .Vocabulary import Vocabulary
+from .Diagnostics import Diagnostics
 from .DateTimeParser import DateTimeParser as dp
 
 
@@ -26,6 +28,11 @@ class RelationshipTransformerBib:
         self.get_relation_type = rlt.get_relation_type
         self.build_ref_from_field = rlt.build_ref_from_field
         self.extract_enumeration = rlt.extract_enumeration
+        self.add_linked_880s_as_notes = rlt.add_linked_880s_as_notes
+        self.transform_mapped_relationships = rlt.transform_mapped_relationships
+        self.field_map_tags, self.field_map_rules = rlt.compile_field_map(self.RELATIONSHIP_FIELD_MAP, self)
+        # resolve fixed vocabulary up front
+        Vocabulary.register(CONCEPT, ["Note Types", "Series Note", "Abbreviated title", "Uniform title"])
 
     def transform_relationships(self, record):
         """
@@ -35,15 +42,13 @@ class RelationshipTransformerBib:
 
         Returns a list of zero or more Relationship objects.
         """
+        return self.transform_mapped_relationships(record, self.field_map_tags, self.field_map_rules)
 
-        relationships = []
-
-        # for field in record.get_fields(*RELATIONSHIP_FIELDS_BIB):
-        # Doing this as one large query then using a switch conditional
-        # is a way to retain original order.
 
+    def __transform_041(self, record, fields):
         # Language Code (NR)
-        for field in record.get_fields('041'):
+        relationships = []
+        for field in fields:
             for code, val in field.get_subfields('a','b','d','e','f','g', with_codes=True):
                 rb = RelationshipBuilder()
 
@@ -73,9 +78,13 @@ class RelationshipTransformerBib:
                 # Notes: n/a
 
                 relationships.append(rb.build())
+        return relationships
+
 
+    def __transform_100(self, record, fields):
         # Personal Name, Main Entry (NR)
-        for field in record.get_fields('100'):
+        relationships = []
+        for field in fields:
             # Relationship Name(s)
             rel_names = field.get_subfields('e')
             if not rel_names:
@@ -110,71 +119,34 @@ class RelationshipTransformerBib:
                                 role = "transcription")
 
                 relationships.append(rb.build())
+        return relationships
 
-        # Organization Name, Main Entry (NR)
-        for field in record.get_fields('110'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Related"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree
-                rb.set_degree('primary')
-
-                # Enumeration
-                rb.set_enumeration(self.extract_enumeration(field))
-
-                # Chronology: n/a
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, ORGANIZATION))
 
-                # Notes
-                for code, val in field.get_subfields('j','u','v','z', with_codes=True):
-                    rb.add_note(val,
-                                role = "transcription" if code != 'j' else "annotation")
+    def __transform_263(self, record, fields):
+        # Projected Publication Date (NR)
+        relationships = []
+        for field in fields:
+            for val in field.get_subfields('a'):
+                if not val.isdigit():
+                    continue
 
-                relationships.append(rb.build())
+                val_normalized = None
+                if len(val) == 4:  # YYMM
+                    yy, mm = val[:2], val[2:]
+                    val_normalized = f"19{yy}-{mm}" if int(yy) >= 80 else f"20{yy}-{mm}"
+                elif len(val) == 6:  # YYYYMM
+                    val_normalized = f"{val[:4]}-{val[4:]}"
+                elif len(val) == 8:  # YYYYMMDD
+                    val_normalized = f"{val[:4]}-{val[4:6]}-{val[6:]}"
+                if not val_normalized:
+                    continue
 
-        # Event Name, Main Entry (NR) / Added Entry (R)
-        for field in record.get_fields('111','711'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('j') or ["Related"]
-            for rel_name in rel_names:
                 rb = RelationshipBuilder()
 
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree
-                rb.set_degree('primary' if field.tag.startswith('1') else 'secondary')
-
-                # Enumeration
-                rb.set_enumeration(self.extract_enumeration(field))
-
-                # Chronology: n/a
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, EVENT))
-
-                # Notes: n/a
-
-                relationships.append(rb.build())
-
-        # Uniform Title, Main Entry (NR)
-        for field in record.get_fields('130'):
-            if 'w' in field:  # if not, these are only treated as variants
-                rb = RelationshipBuilder()
+                # Relationship Name
+                rel_name = "Projected publication date"
 
                 # Name/Type
-                rel_name = "Realization of"
                 rb.set_name(rel_name)
                 rb.set_type(self.get_relation_type(rel_name))
 
@@ -183,52 +155,18 @@ class RelationshipTransformerBib:
                 # Chronology: n/a
 
                 # Target
-                rb.set_target(self.build_ref_from_field(field, WORK_AUT))
+                rb.set_target(dp.parse_as_ref(val_normalized))
 
-                # Notes
-                # linked alternate script field(s)
-                self.__add_linked_880s_as_notes(record, field.tag, rb)
+                # Notes: n/a
 
                 relationships.append(rb.build())
+        return relationships
 
-        # Projected Publication Date (NR)
-        for val in record.get_subfields('263','a'):
-            if not val.isdigit():
-                continue
-
-            val_normalized = None
-            if len(val) == 4:  # YYMM
-                yy, mm = val[:2], val[2:]
-                val_normalized = f"19{yy}-{mm}" if int(yy) >= 80 else f"20{yy}-{mm}"
-            elif len(val) == 6:  # YYYYMM
-                val_normalized = f"{val[:4]}-{val[4:]}"
-            elif len(val) == 8:  # YYYYMMDD
-                val_normalized = f"{val[:4]}-{val[4:6]}-{val[6:]}"
-            if not val_normalized:
-                continue
-
-            rb = RelationshipBuilder()
-
-            # Relationship Name
-            rel_name = "Projected publication date"
-
-            # Name/Type
-            rb.set_name(rel_name)
-            rb.set_type(self.get_relation_type(rel_name))
-
-            # Degree: n/a
-            # Enumeration: n/a
-            # Chronology: n/a
-
-            # Target
-            rb.set_target(dp.parse_as_ref(val_normalized))
-
-            # Notes: n/a
-
-            relationships.append(rb.build())
 
+    def __transform_264(self, record, fields):
         # Production, Publication, Distribution, Manufacture, and Copyright Notice (R) (R)
-        for field in record.get_fields('264'):
+        relationships = []
+        for field in fields:
             if not (field.indicator2 == '4' and 'c' in field):
                 continue
 
@@ -254,9 +192,13 @@ class RelationshipTransformerBib:
             # Notes: n/a
 
             relationships.append(rb.build())
+        return relationships
+
 
+    def __transform_510(self, record, fields):
         # Citation/References Note (R)
-        for field in record.get_fields('510'):
+        relationships = []
+        for field in fields:
             if 'w' not in field:
                 continue
 
@@ -291,114 +233,13 @@ class RelationshipTransformerBib:
             # Notes: n/a
 
             relationships.append(rb.build())
+        return relationships
 
 
-        # Personal Name as Subject (R)
-        for field in record.get_fields('600'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Subject"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-                # Enumeration: n/a
-
-                # Chronology
-                rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, BEING))
-
-                # Notes:
-                for val in field.get_subfields('j'):
-                    rb.add_note(val,
-                                role = "annotation")
-
-                relationships.append(rb.build())
-
-        # Organization Name as Subject (R) / Organization/Jurisdiction Name, undisplayed/unindexed as phrase (R)
-        for field in record.get_fields('610','987'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Subject"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-                # Enumeration: n/a
-
-                # Chronology
-                rb.set_time_or_duration_ref(tfcm.get_field_chronology(field))
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, ORGANIZATION))
-
-                # Notes:
-                for val in field.get_subfields('j'):
-                    rb.add_note(val,
-                                role = "annotation")
-
-                relationships.append(rb.build())
-
-        # Event Name as Subject (R)
-        for field in record.get_fields('611'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('j') or ["Subject"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-                # Enumeration: n/a
-                # Chronology: n/a
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, EVENT))
-
-                # Notes: n/a
-
-                relationships.append(rb.build())
-
-        # Title as Subject (R)
-        for field in record.get_fields('630'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Subject"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree: n/a
-                # Enumeration: n/a
-                # Chronology: n/a
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, WORK_AUT))
-
-                # Notes
-                # linked alternate script field(s)
-                self.__add_linked_880s_as_notes(record, field.tag, rb)
-
-                relationships.append(rb.build())
-
+    def __transform_650(self, record, fields):
         # Topical Subject (R)
-        for field in record.get_fields('650'):
+        relationships = []
+        for field in fields:
             # Relationship Name(s)
             rel_names = field.get_subfields('e') or ["Topic"] if field.indicator2 in '23' else ["Subject"]
             for rel_name in rel_names:
@@ -439,38 +280,13 @@ class RelationshipTransformerBib:
                 # Notes: n/a
 
                 relationships.append(rb.build())
+        return relationships
 
-        # Geographic Subject (R)
-        for field in record.get_fields('651'):
-            # Relationship Name(s)
-            rel_names = field.get_subfields('e') or ["Subject"]
-            for rel_name in rel_names:
-                rb = RelationshipBuilder()
-
-                # Name/Type
-                rel_name = rel_name.rstrip(': ')
-                rb.set_name(rel_name)
-                rb.set_type(self.get_relation_type(rel_name))
-
-                # Degree
-                rb.set_degree({'1': 'primary',
-                               '2': 'secondary'}.get(field.indicator1))
-
-                # Enumeration: n/a
-                # Chronology: n/a
-
-                # Target
-                rb.set_target(self.build_ref_from_field(field, PLACE))
-
-                # Notes:
-                for val in field.get_subfields('j'):
-                    rb.add_note(val,
-                                role = "annotation")
-
-                relationships.append(rb.build())
 
+    def __transform_653(self, record, fields):
         # Keyword not otherwise in Record (Lane: separate $a for each word/phrase) (R)
-        for field in record.get_fields('653'):
+        relationships = []
+        for field in fields:
             # Relationship Name(s)
             rel_names = field.get_subfields('e') or ["Keyword"]
             for rel_name in rel_names:
@@ -495,37 +311,13 @@ class RelationshipTransformerBib:
                     rb.set_target(tfcm.build_simple_ref(keyword_val, STRING))
 
                     relationships.append(rb.build())
+        return relationships
 
-        # Category Term (Form/Genre/Format/Subset) (R)
-        for field in record.get_fields('655'):
-            # ignore subsets and categories imported from MHFD
-            if field.indicator1 in '78' or field.indicator2 == '9':
-                continue
-
-            rb = RelationshipBuilder()
-
-            # Name/Type
-            rel_name = "Category"
-            rb.set_name(rel_name)
-            rb.set_type(self.get_relation_type(rel_name))
-
-            # Degree
-            rb.set_degree({'1': 'primary',
-                           '2': 'secondary',
-                           '4': 'broad'}.get(field.indicator1))
-
-            # Enumeration: n/a
-            # Chronology: n/a
-
-            # Target
-            rb.set_target(self.build_ref_from_field(field, CONCEPT))
-
-            # Notes: n/a
-
-            relationships.append(rb.build())
 
+    def __transform_660(self, record, fields):
         # LC Topical Subject (Lane) (R)
-        for field in record.get_fields('660'):
+        relationships = []
+        for field in fields:
             rb = RelationshipBuilder()
 
             # Name/Type
@@ -552,9 +344,13 @@ class RelationshipTransformerBib:
                         role = "description")
 
             relationships.append(rb.build())
+        return relationships
 
+
+    def __transform_700_710(self, record, fields):
         # Personal / Organization Name, Added Entry (R)
-        for field in record.get_fields('700','710'):
+        relationships = []
+        for field in fields:
             # from MFHD
             if field.indicator2 == '8':
                 continue
@@ -589,9 +385,13 @@ class RelationshipTransformerBib:
 
                 rb.set_target(self.build_ref_from_field(field, BEING if field.tag == '700' else ORGANIZATION))
                 relationships.append(rb.build())
+        return relationships
+
 
+    def __transform_730_830(self, record, fields):
         # Uniform Title, [Series] Added Entry (R)
-        for field in record.get_fields('730','830'):
+        relationships = []
+        for field in fields:
             # from MFHD
             if field.indicator2 == '8':
                 continue
@@ -615,14 +415,14 @@ class RelationshipTransformerBib:
 
             # Notes
             # linked alternate script field(s)
-            self.__add_linked_880s_as_notes(record, field.tag, rb)
+            self.add_linked_880s_as_notes(record, field.tag, rb)
             # ad hoc subfields for series notes
             for val in field.get_subfields('@'):
                 rb.add_note(val,
                             role = "transcription",
                             type_link_title = "Series Note",
-                            type_href_URI = Indexer.simple_lookup("Series Note", CONCEPT),
-                            type_set_URI = Indexer.simple_lookup("Note Types", CONCEPT))
+                            type_href_URI = Vocabulary.href("Series Note", CONCEPT),
+                            type_set_URI = Vocabulary.href("Note Types", CONCEPT))
 
             # @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
             # @@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@@
@@ -632,34 +432,13 @@ class RelationshipTransformerBib:
             rb.set_target(self.build_ref_from_field(field, WORK_AUT if field.tag == '730' else WORK_INST))
 
             relationships.append(rb.build())
+        return relationships
 
-        # Variant Title, Added Entry (R)
-        for field in record.get_fields('740'):
-            # only those marked as analytical titles
-            if field.indicator2 != '2':
-                continue
-
-            rb = RelationshipBuilder()
-
-            # Name/Type
-            rel_name = "Analytical title"
-            rb.set_name(rel_name)
-            rb.set_type(self.get_relation_type(rel_name))
-
-            # Degree: n/a
-            # Enumeration: n/a
-            # Chronology: n/a
-
-            # Notes
-            # linked alternate script field(s)
-            self.__add_linked_880s_as_notes(record, field.tag, rb)
-
-            rb.set_target(self.build_ref_from_field(field, WORK_INST))
-
-            relationships.append(rb.build())
 
+    def __transform_76X_78X(self, record, fields):
         # 76x-78x Linking Entry Fields
-        for field in record.get_fields('760','762','765','767','770','772','773','775','776','777','780','785','787','789'):
+        relationships = []
+        for field in fields:
             rel_names = field.get_subfields('e') or [self.__get_linking_entry_field_default_relator(field)]
             for rel_name in rel_names:
                 rb = RelationshipBuilder()
@@ -720,7 +499,7 @@ class RelationshipTransformerBib:
                     target_identity = Indexer.reverse_lookup(target_ctrlno)
                     # if invalid control number, print warning, use dummy name
                     if not target_identity:
-                        logger.warning(f"{record.get_control_number()}: {field}: invalid href, default title to 'Unknown work'")
+                        Diagnostics.report("invalid href, default title to 'Unknown work'", field.tag, field)
                         target_ref = tfcm.build_simple_ref("Unknown work", WORK_INST)
                     else:
                         target_ref = self.build_ref_from_field(Field('149','  ',target_identity), WORK_INST)
@@ -738,23 +517,13 @@ class RelationshipTransformerBib:
                     rb.add_note(val,
                                 role = "documentation" if code == 'n' and field.indicator1 != '0' else "annotation",
                                 type_link_title = note_type,
-                                type_href_URI = Indexer.simple_lookup(note_type, CONCEPT) if note_type else None,
-                                type_set_URI = Indexer.simple_lookup("Note Types", CONCEPT) if note_type else None)  # what should this set be??
+                                type_href_URI = Vocabulary.href(note_type, CONCEPT) if note_type else None,
+                                type_set_URI = Vocabulary.href("Note Types", CONCEPT) if note_type else None)  # what should this set be??
 
                 relationships.append(rb.build())
-
-
         return relationships
 
 
-    def __add_linked_880s_as_notes(self, record, tag, rb):
-        # ^6 130, 630, 730, 740, 830 --> note on relationship
-        for field_880 in record.get_fields('880'):
-            if '6' in field_880 and field_880['6'][:3] == tag:
-                rb.add_note(tfcm.concat_subfs(field_880),
-                            role = "transcription")
-
-
     # def __preprocess_w_only_linking_fields(self, record):
     #     """
     #     If a 7XX linking field links only a control number,
@@ -806,3 +575,108 @@ class RelationshipTransformerBib:
                 '777': "Issued with",
                 '787': "Related title",
                 '789': "Related title"}.get(field.tag)
+
+
+    # Relationship fields, in order of output.
+    # See RelationshipTransformer.compile_field_map for rule format.
+    RELATIONSHIP_FIELD_MAP = (
+        # Language Code (NR)
+        { 'tags' : ('041',),
+          'handler' : __transform_041 },
+        # Personal Name, Main Entry (NR)
+        { 'tags' : ('100',),
+          'handler' : __transform_100 },
+        # Organization Name, Main Entry (NR)
+        { 'tags' : ('110',),
+          'relator' : 'e', 'default' : "Related",
+          'degree' : 'primary',
+          'enumeration' : True,
+          'element_type' : ORGANIZATION,
+          'notes' : {'j': "annotation",
+                     'u': "transcription",
+                     'v': "transcription",
+                     'z': "transcription"} },
+        # Event Name, Main Entry (NR) / Added Entry (R)
+        { 'tags' : ('111','711'),
+          'relator' : 'j', 'default' : "Related",
+          'degree' : lambda field: 'primary' if field.tag.startswith('1') else 'secondary',
+          'enumeration' : True,
+          'element_type' : EVENT },
+        # Uniform Title, Main Entry (NR)
+        { 'tags' : ('130',),
+          'condition' : lambda field: 'w' in field,  # if not, these are only treated as variants
+          'default' : "Realization of",
+          'element_type' : WORK_AUT,
+          'linked_880_notes' : True },
+        # Projected Publication Date (NR)
+        { 'tags' : ('263',),
+          'handler' : __transform_263 },
+        # Production, Publication, Distribution, Manufacture, and Copyright Notice (R) (R)
+        { 'tags' : ('264',),
+          'handler' : __transform_264 },
+        # Citation/References Note (R)
+        { 'tags' : ('510',),
+          'handler' : __transform_510 },
+        # Personal Name as Subject (R)
+        { 'tags' : ('600',),
+          'relator' : 'e', 'default' : "Subject",
+          'chronology' : True,
+          'element_type' : BEING,
+          'notes' : {'j': "annotation"} },
+        # Organization Name as Subject (R) / Organization/Jurisdiction Name, undisplayed/unindexed as phrase (R)
+        { 'tags' : ('610','987'),
+          'relator' : 'e', 'default' : "Subject",
+          'chronology' : True,
+          'element_type' : ORGANIZATION,
+          'notes' : {'j': "annotation"} },
+        # Event Name as Subject (R)
+        { 'tags' : ('611',),
+          'relator' : 'j', 'default' : "Subject",
+          'element_type' : EVENT },
+        # Title as Subject (R)
+        { 'tags' : ('630',),
+          'relator' : 'e', 'default' : "Subject",
+          'element_type' : WORK_AUT,
+          'linked_880_notes' : True },
+        # Topical Subject (R)
+        { 'tags' : ('650',),
+          'handler' : __transform_650 },
+        # Geographic Subject (R)
+        { 'tags' : ('651',),
+          'relator' : 'e', 'default' : "Subject",
+          'degree' : {'1': 'primary',
+                      '2': 'secondary'},
+          'element_type' : PLACE,
+          'notes' : {'j': "annotation"} },
+        # Keyword not otherwise in Record (Lane: separate $a for each word/phrase) (R)
+        { 'tags' : ('653',),
+          'handler' : __transform_653 },
+        # Category Term (Form/Genre/Format/Subset) (R)
+        { 'tags' : ('655',),
+          # ignore subsets and categories imported from MHFD
+          'condition' : lambda field: not (field.indicator1 in '78' or field.indicator2 == '9'),
+          'default' : "Category",
+          'degree' : {'1': 'primary',
+                      '2': 'secondary',
+                      '4': 'broad'},
+          'element_type' : CONCEPT },
+        # LC Topical Subject (Lane) (R)
+        { 'tags' : ('660',),
+          'handler' : __transform_660 },
+        # Personal / Organization Name, Added Entry (R)
+        { 'tags' : ('700','710'),
+          'handler' : __transform_700_710 },
+        # Uniform Title, [Series] Added Entry (R)
+        { 'tags' : ('730','830'),
+          'handler' : __transform_730_830 },
+        # Variant Title, Added Entry (R)
+        { 'tags' : ('740',),
+          # only those marked as analytical titles
+          'condition' : lambda field: field.indicator2 == '2',
+          'default' : "Analytical title",
+          'element_type' : WORK_INST,
+          'linked_880_notes' : True },
+        # 76x-78x Linking Entry Fields
+        { 'tags' : ('760','762','765','767','770','772','773','775','776','777','780','785','787','789'),
+          'handler' : __transform_76X_78X },
+    )
@@ -13,6 +13,8 @@ from ..builders import RelationshipBuilder, WorkRefBuilder
 from . import tf_common_methods as tfcm
 
 from .Indexer import Indexer
+from .Vocabulary import Vocabulary
+from .Diagnostics import Diagnostics
 from .DateTimeParser import DateTimeParser
 
 
@@ -26,6 +28,9 @@ class RelationshipTransformerHdg:
         self.get_relation_type = rlt.get_relation_type
         self.build_ref_from_field = rlt.build_ref_from_field
         # self.extract_enumeration = rlt.extract_enumeration
+        # build location Place refs up front
+        Vocabulary.register_field_refs(PLACE, [self.__get_location_field(loc_code) for loc_code in self.location_code_to_relator_map],
+                                       self.build_ref_from_field)
 
     def transform_relationships(self, record):
         """
@@ -71,7 +76,7 @@ class RelationshipTransformerHdg:
 
             # Name/Type
             if 'b' not in field:
-                logger.warning(f"{record.get_control_number()}: loc code ($b) not found: {field}")
+                Diagnostics.report("loc code ($b) not found", field.tag, field)
                 continue
             loc_code = field['b'].strip(' .').upper()
             rel_name = self.location_code_to_relator_map.get(loc_code, "Access")
@@ -90,7 +95,7 @@ class RelationshipTransformerHdg:
             # Chronology: n/a
 
             # Target
-            rb.set_target(self.build_ref_from_field(Field('651',' 7',['a',loc_code]), PLACE))
+            rb.set_target(Vocabulary.field_ref(self.__get_location_field(loc_code), PLACE, self.build_ref_from_field))
 
             # Notes
             # map ind 1
@@ -174,6 +179,10 @@ class RelationshipTransformerHdg:
 
         return relationships
 
+    @staticmethod
+    def __get_location_field(loc_code):
+        return Field('651',' 7',['a',loc_code])
+
     location_code_to_relator_map = {
         # "ACQ": "???",
         "APER": "Stored",
@@ -0,0 +1,282 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Indexer tables in an SQLite database, read on demand rather than loaded
+into memory, with secondary indexes for conflicts and prefix queries,
+and transactional incremental updates.
+"""
+
+import os, json, time, sqlite3, threading, weakref
+from collections.abc import Mapping
+from itertools import islice
+
+
+class SQLiteIndex:
+    """
+    SQLite (WAL mode) store of the Indexer tables:
+
+        identities (element_type, identity, ctrlno)   -- main and variant identities
+        identity_sources (element_type, identity, ctrlno, is_main)
+                                                      -- each record's contribution to identities
+        reverse    (ctrlno, auth_form)
+        rel_types  (rel_name, rel_types)              -- JSON list
+        bib_to_hdg (bib_ctrlno, hdg_ctrlnos)          -- JSON list
+        meta       (key, value)                       -- format version, source snapshot, counts,
+                                                      -- build time, count of updates since
+
+    Built whole into a temporary file that is renamed into place once
+    complete (while no other process has it open; connections of this
+    process to it are closed first, and reopen on next use). identities holds what
+    identity_sources resolve to, as Indexer generates the index: a main
+    identity of one record wins out over variants of others, and more than
+    one main identity, or else variant, is a conflict; so updates can
+    resolve each identity they touch again. Connections are per process (reopened after fork) and
+    shared between threads, for reading; cache_kb sets the page cache size.
+    """
+    # increment when the schema changes
+    FORMAT_VERSION = 2
+    CONFLICT = "conflict"
+
+    SCHEMA = """
+        CREATE TABLE identities (element_type TEXT NOT NULL, identity TEXT NOT NULL, ctrlno TEXT NOT NULL,
+                                 PRIMARY KEY (element_type, identity)) WITHOUT ROWID;
+        CREATE INDEX identities_ctrlno ON identities (ctrlno, element_type);
+        CREATE TABLE identity_sources (element_type TEXT NOT NULL, identity TEXT NOT NULL, ctrlno TEXT NOT NULL,
+                                       is_main INTEGER NOT NULL);
+        CREATE INDEX identity_sources_identity ON identity_sources (element_type, identity);
+        CREATE INDEX identity_sources_ctrlno ON identity_sources (ctrlno);
+        CREATE TABLE reverse (ctrlno TEXT PRIMARY KEY, auth_form TEXT) WITHOUT ROWID;
+        CREATE TABLE rel_types (rel_name TEXT PRIMARY KEY, rel_types TEXT NOT NULL) WITHOUT ROWID;
+        CREATE TABLE bib_to_hdg (bib_ctrlno TEXT PRIMARY KEY, hdg_ctrlnos TEXT NOT NULL) WITHOUT ROWID;
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+    """
+
+    # SQLiteIndexes of this process, so that build can close their connections
+    instances = weakref.WeakSet()
+
+    def __init__(self, path, cache_kb=16384):
+        self.path, self.cache_kb = str(path), cache_kb
+        self.pid, self.db = None, None
+        self.lock = threading.Lock()
+        self.instances.add(self)
+
+    @property
+    def connection(self):
+        # sqlite connections mustn't be used across fork
+        if self.pid != os.getpid():
+            self.db = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(f"PRAGMA cache_size=-{int(self.cache_kb)}")
+            self.pid = os.getpid()
+        return self.db
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            return self.connection.execute(sql, params).fetchall()
+
+    def close(self):
+        with self.lock:
+            if self.db is not None and self.pid == os.getpid():
+                self.db.close()
+            self.pid, self.db = None, None
+
+
+    def get_meta(self):
+        """
+        Returns meta dict, or {} if not a complete index (or not there).
+        """
+        try:
+            meta = { key : json.loads(value) for key, value in self.execute("SELECT key, value FROM meta") }
+        except sqlite3.Error:
+            return {}
+        return meta if meta.get('complete') else {}
+
+    def check(self, source=None):
+        """
+        Returns list of reasons the index needs rebuilding (empty if none),
+        as IndexManifest.check.
+        """
+        if not os.path.exists(self.path):
+            return [f"{os.path.basename(self.path)} missing"]
+        meta = self.get_meta()
+        if not meta:
+            return [f"{os.path.basename(self.path)} incomplete"]
+        if meta['format_version'] != self.FORMAT_VERSION:
+            return [f"{os.path.basename(self.path)} format version {meta['format_version']}, expected {self.FORMAT_VERSION}"]
+        if source is not None and meta['source'] is not None and meta['source'] != source:
+            return [f"{os.path.basename(self.path)} generated from other record source snapshot"]
+        return []
+
+    def get_tables(self):
+        """
+        Dict of SQLiteIndexTables in the layout of the Indexer tables,
+        with the main index by element type.
+        """
+        element_types = [element_type for element_type, in self.execute("SELECT DISTINCT element_type FROM identities")]
+        return {
+            'index'            : { element_type : SQLiteIndexTable(self, 'identities', 'identity', 'ctrlno', ('element_type', element_type))
+                                   for element_type in element_types },
+            'index_reverse'    : SQLiteIndexTable(self, 'reverse', 'ctrlno', 'auth_form'),
+            'index_rel_type'   : SQLiteIndexTable(self, 'rel_types', 'rel_name', 'rel_types', value_type='json'),
+            'index_bib_to_hdg' : SQLiteIndexTable(self, 'bib_to_hdg', 'bib_ctrlno', 'hdg_ctrlnos', value_type='json'),
+        }
+
+    @classmethod
+    def build(cls, path, index, index_reverse, index_rel_type, index_bib_to_hdg, identity_sources,
+              source=None, counts=None):
+        """
+        Write index tables (dicts, or mappings) to a new database at path,
+        with identity_sources, (element type, identity, ctrlno, is main)
+        of every main and variant identity of every record, as indexed.
+        """
+        path = str(path)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        db = sqlite3.connect(temp_path)
+        try:
+            db.executescript(cls.SCHEMA)
+            with db:
+                for element_type, identities in index.items():
+                    db.executemany("INSERT INTO identities (element_type, identity, ctrlno) VALUES (?, ?, ?)",
+                                   ((element_type, identity, ctrlno) for identity, ctrlno in identities.items()))
+                db.executemany("INSERT INTO identity_sources (element_type, identity, ctrlno, is_main) VALUES (?, ?, ?, ?)",
+                               identity_sources)
+                db.executemany("INSERT INTO reverse (ctrlno, auth_form) VALUES (?, ?)", index_reverse.items())
+                db.executemany("INSERT INTO rel_types (rel_name, rel_types) VALUES (?, ?)",
+                               ((rel_name, json.dumps(rel_types)) for rel_name, rel_types in index_rel_type.items()))
+                db.executemany("INSERT INTO bib_to_hdg (bib_ctrlno, hdg_ctrlnos) VALUES (?, ?)",
+                               ((bib_ctrlno, json.dumps(hdg_ctrlnos)) for bib_ctrlno, hdg_ctrlnos in index_bib_to_hdg.items()))
+                meta = { 'format_version' : cls.FORMAT_VERSION, 'source' : source, 'counts' : counts or {},
+                         'built' : time.time(), 'updates' : 0, 'complete' : True }
+                db.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                               ((key, json.dumps(value)) for key, value in meta.items()))
+            db.execute("ANALYZE")
+            db.execute("PRAGMA journal_mode=WAL")
+        finally:
+            db.close()
+        # connections to the database being replaced would go on reading it
+        for sqlite_index in list(cls.instances):
+            if sqlite_index.path == path:
+                sqlite_index.close()
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        os.replace(temp_path, path)
+
+
+    def update_record(self, ctrlno, auth_form, identities, source=None):
+        """
+        In one transaction, replace the index entries of the record with
+        control number ctrlno: its main entry form auth_form (None to remove
+        the record), and its (element type, identity) pairs, main then variants.
+        The record's old and new identities are then resolved again from
+        identity_sources, so conflicts it was party to may be resolved.
+        If source is given, it is recorded as the snapshot the index now reflects.
+        """
+        with self.lock:
+            db = self.connection
+            with db:
+                affected = set(db.execute("SELECT element_type, identity FROM identity_sources WHERE ctrlno = ?", (ctrlno,)))
+                db.execute("DELETE FROM identity_sources WHERE ctrlno = ?", (ctrlno,))
+                db.execute("DELETE FROM reverse WHERE ctrlno = ?", (ctrlno,))
+                if auth_form is not None:
+                    db.execute("INSERT INTO reverse (ctrlno, auth_form) VALUES (?, ?)", (ctrlno, auth_form))
+                    db.executemany("INSERT INTO identity_sources (element_type, identity, ctrlno, is_main) VALUES (?, ?, ?, ?)",
+                                   ((element_type, identity, ctrlno, i == 0) for i, (element_type, identity) in enumerate(identities)))
+                    affected.update((element_type, identity) for element_type, identity in identities)
+                for element_type, identity in affected:
+                    self.__resolve_identity(db, element_type, identity)
+                # so that what depends on the index contents (e.g. ResultCache) can tell it changed
+                row = db.execute("SELECT value FROM meta WHERE key = 'updates'").fetchone()
+                db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('updates', ?)",
+                           (json.dumps((0 if row is None else json.loads(row[0])) + 1),))
+                if source is not None:
+                    db.execute("UPDATE meta SET value = ? WHERE key = 'source'", (json.dumps(source),))
+
+    def __resolve_identity(self, db, element_type, identity):
+        # main identities win out over variants; more than one of either is a conflict
+        sources = db.execute("SELECT ctrlno, is_main FROM identity_sources WHERE element_type = ? AND identity = ?",
+                             (element_type, identity)).fetchall()
+        ctrlnos = [ctrlno for ctrlno, is_main in sources if is_main] or [ctrlno for ctrlno, is_main in sources]
+        if not ctrlnos:
+            db.execute("DELETE FROM identities WHERE element_type = ? AND identity = ?", (element_type, identity))
+        else:
+            db.execute("INSERT OR REPLACE INTO identities (element_type, identity, ctrlno) VALUES (?, ?, ?)",
+                       (element_type, identity, ctrlnos[0] if len(ctrlnos) == 1 else self.CONFLICT))
+
+
+class SQLiteIndexTable(Mapping):
+    """
+    Read-only Mapping view of a key --> value table of an SQLiteIndex,
+    optionally restricted to rows with a column value (e.g. element type).
+    """
+    # keys per query in get_many
+    BATCH_SIZE = 500
+
+    def __init__(self, sqlite_index, table, key_column, value_column, restriction=None, value_type='str'):
+        self.sqlite_index, self.value_type = sqlite_index, value_type
+        conditions, self.params = [], ()
+        if restriction is not None:
+            conditions, self.params = [f"{restriction[0]} = ?"], (restriction[1],)
+        def where(*more_conditions):
+            all_conditions = conditions + list(more_conditions)
+            return f" WHERE {' AND '.join(all_conditions)}" if all_conditions else ""
+        # fixed statements, so they are prepared once
+        self.get_sql = f"SELECT {value_column} FROM {table}{where(f'{key_column} = ?')}"
+        self.get_many_sql = f"SELECT {key_column}, {value_column} FROM {table}{where(f'{key_column} IN ({{}})')}"
+        self.items_sql = f"SELECT {key_column}, {value_column} FROM {table}{where()}"
+        self.count_sql = f"SELECT COUNT(*) FROM {table}{where()}"
+        self.keys_with_value_sql = f"SELECT {key_column} FROM {table}{where(f'{value_column} = ?')}"
+        self.prefix_sql = (f"SELECT {key_column}, {value_column} FROM {table}"
+                           f"{where(f'{key_column} >= ?', f'{key_column} < ?')} ORDER BY {key_column}")
+
+    def __decode_value(self, value):
+        return json.loads(value) if self.value_type == 'json' and value is not None else value
+
+    def __getitem__(self, key):
+        rows = self.sqlite_index.execute(self.get_sql, self.params + (key,))
+        if not rows:
+            raise KeyError(key)
+        return self.__decode_value(rows[0][0])
+
+    def __contains__(self, key):
+        return bool(self.sqlite_index.execute(self.get_sql, self.params + (key,)))
+
+    def get_many(self, keys, default=None):
+        """
+        Values for keys (or default if not found), BATCH_SIZE keys per query.
+        """
+        keys, values = list(keys), {}
+        unique_keys = iter(dict.fromkeys(keys))
+        while True:
+            batch = list(islice(unique_keys, self.BATCH_SIZE))
+            if not batch:
+                break
+            for key, value in self.sqlite_index.execute(self.get_many_sql.format(','.join('?' * len(batch))),
+                                                        self.params + tuple(batch)):
+                values[key] = self.__decode_value(value)
+        return [values.get(key, default) for key in keys]
+
+    def items(self):
+        return [(key, self.__decode_value(value)) for key, value in self.sqlite_index.execute(self.items_sql, self.params)]
+
+    def __iter__(self):
+        return (key for key, value in self.items())
+
+    def __len__(self):
+        return self.sqlite_index.execute(self.count_sql, self.params)[0][0]
+
+    def keys_with_value(self, value):
+        """
+        Keys with value (e.g. identities in conflict), by secondary index.
+        """
+        return [key for key, in self.sqlite_index.execute(self.keys_with_value_sql, self.params + (value,))]
+
+    def items_with_prefix(self, prefix):
+        """
+        (key, value) of keys starting with prefix, in key order.
+        """
+        return [(key, self.__decode_value(value)) for key, value in
+                self.sqlite_index.execute(self.prefix_sql, self.params + (prefix, prefix + '\U0010ffff'))]
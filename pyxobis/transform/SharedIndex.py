@@ -0,0 +1,212 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Read-only Indexer tables in a single shared memory segment,
+so that worker processes share one copy of the index.
+"""
+
+import json, struct, hashlib
+from collections.abc import Mapping
+
+
+class SharedIndexTable(Mapping):
+    """
+    Read-only str --> str (or None, or list of str) mapping, as a flat
+    open-addressing hash table in a buffer:
+
+        header   n_slots, n_entries, data_size
+        slots    n_slots x (key hash, entry offset + 1, or 0 if empty)
+        entries  key length, value length, key bytes, value bytes
+
+    Keys are hashed with 64-bit BLAKE2b, so that hashes are the same in
+    every process (unlike str hashes); collisions are probed linearly.
+    Values are decoded on each access.
+    """
+    HEADER = struct.Struct('<QQQ')
+    SLOT = struct.Struct('<QQ')
+    ENTRY = struct.Struct('<II')
+    # value length of None values
+    NONE_LENGTH = 0xFFFFFFFF
+    # separator of list values
+    LIST_SEP = '\x1f'
+
+    def __init__(self, buf, offset, value_type='str'):
+        self.buf = buf
+        self.n_slots, self.n_entries, self.data_size = self.HEADER.unpack_from(buf, offset)
+        self.mask = self.n_slots - 1
+        self.slots_offset = offset + self.HEADER.size
+        self.data_offset = self.slots_offset + self.n_slots * self.SLOT.size
+        self.value_type = value_type
+
+    @staticmethod
+    def hash_key(key_bytes):
+        return int.from_bytes(hashlib.blake2b(key_bytes, digest_size=8).digest(), 'little')
+
+    @classmethod
+    def build(cls, mapping, value_type='str'):
+        """
+        Serialize mapping as a table, returning bytes.
+        """
+        entries, entry_offsets = bytearray(), []
+        for key, value in mapping.items():
+            key_bytes = key.encode('utf-8')
+            if value is None:
+                value_bytes, value_length = b'', cls.NONE_LENGTH
+            else:
+                value_bytes = (cls.LIST_SEP.join(value) if value_type == 'list' else value).encode('utf-8')
+                value_length = len(value_bytes)
+            entry_offsets.append((cls.hash_key(key_bytes), len(entries)))
+            entries += cls.ENTRY.pack(len(key_bytes), value_length) + key_bytes + value_bytes
+        # power of two, at most half full
+        n_slots = 1
+        while n_slots < 2 * len(entry_offsets):
+            n_slots *= 2
+        mask = n_slots - 1
+        slots = [(0, 0)] * n_slots
+        for key_hash, entry_offset in entry_offsets:
+            i = key_hash & mask
+            while slots[i][1]:
+                i = (i + 1) & mask
+            slots[i] = (key_hash, entry_offset + 1)
+        table = bytearray(cls.HEADER.pack(n_slots, len(entry_offsets), len(entries)))
+        for slot in slots:
+            table += cls.SLOT.pack(*slot)
+        return bytes(table + entries)
+
+    def __find(self, key):
+        """
+        Returns (key length, value length, key offset) of key's entry, or None.
+        """
+        key_bytes = key.encode('utf-8')
+        key_hash = self.hash_key(key_bytes)
+        i = key_hash & self.mask
+        while True:
+            slot_hash, entry_offset = self.SLOT.unpack_from(self.buf, self.slots_offset + i * self.SLOT.size)
+            if not entry_offset:
+                return None
+            if slot_hash == key_hash:
+                entry_offset += self.data_offset - 1
+                key_length, value_length = self.ENTRY.unpack_from(self.buf, entry_offset)
+                key_offset = entry_offset + self.ENTRY.size
+                if self.buf[key_offset:key_offset + key_length] == key_bytes:
+                    return key_length, value_length, key_offset
+            i = (i + 1) & self.mask
+
+    def __decode_value(self, value_offset, value_length):
+        if value_length == self.NONE_LENGTH:
+            return None
+        value = bytes(self.buf[value_offset:value_offset + value_length]).decode('utf-8')
+        if self.value_type == 'list':
+            return value.split(self.LIST_SEP) if value else []
+        return value
+
+    def __getitem__(self, key):
+        found = self.__find(key) if isinstance(key, str) else None
+        if found is None:
+            raise KeyError(key)
+        key_length, value_length, key_offset = found
+        return self.__decode_value(key_offset + key_length, value_length)
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self.__find(key) is not None
+
+    def __len__(self):
+        return self.n_entries
+
+    def __iter__(self):
+        for key, value_offset, value_length in self.__iter_entries():
+            yield key
+
+    def items(self):
+        for key, value_offset, value_length in self.__iter_entries():
+            yield key, self.__decode_value(value_offset, value_length)
+
+    def __iter_entries(self):
+        entry_offset, data_end = self.data_offset, self.data_offset + self.data_size
+        while entry_offset < data_end:
+            key_length, value_length = self.ENTRY.unpack_from(self.buf, entry_offset)
+            key_offset = entry_offset + self.ENTRY.size
+            value_offset = key_offset + key_length
+            yield bytes(self.buf[key_offset:value_offset]).decode('utf-8'), value_offset, value_length
+            entry_offset = value_offset + (0 if value_length == self.NONE_LENGTH else value_length)
+
+
+class SharedIndex:
+    """
+    The Indexer's index, index_reverse, index_rel_type and index_bib_to_hdg
+    tables as SharedIndexTables in one multiprocessing.shared_memory segment:
+
+        directory length, JSON directory of table offsets, tables
+
+    Created once (by Indexer.share_index), then attached to by name.
+    Requires Python 3.8+ (multiprocessing.shared_memory), which is only
+    imported when a segment is created or attached.
+    """
+    DIRECTORY_LENGTH = struct.Struct('<Q')
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.name = shm.name
+        buf = shm.buf
+        directory_length, = self.DIRECTORY_LENGTH.unpack_from(buf, 0)
+        directory_start = self.DIRECTORY_LENGTH.size
+        tables_start = directory_start + directory_length
+        directory = json.loads(bytes(buf[directory_start:tables_start]).decode('utf-8'))
+        self.index = { element_type : SharedIndexTable(buf, tables_start + offset)
+                       for element_type, offset in directory['index'].items() }
+        self.index_reverse = SharedIndexTable(buf, tables_start + directory['index_reverse'])
+        self.index_rel_type = SharedIndexTable(buf, tables_start + directory['index_rel_type'], 'list')
+        self.index_bib_to_hdg = SharedIndexTable(buf, tables_start + directory['index_bib_to_hdg'], 'list')
+
+    @classmethod
+    def create(cls, index, index_reverse, index_rel_type, index_bib_to_hdg):
+        """
+        Copy index tables (dicts) into a new shared memory segment.
+        """
+        # directory of table offsets, from the end of the directory
+        tables, directory = bytearray(), { 'index' : {} }
+        for element_type, identities in index.items():
+            directory['index'][element_type] = len(tables)
+            tables += SharedIndexTable.build(identities)
+        directory['index_reverse'] = len(tables)
+        tables += SharedIndexTable.build(index_reverse)
+        directory['index_rel_type'] = len(tables)
+        tables += SharedIndexTable.build(index_rel_type, 'list')
+        directory['index_bib_to_hdg'] = len(tables)
+        tables += SharedIndexTable.build(index_bib_to_hdg, 'list')
+        from multiprocessing import shared_memory
+        directory_bytes = json.dumps(directory).encode('utf-8')
+        header = cls.DIRECTORY_LENGTH.pack(len(directory_bytes)) + directory_bytes
+        shm = shared_memory.SharedMemory(create=True, size=len(header) + len(tables))
+        shm.buf[:len(header)] = header
+        shm.buf[len(header):len(header) + len(tables)] = tables
+        return cls(shm)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attach to an existing segment by name, without taking ownership of it.
+        """
+        from multiprocessing import shared_memory, resource_tracker
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # before Python 3.13, attaching registers the segment to be removed when this process exits
+            # (and unregistering would unregister the creator's registration, in a shared resource tracker)
+            register, resource_tracker.register = resource_tracker.register, lambda name, rtype: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        return cls(shm)
+
+    def close(self):
+        self.index = self.index_reverse = self.index_rel_type = self.index_bib_to_hdg = None
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Remove the segment (by its creator, when no longer needed).
+        """
+        self.shm.unlink()
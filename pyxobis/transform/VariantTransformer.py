@@ -13,6 +13,7 @@ from ..builders import *
 from . import tf_common_methods as tfcm
 
 from .Indexer import Indexer
+from .Vocabulary import Vocabulary
 from .DateTimeParser import DateTimeParser
 from .NameParser import NameParser
 
@@ -22,7 +23,9 @@ class VariantTransformer:
     Methods for extracting and building Variant objects from pymarc Records.
     """
     def __init__(self):
-        pass
+        # resolve fixed vocabulary up front
+        Vocabulary.register(CONCEPT, ["Equivalence"])
+        Vocabulary.register(RELATIONSHIP, ["Tree number", "Uniform title"])
 
     def transform_variants(self, record):
         """
@@ -140,8 +143,8 @@ class VariantTransformer:
             # MeSH tree top nodes
             entry_type = "Tree number"
             cvb.set_type(entry_type,
-                         Indexer.simple_lookup("Equivalence", CONCEPT),
-                         Indexer.simple_lookup(entry_type, RELATIONSHIP))
+                         Vocabulary.href("Equivalence", CONCEPT),
+                         Vocabulary.href(entry_type, RELATIONSHIP))
             cvb.add_name(field['a'])
             return cvb.build()
 
@@ -592,8 +595,8 @@ class VariantTransformer:
         type_kwargs, type_time_or_duration_ref = tfcm.get_type_and_time_from_relator(field)
         if field.tag == '130':
             type_kwargs = type_kwargs or { 'link_title' : "Uniform title",
-                        'set_URI'    : Indexer.simple_lookup("Equivalence", CONCEPT),
-                        'href_URI'   : Indexer.simple_lookup("Uniform title", RELATIONSHIP) }
+                        'set_URI'    : Vocabulary.href("Equivalence", CONCEPT),
+                        'href_URI'   : Vocabulary.href("Uniform title", RELATIONSHIP) }
         if type_kwargs:
             wvb.set_type(**type_kwargs)
         if type_time_or_duration_ref is not None:
@@ -788,7 +791,7 @@ class VariantTransformer:
                 entry_type = "Added title for website"
 
         type_kwargs = { 'link_title' : entry_type,
-                        'set_URI'    : Indexer.simple_lookup("Equivalence", CONCEPT),
+                        'set_URI'    : Vocabulary.href("Equivalence", CONCEPT),
                         'href_URI'   : Indexer.simple_lookup(entry_type, RELATIONSHIP)
                       } if entry_type else {}
 
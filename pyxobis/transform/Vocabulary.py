@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Registry of the fixed vocabulary the transformers emit for many records
+(note types, subsets, holdings types, identifier sources, etc.),
+resolved against the Indexer once and then read from a table.
+"""
+
+from loguru import logger
+
+from .Indexer import Indexer
+
+
+class Vocabulary:
+    # { (element type, name) : href }
+    hrefs = {}
+    # { (element type, name) : Ref },
+    # or for refs built from fields, { (element type, tag, indicators, subfields) : Ref }
+    refs = {}
+
+
+    @classmethod
+    def href(cls, name, element_type):
+        """
+        Control number of name as element type, as Indexer.simple_lookup,
+        looked up only on first use.
+        """
+        key = (element_type, name)
+        href = cls.hrefs.get(key)
+        if href is None:
+            href = cls.hrefs[key] = Indexer.simple_lookup(name, element_type)
+        return href
+
+    @classmethod
+    def ref(cls, name, element_type):
+        """
+        Ref to name as element type, as tfcm.build_simple_ref,
+        built only on first use. Refs are immutable, so can be shared.
+        """
+        key = (element_type, name)
+        ref = cls.refs.get(key)
+        if ref is None:
+            # imported here, as tf_common_methods itself reads from Vocabulary
+            from . import tf_common_methods as tfcm
+            ref = cls.refs[key] = tfcm.build_simple_ref(name, element_type)
+        return ref
+
+    @classmethod
+    def field_ref(cls, field, element_type, build_ref):
+        """
+        Ref built from a constant field by build_ref(field, element_type),
+        built only on first use.
+        """
+        key = (element_type, field.tag, tuple(field.indicators), tuple(field.subfields))
+        ref = cls.refs.get(key)
+        if ref is None:
+            ref = cls.refs[key] = build_ref(field, element_type)
+        return ref
+
+
+    @classmethod
+    def register(cls, element_type, names, as_refs=False):
+        """
+        Resolve names of element type up front, as hrefs or (if as_refs) Refs,
+        and warn of any that are unverified or in conflict.
+        """
+        if not as_refs:
+            # look up new names together
+            new_names = list(dict.fromkeys(name for name in names if (element_type, name) not in cls.hrefs))
+            for name, href in zip(new_names, Indexer.simple_lookup_many(new_names, element_type)):
+                cls.hrefs[(element_type, name)] = href
+        resolve = cls.ref if as_refs else cls.href
+        cls.__warn_unresolved(element_type, [name for name in names
+                                             if cls.__is_unresolved(resolve(name, element_type))])
+
+    @classmethod
+    def register_field_refs(cls, element_type, fields, build_ref):
+        """
+        Build Refs from constant fields up front, as field_ref,
+        and warn of any that are unverified or in conflict.
+        """
+        cls.__warn_unresolved(element_type, [str(field) for field in fields
+                                             if cls.__is_unresolved(cls.field_ref(field, element_type, build_ref))])
+
+    @classmethod
+    def clear(cls):
+        """
+        Forget all hrefs and Refs resolved so far, so they are resolved
+        again on next use (done by the Indexer whenever its tables change).
+        Transformers read fixed vocabulary from here on use, not at construction.
+        """
+        cls.hrefs, cls.refs = {}, {}
+
+    @classmethod
+    def list_unresolved(cls):
+        """
+        Returns a dict by element type of sorted names (or fields)
+        resolved so far that were unverified or in conflict.
+        """
+        unresolved = {}
+        for table in (cls.hrefs, cls.refs):
+            for key, value in table.items():
+                if cls.__is_unresolved(value):
+                    element_type, name = key[0], key[1] if len(key) == 2 else key[1:]
+                    unresolved.setdefault(element_type, set()).add(str(name))
+        return { element_type : sorted(names) for element_type, names in unresolved.items() }
+
+
+    @staticmethod
+    def __is_unresolved(href_or_ref):
+        if not isinstance(href_or_ref, str):
+            if getattr(href_or_ref, 'link_attributes', None) is None:
+                return False
+            href_or_ref = href_or_ref.link_attributes.href.anyURI
+        return href_or_ref in (Indexer.UNVERIFIED, Indexer.CONFLICT)
+
+    @staticmethod
+    def __warn_unresolved(element_type, names):
+        if names:
+            logger.warning(f"{len(names)} {element_type} vocabulary entries unverified or in conflict: {'; '.join(names)}")
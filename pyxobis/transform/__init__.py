@@ -2,6 +2,13 @@
 # -*- coding: UTF-8 -*-
 
 from .RecordTransformer import RecordTransformer
+from .RecordPrefilter import RecordPrefilter
+from .LazyLaneMARCRecord import LazyLaneMARCRecord
+from .RecordSource import RecordSource, FileRecordSource
+from .IndexManifest import IndexManifest
+from .SharedIndex import SharedIndex, SharedIndexTable
+from .IndexServer import IndexServer, IndexClient, RemoteIndexTable
+from .SQLiteIndex import SQLiteIndex, SQLiteIndexTable
 
 from .Indexer import Indexer
 Indexer.init_index()
@@ -14,3 +21,8 @@ from .NameParser import NameParser
 from .EntryStringFormatter import EntryStringFormatter
 
 from .FieldTransposer import FieldTransposer
+
+from .Vocabulary import Vocabulary
+
+from .Diagnostics import Diagnostics
+from .Metrics import Metrics
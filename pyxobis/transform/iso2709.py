@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+# -*- coding: UTF-8 -*-
+
+"""
+Static methods for reading raw MARC 21 transmission format (ISO 2709) data
+without decoding whole records into pymarc.
+"""
+
+from pymarc import Field, Record
+from pymarc.marc8 import marc8_to_unicode
+
+LEADER_LEN = 24
+DIRECTORY_ENTRY_LEN = 12
+SUBFIELD_INDICATOR = b'\x1f'
+
+
+def iter_raw_records(inf):
+    """
+    Read binary file object inf as a sequence of MARC records.
+    Yields a tuple of each record's byte offset in the file and its raw bytes.
+    """
+    offset = 0
+    while True:
+        record_length = inf.read(5)
+        if len(record_length) < 5 or not record_length.strip():
+            return
+        data = record_length + inf.read(int(record_length) - 5)
+        yield offset, data
+        offset += len(data)
+
+
+def read_directory(data):
+    """
+    Parse the leader and directory of raw MARC record data.
+    Returns the leader string, the base address of the field data,
+    and a list of directory entries as (tag, length, offset) tuples.
+    """
+    leader = data[:LEADER_LEN].decode('ascii')
+    base_address = int(data[12:17])
+    directory = data[LEADER_LEN:base_address-1].decode('ascii')
+    entries = []
+    for entry_start in range(0, len(directory) - DIRECTORY_ENTRY_LEN + 1, DIRECTORY_ENTRY_LEN):
+        entry = directory[entry_start:entry_start+DIRECTORY_ENTRY_LEN]
+        entries.append((entry[:3], int(entry[3:7]), int(entry[7:12])))
+    return leader, base_address, entries
+
+
+def get_field_data(data, base_address, entry):
+    """
+    Return the raw bytes of the field at directory entry,
+    without its field terminator.
+    """
+    tag, length, offset = entry
+    return data[base_address + offset : base_address + offset + length - 1]
+
+
+def decode_field(tag, field_data, leader):
+    """
+    Decode raw field bytes into a pymarc Field, as pymarc's MARCReader would.
+    """
+    utf8 = leader[9] == 'a'
+    # assume controlfields are numeric, as pymarc does
+    if tag < '010' and tag.isdigit():
+        return Field(tag=tag, data=field_data.decode('utf-8' if utf8 else 'iso8859-1'))
+    subs = field_data.split(SUBFIELD_INDICATOR)
+    indicators = subs[0].decode('ascii')
+    subfields = []
+    for subfield in subs[1:]:
+        if not subfield:
+            continue
+        try:
+            code = subfield[0:1].decode('ascii')
+        except UnicodeDecodeError:
+            # let pymarc normalize the invalid subfield code
+            return decode_field_with_pymarc(tag, field_data, leader)
+        subfields.append(code)
+        subfields.append(subfield[1:].decode('utf-8') if utf8 else marc8_to_unicode(subfield[1:]))
+    return Field(tag = tag,
+                 indicators = [(indicators[0:1] or ' '), (indicators[1:2] or ' ')],
+                 subfields = subfields)
+
+
+def decode_field_with_pymarc(tag, field_data, leader):
+    """
+    Decode raw field bytes by wrapping them in a one-field record for pymarc.
+    Slow; for edge cases only.
+    """
+    directory = f"{tag}{len(field_data)+1:04d}00000".encode('ascii') + b'\x1e'
+    base_address = LEADER_LEN + len(directory)
+    body = directory + field_data + b'\x1e\x1d'
+    record_length = LEADER_LEN + len(body)
+    leader = f"{record_length:05d}{leader[5:12]}{base_address:05d}{leader[17:]}"
+    return Record(data=leader.encode('ascii') + body).fields[0]
+
+
+def decode_fields(data, tags=None):
+    """
+    Decode only the fields of raw MARC record data whose tags are in tags
+    (or all fields, if None), in record order.
+    Returns the leader string and a list of pymarc Fields.
+    """
+    leader, base_address, entries = read_directory(data)
+    fields = [decode_field(entry[0], get_field_data(data, base_address, entry), leader)
+              for entry in entries if tags is None or entry[0] in tags]
+    return leader, fields
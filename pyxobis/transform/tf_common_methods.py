@@ -15,6 +15,7 @@ from ..builders import *
 
 from .Indexer import Indexer
 from .DateTimeParser import DateTimeParser
+from .Vocabulary import Vocabulary
 
 
 def xmlpp(element):
@@ -78,7 +79,7 @@ def get_type_and_time_from_relator(field):
     if entry_type and not entry_type.startswith('Includes'):
         entry_type = entry_type.rstrip(':').strip()
         type_kwargs = { 'link_title' : entry_type,
-                        'set_URI'    : Indexer.simple_lookup("Equivalence", CONCEPT),
+                        'set_URI'    : Vocabulary.href("Equivalence", CONCEPT),
                         'href_URI'   : Indexer.simple_lookup(entry_type, RELATIONSHIP) }
 
     return type_kwargs, get_field_chronology(field)
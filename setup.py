@@ -16,7 +16,7 @@ setup(
     author = 'Alex DelPriore',
     author_email = 'delpriore@stanford.edu',
     license = 'Copyright © 2019 The Board of Trustees of The Leland Stanford Junior University, All Rights Reserved',
-    packages = find_packages(),
+    packages = find_packages(exclude=['benchmarks', 'benchmarks.*']),
     python_requires='>=3.7',
     install_requires = ['pymarc==3.1.L',
                         'lxml==4.6.2',